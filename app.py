@@ -1,21 +1,27 @@
 from __future__ import annotations
 
 import streamlit as st
-from sqlalchemy import select
 
-from db import get_session, engine
-from models import Base, User
+import sql_trace
+from bootstrap import current_user_id, ensure_ready
 
 from tabs.browse import render_browse_tab
 from tabs.add import render_add_tab
 from tabs.reviews import render_reviews_tab
 from tabs.analytics import render_analytics_tab
+from tabs.sql_debug import render_sql_debug_sidebar
 
 # ---------------------------------------------------------------------
 # Page config
 # ---------------------------------------------------------------------
 st.set_page_config(page_title="The Biggest Books App", layout="wide")
 
+# Optional SQL instrumentation (SQL_TRACE=1): one trace per rerun, see sql_trace.py
+TRACE_SQL = sql_trace.enabled()
+if TRACE_SQL:
+    sql_trace.install()
+    sql_trace.begin_render(st.session_state.get("view", "Browse"))
+
 # ---------------------------------------------------------------------
 # Title
 # ---------------------------------------------------------------------
@@ -27,13 +33,14 @@ with col2:
     )
 
 # ---------------------------------------------------------------------
-# Ensure tables exist
+# Ensure tables exist (once per process, see bootstrap.py)
 # ---------------------------------------------------------------------
 try:
-    Base.metadata.create_all(bind=engine)
+    ensure_ready()
 except Exception as exc:
     st.error("Failed to initialize database tables.")
     st.exception(exc)
+    sql_trace.end_render()
     st.stop()
 
 # ---------------------------------------------------------------------
@@ -51,31 +58,29 @@ with st.sidebar:
 
 current_username = st.session_state.get("username", "demo")
 
-# Ensure user exists in DB and store id in session
-with get_session() as s:
-    user = s.scalar(select(User).where(User.username == current_username))
-    if not user:
-        user = User(username=current_username)
-        s.add(user)
-        s.flush()  # ensures user.id is available
-    st.session_state["user_id"] = user.id
+# Ensure user exists in DB; id cached in session state (user_id)
+current_user_id(current_username)
 
 # ---------------------------------------------------------------------
-# Tabs
+# Navigation
+# - Only the selected view runs (st.tabs would execute all four every rerun)
 # ---------------------------------------------------------------------
-browse_tab, add_tab, my_reviews_tab, analytics_tab = st.tabs(
-    ["Browse", "Add Book", "My Reviews", "Analytics"]
+VIEWS = {
+    "Browse": render_browse_tab,
+    "Add Book": render_add_tab,
+    "My Reviews": lambda: render_reviews_tab(current_username),
+    "Analytics": render_analytics_tab,
+}
+view = st.radio(
+    "View", list(VIEWS), horizontal=True, key="view", label_visibility="collapsed"
 )
+# Close the trace even when the view stops or reruns (st.stop / st.rerun
+# raise), so later fragment reruns on this thread count as untracked.
+try:
+    with sql_trace.section(view):
+        VIEWS[view]()
+finally:
+    trace = sql_trace.end_render()
 
-with browse_tab:
-    render_browse_tab()
-
-with add_tab:
-    render_add_tab()
-
-with my_reviews_tab:
-    render_reviews_tab(current_username)
-
-with analytics_tab:
-    render_analytics_tab()
-
+if TRACE_SQL:
+    render_sql_debug_sidebar(trace)
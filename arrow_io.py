@@ -0,0 +1,73 @@
+"""
+=============================================================
+Arrow query loading
+=============================================================
+Read query results into pyarrow Tables chunk by chunk, with explicit column
+types, for the analytics loaders.
+
+- Rows are streamed with a server-side cursor (stream_results) and converted
+  to one RecordBatch per chunk, so at most one chunk of Python row objects
+  is alive at a time.
+- Types come from a pa.Schema instead of pandas inference: integers stay
+  integers when NULLs are present, strings are Arrow strings, no object dtype.
+- Tables are immutable, so callers can cache and share them (st.cache_resource)
+  without copying; to_pandas() gives an Arrow-backed DataFrame view.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+from sqlalchemy.engine import Connection, Engine
+
+DEFAULT_CHUNK_ROWS = 10_000
+
+
+def read_arrow_table(
+    bind: Engine | Connection,
+    stmt,
+    schema: pa.Schema,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> pa.Table:
+    """
+    Execute stmt and collect the result as a Table with `schema`.
+
+    Result columns are matched to schema fields by name; extra result
+    columns are ignored. Values that do not fit the declared type raise
+    pyarrow.ArrowInvalid / ArrowTypeError.
+    """
+    batches: List[pa.RecordBatch] = []
+
+    def _run(conn: Connection) -> None:
+        result = conn.execution_options(
+            stream_results=True, yield_per=chunk_rows
+        ).execute(stmt, params or {})
+        keys = list(result.keys())
+        positions = [keys.index(f.name) for f in schema]
+        for rows in result.partitions(chunk_rows):
+            columns = list(zip(*rows))
+            batches.append(
+                pa.RecordBatch.from_arrays(
+                    [pa.array(columns[i], type=f.type) for i, f in zip(positions, schema)],
+                    schema=schema,
+                )
+            )
+
+    if isinstance(bind, Engine):
+        with bind.connect() as conn:
+            _run(conn)
+    else:
+        _run(bind)
+    return pa.Table.from_batches(batches, schema=schema)
+
+
+def to_pandas(table: pa.Table) -> pd.DataFrame:
+    """
+    DataFrame with pd.ArrowDtype columns backed by the table's buffers
+    (no per-value conversion, nullable numerics stay numeric).
+    """
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
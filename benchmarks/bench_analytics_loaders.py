@@ -0,0 +1,205 @@
+"""
+Benchmark: analytics loaders, pandas read_sql vs chunked Arrow tables.
+
+For each analytics query, compares
+  before: pd.read_sql + pd.to_numeric, cached by st.cache_data (a cache hit
+          unpickles a private copy of the frame),
+  after:  arrow_io.read_arrow_table, cached by st.cache_resource (a cache hit
+          wraps the shared Arrow table in an ArrowDtype DataFrame),
+and reports peak memory of the load (Python heap via tracemalloc plus the
+Arrow memory pool, each load in a fresh process) and mean cache-hit latency.
+
+"shelf_space_raw" is the one-row-per-review treemap query, to show how both
+paths scale with result size.
+
+    python benchmarks/bench_analytics_loaders.py --users 2000 --reviews-per-user 100
+    python benchmarks/bench_analytics_loaders.py --db books.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LOADERS = ("top_chonkers", "shelf_space", "recent_books", "shelf_space_raw")
+
+
+def build_db(path: str, books: int, users: int, reviews_per_user: int) -> None:
+    """Synthetic catalog: every book has dimensions, every user reviews N books."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    from sqlalchemy import create_engine, text
+
+    from schema import ensure_schema
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    ensure_schema(engine)
+    rnd = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO books (title, year, height_cm, width_cm, thickness_cm, pages) "
+                "VALUES (:t, :y, :h, :w, :d, :p)"
+            ),
+            [
+                {
+                    "t": f"Book {i}", "y": rnd.randint(1900, 2025), "h": rnd.randint(15, 35),
+                    "w": rnd.randint(10, 25), "d": rnd.randint(1, 8), "p": rnd.randint(50, 1500),
+                }
+                for i in range(books)
+            ],
+        )
+        conn.execute(
+            text("INSERT INTO users (username, created_at) VALUES (:u, CURRENT_TIMESTAMP)"),
+            [{"u": f"user{i}"} for i in range(users)],
+        )
+        conn.execute(
+            text(
+                "INSERT INTO reviews (user_id, book_id, rating, created_at) "
+                "VALUES (:u, :b, :r, CURRENT_TIMESTAMP)"
+            ),
+            [
+                {"u": u, "b": b, "r": rnd.randint(1, 5)}
+                for u in range(1, users + 1)
+                for b in rnd.sample(range(1, books + 1), min(reviews_per_user, books))
+            ],
+        )
+    engine.dispose()
+
+
+def _query(name: str):
+    from sqlalchemy import text
+
+    from dal import shelf_space_by_user_treemap_sql, top_chonkers_sql
+    from tabs.analytics import (
+        RECENT_BOOKS_SCHEMA,
+        SHELF_SPACE_SCHEMA,
+        TOP_CHONKERS_SCHEMA,
+        TREEMAP_MAX_USERS,
+        TREEMAP_TOP_N,
+    )
+    import pyarrow as pa
+
+    if name == "top_chonkers":
+        return top_chonkers_sql(), TOP_CHONKERS_SCHEMA, {}
+    if name == "shelf_space":
+        return (
+            shelf_space_by_user_treemap_sql(TREEMAP_TOP_N, TREEMAP_MAX_USERS),
+            SHELF_SPACE_SCHEMA,
+            {},
+        )
+    if name == "recent_books":
+        return (
+            text(
+                "SELECT id, title, year, height_cm, width_cm, thickness_cm, pages, volume_cm3 "
+                "FROM books ORDER BY id DESC LIMIT :limit"
+            ),
+            RECENT_BOOKS_SCHEMA,
+            {"limit": 8},
+        )
+    raw_schema = pa.schema(
+        [("username", pa.string()), ("book_id", pa.int64()),
+         ("title", pa.string()), ("volume_cm3", pa.float64())]
+    )
+    return shelf_space_by_user_treemap_sql(), raw_schema, {}
+
+
+def _load(name: str, mode: str):
+    import pandas as pd
+
+    from arrow_io import read_arrow_table
+    from db import engine
+
+    stmt, schema, params = _query(name)
+    if mode == "before":
+        df = pd.read_sql(stmt, engine, params=params)
+        if "volume_cm3" in df.columns:
+            df["volume_cm3"] = pd.to_numeric(df["volume_cm3"], errors="coerce")
+        return df
+    return read_arrow_table(engine, stmt, schema, params=params)
+
+
+def _peak_worker(db_url: str, name: str, mode: str, out) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    import pyarrow as pa
+
+    _query(name)  # import everything before measuring
+    tracemalloc.start()
+    result = _load(name, mode)
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    out.put((py_peak, pa.default_memory_pool().max_memory(), len(result)))
+
+
+def peak_memory(db_url: str, name: str, mode: str):
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_peak_worker, args=(db_url, name, mode, q))
+    p.start()
+    res = q.get()
+    p.join()
+    return res
+
+
+def hit_latency_ms(name: str, mode: str, repeat: int) -> float:
+    """Mean time to get a DataFrame out of the respective cache."""
+    from arrow_io import to_pandas
+
+    value = _load(name, mode)
+    if mode == "before":
+        stored = pickle.dumps(value)  # st.cache_data keeps pickled bytes
+        hit = lambda: pickle.loads(stored)  # noqa: E731
+    else:
+        hit = lambda: to_pandas(value)  # noqa: E731 - shared table, no copy
+    hit()
+    t = time.perf_counter()
+    for _ in range(repeat):
+        hit()
+    return 1000 * (time.perf_counter() - t) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", help="existing SQLite file (default: build a synthetic one)")
+    parser.add_argument("--books", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--reviews-per-user", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50, help="cache hits per measurement")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.db:
+        path = os.path.abspath(args.db)
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp.name, "bench.db")
+        t = time.perf_counter()
+        build_db(path, args.books, args.users, args.reviews_per_user)
+        print(f"built {path} in {time.perf_counter() - t:.1f}s")
+    db_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = db_url
+
+    print(f"{'loader':16} {'mode':7} {'rows':>8} {'py peak MB':>11} {'arrow MB':>9} {'hit ms':>9}")
+    for name in LOADERS:
+        for mode in ("before", "after"):
+            py_peak, arrow_peak, rows = peak_memory(db_url, name, mode)
+            ms = hit_latency_ms(name, mode, args.repeat)
+            print(
+                f"{name:16} {mode:7} {rows:>8} {py_peak / 2**20:>11.2f} "
+                f"{arrow_peak / 2**20:>9.2f} {ms:>9.3f}"
+            )
+    if tmp:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: a 12-card Browse page with remote covers vs cover_cache thumbnails.
+
+Serves --cards synthetic full-size JPEG covers (--source-width px wide) from a
+local HTTP server, then reports for one page of cards
+  remote: bytes and time to download every full-size cover (what the
+          browser fetched per page view before),
+  cold:   cover_src() on an empty cache (returns remote fallbacks at once;
+          time until all thumbnails are ready in the background),
+  warm:   cover_src() once thumbnails exist, plus the bytes the app serves.
+
+    python benchmarks/bench_cover_cache.py --cards 12 --source-width 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+from PIL import Image, ImageDraw  # noqa: E402
+
+from cover_cache import CoverCache  # noqa: E402
+
+
+def make_covers(n: int, width: int) -> dict:
+    """Noisy gradients, so JPEG sizes resemble real cover scans."""
+    covers = {}
+    for i in range(n):
+        im = Image.effect_noise((width, width * 3 // 2), 40 + i).convert("RGB")
+        ImageDraw.Draw(im).rectangle([20, 20, width - 20, 200], fill=(30 * i % 255, 80, 160))
+        buf = io.BytesIO()
+        im.save(buf, "JPEG", quality=90)
+        covers[f"/b/id/{1000 + i}-L.jpg"] = buf.getvalue()
+    return covers
+
+
+def serve(covers: dict) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            body = covers.get(self.path)
+            self.send_response(200 if body else 404)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(body or b"")))
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cards", type=int, default=12)
+    parser.add_argument("--source-width", type=int, default=1000)
+    args = parser.parse_args()
+
+    covers = make_covers(args.cards, args.source_width)
+    server = serve(covers)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [base + path for path in covers]
+
+    t = time.perf_counter()
+    with ThreadPoolExecutor(6) as pool:  # browsers fetch ~6 images per host at once
+        remote_bytes = sum(len(b) for b in pool.map(lambda u: requests.get(u).content, urls))
+    remote_ms = 1000 * (time.perf_counter() - t)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CoverCache(tmp, allowed_hosts=["127.0.0.1"])  # the local test server
+        t = time.perf_counter()
+        srcs = [cache.src(u) for u in urls]
+        cold_ms = 1000 * (time.perf_counter() - t)
+        assert srcs == urls  # misses fall back to the remote URL
+        wait([cache.prefetch(u) for u in urls])
+        fill_ms = 1000 * (time.perf_counter() - t)
+
+        t = time.perf_counter()
+        paths = [cache.src(u) for u in urls]
+        warm_ms = 1000 * (time.perf_counter() - t)
+        local_bytes = 0
+        for p in paths:
+            with open(p, "rb") as f:  # what the app server sends per card
+                local_bytes += len(f.read())
+        warm_ms_read = 1000 * (time.perf_counter() - t)
+
+    server.shutdown()
+    print(f"{'path':8} {'KiB/page':>9} {'ms':>9}")
+    print(f"{'remote':8} {remote_bytes / 1024:>9.0f} {remote_ms:>9.1f}")
+    print(f"{'cold':8} {'-':>9} {cold_ms:>9.1f}   (thumbnails ready after {fill_ms:.0f} ms)")
+    print(f"{'warm':8} {local_bytes / 1024:>9.0f} {warm_ms_read:>9.1f}   (lookup only {warm_ms:.2f} ms)")
+    print(f"thumbnails: {paths[0].rsplit('.', 1)[-1]}, {local_bytes / remote_bytes:.1%} of the remote bytes")
+
+
+if __name__ == "__main__":
+    main()
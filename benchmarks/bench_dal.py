@@ -0,0 +1,403 @@
+"""
+Benchmark: every public dal.py function and the three analytics loaders.
+
+Runs against a synthetic catalog (generate_catalog.py) on SQLite, and on
+Postgres too when --postgres-url / BENCH_POSTGRES_URL points at a reachable
+server. Each case runs --repeat times (after one warm-up) in a transaction
+that is rolled back, so writes never change the catalog and every iteration
+sees the same data. Results go to JSON for diffing between commits:
+
+    python benchmarks/bench_dal.py --scale small
+    python benchmarks/bench_dal.py --scale full --postgres-url postgresql://localhost/bench
+    python benchmarks/bench_dal.py --compare benchmarks/results/dal-OLD.json
+
+The SQLite catalog is cached under .cache/bench/ per scale and seed. A public
+dal function without a case is reported under "uncovered".
+"""
+
+from __future__ import annotations
+
+import argparse
+import inspect
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import sqlalchemy  # noqa: E402
+from sqlalchemy import event, func, select, text  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+import dal  # noqa: E402
+from arrow_io import read_arrow_table, to_pandas  # noqa: E402
+from db import make_engine  # noqa: E402
+from generate_catalog import SCALES, generate  # noqa: E402
+from models import Book, Review  # noqa: E402
+
+
+@dataclass
+class Case:
+    name: str  # "<function>" or "<function>[variant]"
+    run: Callable[[Session, "Context"], Any]
+    repeat: Optional[int] = None  # overrides --repeat for slow cases
+
+    @property
+    def function(self) -> str:
+        return self.name.split("[", 1)[0]
+
+
+class Context:
+    """Ids and cursors sampled once per catalog, shared by the cases."""
+
+    def __init__(self, s: Session, seed: int):
+        # Sampled with the seeded rng from ordered ids (not SQL random()), so
+        # every run of a --seed measures the same books and reviews.
+        self.rng = random.Random(seed)
+        all_ids = dal.all_book_ids(s)
+        all_ids.sort()
+        self.book_ids = self.rng.sample(all_ids, min(500, len(all_ids)))
+        self.max_book_id = max(all_ids[-1] if all_ids else 0, 1)
+        review_ids = list(s.scalars(select(Review.id).order_by(Review.id)))
+        picked = self.rng.sample(review_ids, min(500, len(review_ids)))
+        by_id = {
+            rid: (user_id, book_id)
+            for rid, user_id, book_id in s.execute(
+                select(Review.id, Review.user_id, Review.book_id).where(Review.id.in_(picked))
+            )
+        }
+        self.reviews = [by_id[rid] for rid in picked]
+        self.active_user = s.scalar(
+            select(Review.user_id)
+            .group_by(Review.user_id)
+            .order_by(func.count().desc(), Review.user_id)
+            .limit(1)
+        )
+        self.external_ids = list(
+            s.scalars(
+                select(Book.external_id)
+                .where(Book.external_id.is_not(None))
+                .order_by(Book.id)
+                .limit(500)
+            )
+        )
+        self.query = s.scalar(select(Book.title).where(Book.id == self.book_ids[0])).split()[0]
+        cursor = None
+        for _ in range(20):  # deep page for keyset paging
+            cursor = dal.list_books(s, sort="title", cursor=cursor).next_cursor
+            if cursor is None:
+                break
+        self.deep_cursor = cursor
+        self.counter = 0
+
+    def book(self) -> int:
+        return self.rng.choice(self.book_ids)
+
+    def page_ids(self, n: int = dal.PAGE_SIZE) -> List[int]:
+        return self.rng.sample(self.book_ids, n)
+
+    def review(self):
+        return self.rng.choice(self.reviews)
+
+    def unreviewed(self):
+        """(user, book) pair that most likely has no review yet."""
+        return self.active_user, self.rng.randint(1, self.max_book_id)
+
+    def unique(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix} {os.getpid()}-{self.counter}"
+
+    def payload(self, **extra) -> dict:
+        return {
+            "external_id": self.unique("/works/BENCH"),
+            "title": self.unique("Bench book"),
+            "year": 2024,
+            "authors": ["Bench Author", self.unique("Author")],
+            "pages": 320,
+            "height_cm": 20,
+            "width_cm": 13,
+            "thickness_cm": 3,
+            **extra,
+        }
+
+
+def _rows(stmt):
+    return lambda s, c: s.execute(stmt).all()
+
+
+def _analytics(loader: str):
+    from tabs import analytics as a
+
+    def run(s: Session, c: Context):
+        if loader == "top_chonkers":
+            stmt, schema, params = dal.top_chonkers_sql(), a.TOP_CHONKERS_SCHEMA, {}
+        elif loader == "shelf_space":
+            stmt = dal.shelf_space_by_user_treemap_sql(a.TREEMAP_TOP_N, a.TREEMAP_MAX_USERS)
+            schema, params = a.SHELF_SPACE_SCHEMA, {}
+        else:
+            stmt = text(
+                "SELECT id, title, year, height_cm, width_cm, thickness_cm, pages, volume_cm3 "
+                "FROM books ORDER BY id DESC LIMIT :limit"
+            )
+            schema, params = a.RECENT_BOOKS_SCHEMA, {"limit": 8}
+        return to_pandas(read_arrow_table(s.connection(), stmt, schema, params=params))
+
+    return run
+
+
+CASES: List[Case] = [
+    Case("bump_table_versions", lambda s, c: dal.bump_table_versions(s, "books")),
+    Case("table_versions", lambda s, c: dal.table_versions(s, "books", "reviews")),
+    Case("ensure_user_id[existing]", lambda s, c: dal.ensure_user_id(s, "user1")),
+    Case("ensure_user_id[new]", lambda s, c: dal.ensure_user_id(s, c.unique("bench"))),
+    Case(
+        "create_book",
+        lambda s, c: dal.create_book(
+            s, title=c.unique("Bench book"), year=2024, authors=["Bench Author"],
+            height_cm=20, width_cm=13, thickness_cm=3, pages=320,
+        ),
+    ),
+    Case(
+        "update_book_dimensions",
+        lambda s, c: dal.update_book_dimensions(s, c.book(), height_cm=21, width_cm=14, thickness_cm=4),
+    ),
+    *(
+        Case(f"list_books[{sort}]", lambda s, c, sort=sort: dal.list_books(s, sort=sort))
+        for sort in ("title", "volume", "pages", "year", "rating", "newest")
+    ),
+    Case("list_books[search]", lambda s, c: dal.list_books(s, q=c.query, sort="relevance")),
+    Case("list_books[title,page21]", lambda s, c: dal.list_books(s, sort="title", cursor=c.deep_cursor)),
+    Case("count_books[all]", lambda s, c: dal.count_books(s)),
+    Case("count_books[search]", lambda s, c: dal.count_books(s, q=c.query)),
+    Case("count_books[volume]", lambda s, c: dal.count_books(s, sort="volume")),
+    Case("book_ids_fingerprint", lambda s, c: dal.book_ids_fingerprint(s)),
+    Case("all_book_ids", lambda s, c: dal.all_book_ids(s), repeat=5),
+    Case("latest_book_change", lambda s, c: dal.latest_book_change(s)),
+    Case("book_changes_since", lambda s, c: dal.book_changes_since(s, 0)),
+    Case("log_book_changes", lambda s, c: dal.log_book_changes(s, [c.book()])),
+    Case("book_title_rows[all]", lambda s, c: dal.book_title_rows(s), repeat=3),
+    Case("book_title_rows[ids]", lambda s, c: dal.book_title_rows(s, ids=c.page_ids())),
+    Case("top_recent_reviews", lambda s, c: dal.top_recent_reviews(s)),
+    Case("get_user_review", lambda s, c: dal.get_user_review(s, *c.review())),
+    Case(
+        "get_user_reviews_for_books",
+        lambda s, c: dal.get_user_reviews_for_books(s, c.active_user, c.page_ids()),
+    ),
+    Case("upsert_review[update]", lambda s, c: dal.upsert_review(s, *c.review(), 3, "bench")),
+    Case("upsert_review[new]", lambda s, c: dal.upsert_review(s, *c.unreviewed(), 4, None)),
+    Case("list_user_reviews", lambda s, c: dal.list_user_reviews(s, c.active_user)),
+    Case("delete_user_review", lambda s, c: dal.delete_user_review(s, *c.review())),
+    Case("rating_summary_for_books", lambda s, c: dal.rating_summary_for_books(s, c.page_ids())),
+    Case("check_rating_stats", lambda s, c: dal.check_rating_stats(s), repeat=3),
+    Case("rebuild_rating_stats", lambda s, c: dal.rebuild_rating_stats(s), repeat=3),
+    Case("top_chonkers_sql", _rows(dal.top_chonkers_sql())),
+    Case("shelf_space_by_user_treemap_sql[raw]", _rows(dal.shelf_space_by_user_treemap_sql()), repeat=3),
+    Case("shelf_space_by_user_treemap_sql[top10x50]", _rows(dal.shelf_space_by_user_treemap_sql(10, 50)), repeat=5),
+    Case("find_book_by_external_id", lambda s, c: dal.find_book_by_external_id(s, c.rng.choice(c.external_ids))),
+    Case("existing_external_ids", lambda s, c: dal.existing_external_ids(s, c.rng.sample(c.external_ids, 9))),
+    Case("create_book_from_api[new]", lambda s, c: dal.create_book_from_api(s, c.payload())),
+    Case(
+        "create_book_from_api[existing]",
+        lambda s, c: dal.create_book_from_api(s, c.payload(external_id=c.rng.choice(c.external_ids))),
+    ),
+    Case(
+        "create_books_from_api_bulk[50]",
+        lambda s, c: dal.create_books_from_api_bulk(s, [c.payload() for _ in range(50)]),
+        repeat=5,
+    ),
+    Case("delete_book", lambda s, c: dal.delete_book(s, c.book())),
+    Case("analytics.top_chonkers", _analytics("top_chonkers")),
+    Case("analytics.shelf_space", _analytics("shelf_space"), repeat=5),
+    Case("analytics.recent_books", _analytics("recent_books")),
+]
+
+
+def uncovered() -> List[str]:
+    public = {
+        name
+        for name, fn in inspect.getmembers(dal, inspect.isfunction)
+        if fn.__module__ == dal.__name__ and not name.startswith("_")
+    }
+    return sorted(public - {c.function for c in CASES})
+
+
+# ---------------------------------------------------------------------------
+# Running
+# ---------------------------------------------------------------------------
+
+def _explicit_sqlite_transactions(engine: Engine) -> None:
+    """
+    pysqlite only BEGINs before DML, so a SAVEPOINT without an outer BEGIN
+    would commit on release. Emit BEGIN ourselves so the rollback is real.
+    """
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_conn, _record):
+        dbapi_conn.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
+@contextmanager
+def rolled_back_session(engine: Engine) -> Iterator[Session]:
+    """Session whose commits become savepoints inside a rolled-back transaction."""
+    with engine.connect() as conn:
+        outer = conn.begin()
+        session = Session(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+        try:
+            yield session
+        finally:
+            session.close()
+            outer.rollback()
+
+
+def run_case(engine: Engine, case: Case, ctx: Context, repeat: int) -> Dict[str, Any]:
+    times: List[float] = []
+    for i in range((case.repeat or repeat) + 1):
+        with rolled_back_session(engine) as s:
+            t = time.perf_counter()
+            case.run(s, ctx)
+            s.flush()
+            elapsed = 1000 * (time.perf_counter() - t)
+        if i:  # first iteration warms caches
+            times.append(elapsed)
+    times.sort()
+    return {
+        "n": len(times),
+        "min_ms": round(times[0], 3),
+        "median_ms": round(statistics.median(times), 3),
+        "p95_ms": round(times[min(len(times) - 1, int(0.95 * len(times)))], 3),
+        "mean_ms": round(statistics.fmean(times), 3),
+    }
+
+
+def catalog_counts(engine: Engine) -> Dict[str, int]:
+    with engine.connect() as conn:
+        return {
+            t: int(conn.scalar(text(f"SELECT COUNT(*) FROM {t}")))
+            for t in ("books", "authors", "book_authors", "users", "reviews")
+        }
+
+
+def prepare(url: str, counts: Dict[str, int], seed: int) -> Engine:
+    engine = make_engine(url)
+    if engine.dialect.name == "sqlite":
+        _explicit_sqlite_transactions(engine)
+    try:
+        existing = catalog_counts(engine)["books"]
+    except sqlalchemy.exc.DBAPIError:
+        existing = 0
+    if not existing:
+        print(f"generating catalog in {engine.url.render_as_string(hide_password=True)} ...")
+        generate(engine, seed=seed, **counts)
+    return engine
+
+
+def bench_backend(name: str, engine: Engine, args, only: Optional[str]) -> Dict[str, Any]:
+    with Session(engine) as s:
+        ctx = Context(s, args.seed)
+    results: Dict[str, Any] = {}
+    print(f"\n[{name}] {catalog_counts(engine)}")
+    print(f"{'case':44} {'median ms':>10} {'p95 ms':>9} {'n':>4}")
+    for case in CASES:
+        if only and only not in case.name:
+            continue
+        r = results[case.name] = run_case(engine, case, ctx, args.repeat)
+        print(f"{case.name:44} {r['median_ms']:>10.3f} {r['p95_ms']:>9.3f} {r['n']:>4}")
+    return {
+        "url": engine.url.render_as_string(hide_password=True),
+        "catalog": catalog_counts(engine),
+        "results": results,
+    }
+
+
+def _git(*cmd: str) -> str:
+    try:
+        return subprocess.run(["git", *cmd], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(old_path: str, new: Dict[str, Any]) -> None:
+    with open(old_path) as f:
+        old = json.load(f)
+    print(f"\nvs {old_path} ({old['meta'].get('commit', '?')[:10]}): median new/old")
+    for backend, data in new["backends"].items():
+        before = old.get("backends", {}).get(backend, {}).get("results", {})
+        for case, r in data["results"].items():
+            if case in before and before[case]["median_ms"] > 0:
+                ratio = r["median_ms"] / before[case]["median_ms"]
+                flag = "  <-- slower" if ratio > 1.25 else ""
+                print(f"  {backend:10} {case:44} {ratio:6.2f}x{flag}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sqlite-path", help="catalog file (default .cache/bench/catalog-<scale>-<seed>.sqlite)")
+    parser.add_argument("--postgres-url", default=os.getenv("BENCH_POSTGRES_URL"),
+                        help="empty or previously generated Postgres database")
+    parser.add_argument("--only", help="run cases whose name contains this text")
+    parser.add_argument("--out", help="JSON output (default benchmarks/results/dal-<commit>.json)")
+    parser.add_argument("--compare", help="earlier JSON output to diff against")
+    args = parser.parse_args()
+
+    counts = SCALES[args.scale]
+    missing = uncovered()
+    if missing:
+        print(f"warning: no benchmark case for dal.{', dal.'.join(missing)}")
+
+    path = args.sqlite_path or os.path.join(ROOT, ".cache", "bench", f"catalog-{args.scale}-{args.seed}.sqlite")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    backends = {"sqlite": f"sqlite:///{path}"}
+    if args.postgres_url:
+        backends["postgresql"] = args.postgres_url
+
+    out: Dict[str, Any] = {
+        "meta": {
+            "commit": _git("rev-parse", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "scale": args.scale,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+        },
+        "uncovered": missing,
+        "backends": {},
+    }
+    for name, url in backends.items():
+        try:
+            engine = prepare(url, counts, args.seed)
+        except Exception as e:  # e.g. no local Postgres / driver
+            print(f"\n[{name}] skipped: {e.__class__.__name__}: {str(e).splitlines()[0]}")
+            continue
+        out["backends"][name] = bench_backend(name, engine, args, args.only)
+        engine.dispose()
+
+    target = args.out or os.path.join(ROOT, "benchmarks", "results", f"dal-{out['meta']['commit'][:10] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    with open(target, "w") as f:
+        json.dump(out, f, indent=2)
+    print(f"\nwrote {target}")
+    if args.compare:
+        compare(args.compare, out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: scalar vs batch `physical_dimensions` parsing.
+
+Checks that harvesters.dimensions.parse_dimensions_batch() matches the
+scalar _parse_dimensions() on every corpus string, then reports strings/second
+for both paths on the corpus repeated to --n strings.
+
+    python benchmarks/bench_dimensions.py --n 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harvesters.dimensions import parse_dimensions_batch, parse_dimensions_scalar  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dimension_corpus.txt")
+
+
+def load_corpus(path: str = CORPUS) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if not line.startswith("#")] + ["", None]
+
+
+def check_identical(values: list) -> None:
+    expected = parse_dimensions_scalar(values)
+    got = parse_dimensions_batch(pd.Series(values, dtype=object)).reset_index(drop=True)
+    same = (expected.isna() & got.isna()) | (expected == got)
+    bad = ~same.all(axis=1)
+    if bad.any():
+        for i in np.flatnonzero(bad.to_numpy()):
+            print(f"MISMATCH {values[i]!r}: scalar={expected.iloc[i].tolist()} batch={got.iloc[i].tolist()}")
+        sys.exit(1)
+    print(f"identical on {len(values)} corpus strings")
+
+
+def bench(values: list, n: int) -> None:
+    data = (values * (n // len(values) + 1))[:n]
+    series = pd.Series(data, dtype=object)
+
+    t = time.perf_counter()
+    parse_dimensions_scalar(data)
+    scalar = time.perf_counter() - t
+
+    t = time.perf_counter()
+    parse_dimensions_batch(series)
+    batch = time.perf_counter() - t
+
+    print(f"scalar: {n / scalar:12,.0f} strings/s  ({scalar:.2f}s)")
+    print(f"batch:  {n / batch:12,.0f} strings/s  ({batch:.2f}s)  x{scalar / batch:.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=200_000, help="strings to parse per path")
+    args = parser.parse_args()
+
+    values = load_corpus()
+    check_identical(values)
+    bench(values, args.n)
+
+
+if __name__ == "__main__":
+    main()
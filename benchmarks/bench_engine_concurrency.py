@@ -0,0 +1,167 @@
+"""
+Benchmark: concurrent reads and writes on SQLite, default engine vs db.make_engine.
+
+Runs --readers threads doing Browse-style reads (a page of books with their
+review counts) alongside --writers threads upserting reviews, for --seconds,
+once against a plain create_engine() (rollback journal, default pragmas) and
+once against the tuned profile from db.make_engine() (WAL, synchronous=NORMAL,
+busy_timeout, larger cache, mmap). Reports throughput, read latency
+percentiles and "database is locked" errors for each.
+
+With a rollback journal a committing writer takes an exclusive lock and
+readers wait behind it; in WAL mode reads proceed against the last committed
+snapshot while the writer appends.
+
+    python benchmarks/bench_engine_concurrency.py --readers 8 --writers 2 --seconds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+READ_SQL = text(
+    """
+    SELECT b.id, b.title, COUNT(r.id) AS n_reviews
+    FROM books b LEFT JOIN reviews r ON r.book_id = b.id
+    WHERE b.id BETWEEN :lo AND :lo + 50
+    GROUP BY b.id, b.title
+    ORDER BY b.id
+    """
+)
+WRITE_SQL = text(
+    "INSERT INTO reviews (user_id, book_id, rating, created_at) "
+    "VALUES (:u, :b, :r, CURRENT_TIMESTAMP) "
+    "ON CONFLICT (user_id, book_id) DO UPDATE SET rating = excluded.rating"
+)
+
+
+def build_db(path: str, books: int, users: int) -> None:
+    from schema import ensure_schema
+
+    engine = create_engine(f"sqlite:///{path}")
+    ensure_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO books (title, pages) VALUES (:t, :p)"),
+            [{"t": f"Book {i}", "p": 100 + i % 900} for i in range(books)],
+        )
+        conn.execute(
+            text("INSERT INTO users (username, created_at) VALUES (:u, CURRENT_TIMESTAMP)"),
+            [{"u": f"user{i}"} for i in range(users)],
+        )
+    engine.dispose()
+
+
+def run(
+    engine, books: int, users: int, readers: int, writers: int, batch: int, seconds: float
+) -> dict:
+    stop = threading.Event()
+    lock = threading.Lock()
+    read_ms: list = []
+    stats = {"reads": 0, "writes": 0, "locked": 0}
+
+    def reader(seed: int) -> None:
+        rnd = random.Random(seed)
+        local = []
+        while not stop.is_set():
+            t = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(READ_SQL, {"lo": rnd.randint(1, books)}).fetchall()
+            except OperationalError:
+                with lock:
+                    stats["locked"] += 1
+                continue
+            local.append(1000 * (time.perf_counter() - t))
+        with lock:
+            read_ms.extend(local)
+            stats["reads"] += len(local)
+
+    def writer(seed: int) -> None:
+        rnd = random.Random(seed)
+        n = 0
+        while not stop.is_set():
+            try:
+                with engine.begin() as conn:
+                    conn.execute(
+                        WRITE_SQL,
+                        [
+                            {"u": rnd.randint(1, users), "b": rnd.randint(1, books), "r": rnd.randint(1, 5)}
+                            for _ in range(batch)
+                        ],
+                    )
+                n += 1
+            except OperationalError:
+                with lock:
+                    stats["locked"] += 1
+        with lock:
+            stats["writes"] += n
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(writers)]
+    for th in threads:
+        th.start()
+    time.sleep(seconds)
+    stop.set()
+    for th in threads:
+        th.join()
+
+    q = statistics.quantiles(read_ms, n=100) if len(read_ms) > 1 else [0.0] * 99
+    return {
+        "reads/s": stats["reads"] / seconds,
+        "writes/s": stats["writes"] / seconds,
+        "p50 ms": q[49],
+        "p99 ms": q[98],
+        "max ms": max(read_ms, default=0.0),
+        "locked": stats["locked"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--batch", type=int, default=200, help="reviews per write transaction")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--dir", default=None, help="where to put the database (default: temp dir)")
+    args = parser.parse_args()
+
+    from db import make_engine
+
+    profiles = {
+        "default": lambda url: create_engine(url, future=True),
+        "tuned": make_engine,
+    }
+    print(f"{'profile':8} {'reads/s':>9} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'locked':>7}")
+    for name, factory in profiles.items():
+        with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+            path = os.path.join(tmp, "bench.db")
+            build_db(path, args.books, args.users)
+            engine = factory(f"sqlite:///{path}")
+            r = run(
+                engine, args.books, args.users, args.readers, args.writers, args.batch, args.seconds
+            )
+            engine.dispose()
+        print(
+            f"{name:8} {r['reads/s']:>9.0f} {r['writes/s']:>9.0f} {r['p50 ms']:>8.2f} "
+            f"{r['p99 ms']:>8.2f} {r['max ms']:>8.1f} {r['locked']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
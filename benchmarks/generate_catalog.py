@@ -0,0 +1,246 @@
+"""
+Synthetic catalog generator for benchmarks.
+
+Fills an empty database (SQLite file or Postgres URL) with books, authors,
+users and reviews, then rebuilds the derived data (search index, rating
+stats, table versions) exactly as the app would have it. Deterministic for a
+given --seed.
+
+Distributions, loosely modelled on Open Library editions:
+- format: paperback 55%, hardcover 35%, other 10%; 30% of books have no
+  dimensions and 10% no page count (like real edition records).
+- pages: log-normal around 300 (24 .. 2500).
+- height: ~19 cm paperbacks, ~24 cm hardcovers with a 3% coffee-table tail;
+  width about 2/3 of the height; thickness from page count + cover.
+- year: mostly recent (exponential, mean 25 years back), 1450 .. 2025.
+- authors per book: 1 (80%), 2 (15%), 3 (5%); author and book popularity
+  are Zipf-like, so a few authors have many books and a few books get most
+  reviews. Ratings skew positive.
+
+    python benchmarks/generate_catalog.py --url sqlite:///bench.db \\
+        --books 100000 --authors 50000 --users 10000 --reviews 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from dal import bump_table_versions, rebuild_rating_stats  # noqa: E402
+from models import Author, Book, BookAuthor, Review, User  # noqa: E402
+from schema import ensure_schema  # noqa: E402
+from search import rebuild_search_index  # noqa: E402
+
+SCALES: Dict[str, Dict[str, int]] = {
+    "tiny": {"books": 2_000, "authors": 1_000, "users": 200, "reviews": 20_000},
+    "small": {"books": 10_000, "authors": 5_000, "users": 1_000, "reviews": 100_000},
+    "full": {"books": 100_000, "authors": 50_000, "users": 10_000, "reviews": 1_000_000},
+}
+CHUNK = 20_000
+
+_WORDS = (
+    "shadow river stone garden winter empire night glass city silent last "
+    "house secret road fire king queen iron north summer light dark song "
+    "blood island letters storm ghost wolf machine hidden forest ocean star "
+    "golden broken little great lost long black white red memory dream time "
+    "history theory guide introduction art science war peace world mountain"
+).split()
+_FIRST = (
+    "Ada Alan Anna Ben Carla Chen David Elena Emil Fatima George Hana Ivan "
+    "Jonas Julia Kenji Laura Leo Maria Mei Nadia Noah Olga Omar Paul Priya "
+    "Rosa Sam Sara Tomas Uma Victor Wei Yara Zoe"
+).split()
+_LAST_A = "Ab Bel Car Dan El Fer Gar Hol Ja Kov Lin Mar Nor Ol Pet Ro San Tan Val Wen".split()
+_LAST_B = "ard berg son ova ez ley mann ski ton ini oux sen ford ic ado well ers hart".split()
+
+
+def _chunks(rows: List[dict], size: int = CHUNK) -> Iterator[List[dict]]:
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+def _zipf_cdf(n: int, s: float, rng: np.random.Generator) -> np.ndarray:
+    """CDF of a Zipf(s) popularity over n items in random order."""
+    w = 1.0 / np.arange(1, n + 1) ** s
+    w = w[rng.permutation(n)]
+    return np.cumsum(w / w.sum())
+
+
+def _draw(cdf: np.ndarray, size: int, rng: np.random.Generator) -> np.ndarray:
+    return np.minimum(np.searchsorted(cdf, rng.random(size)), len(cdf) - 1)
+
+
+def author_names(n: int, rng: np.random.Generator) -> List[str]:
+    names = [f"{f} {a}{b}" for f in _FIRST for a in _LAST_A for b in _LAST_B]
+    rng.shuffle(names)
+    out = names[:n]
+    for i in range(len(out), n):  # more authors than combinations
+        out.append(f"{names[i % len(names)]} {i // len(names) + 1}")
+    return out
+
+
+def book_rows(n: int, rng: np.random.Generator) -> List[dict]:
+    fmt = rng.choice(["paperback", "hardcover", "other"], size=n, p=[0.55, 0.35, 0.10])
+    hard = fmt == "hardcover"
+    pages = np.clip(rng.lognormal(np.log(300), 0.55, n), 24, 2500).round().astype(int)
+    height = np.where(hard, rng.normal(24, 2.0, n), rng.normal(19, 1.5, n))
+    coffee_table = rng.random(n) < 0.03
+    height[coffee_table] = rng.uniform(28, 40, coffee_table.sum())
+    height = np.clip(height, 10, 45)
+    width = np.clip(height * rng.normal(0.66, 0.06, n), 7, 35)
+    thickness = pages * 0.006 + np.where(hard, 0.6, 0.2)
+    has_dims = rng.random(n) >= 0.30
+    has_pages = rng.random(n) >= 0.10
+    year = np.clip(2025 - rng.exponential(25, n), 1450, 2025).astype(int)
+    has_ext = rng.random(n) < 0.70
+    has_desc = rng.random(n) < 0.50
+
+    rows, seen = [], set()
+    for i in range(n):
+        words = rng.choice(_WORDS, size=int(rng.integers(2, 6)))
+        title = " ".join(words).capitalize()
+        y = int(year[i])
+        vol = 1
+        while (title, y) in seen:  # keep uq_book_title_year
+            vol += 1
+            title = f"{' '.join(words).capitalize()}, Vol. {vol}"
+        seen.add((title, y))
+        dims = bool(has_dims[i])
+        rows.append(
+            {
+                "external_id": f"/works/OL{1_000_000 + i}W" if has_ext[i] else None,
+                "title": title,
+                "year": y,
+                "description": " ".join(rng.choice(_WORDS, size=30)) if has_desc[i] else None,
+                "cover_url": None,
+                "language": "en",
+                "height_cm": int(round(height[i])) if dims else None,
+                "width_cm": int(round(width[i])) if dims else None,
+                "thickness_cm": max(1, int(round(thickness[i]))) if dims else None,
+                "pages": int(pages[i]) if has_pages[i] else None,
+                "format": str(fmt[i]) if fmt[i] != "other" else None,
+            }
+        )
+    return rows
+
+
+def link_rows(books: int, authors: int, rng: np.random.Generator) -> List[dict]:
+    per_book = rng.choice([1, 2, 3], size=books, p=[0.80, 0.15, 0.05])
+    cdf = _zipf_cdf(authors, 0.9, rng)
+    picks = _draw(cdf, int(per_book.sum()), rng) + 1
+    book_ids = np.repeat(np.arange(1, books + 1), per_book)
+    pairs = np.unique(book_ids.astype(np.int64) * (authors + 1) + picks)
+    return [{"book_id": int(p // (authors + 1)), "author_id": int(p % (authors + 1))} for p in pairs]
+
+
+def review_pairs(users: int, books: int, reviews: int, rng: np.random.Generator) -> np.ndarray:
+    """`reviews` distinct (user, book) keys encoded as user * (books + 1) + book."""
+    reviews = min(reviews, users * books)
+    activity = rng.lognormal(0, 1.0, users)
+    cdf_user = np.cumsum(activity / activity.sum())
+    cdf_book = _zipf_cdf(books, 0.8, rng)
+    keys = np.empty(0, dtype=np.int64)
+    while len(keys) < reviews:
+        need = int((reviews - len(keys)) * 1.3) + 100
+        u = _draw(cdf_user, need, rng) + 1
+        b = _draw(cdf_book, need, rng) + 1
+        keys = np.unique(np.concatenate([keys, u.astype(np.int64) * (books + 1) + b]))
+        if len(keys) < reviews:  # popular pairs saturate: flatten the book draw
+            cdf_book = (cdf_book + np.arange(1, books + 1) / books) / 2
+    return rng.permutation(keys)[:reviews]
+
+
+def generate(
+    engine: Engine,
+    *,
+    books: int,
+    authors: int,
+    users: int,
+    reviews: int,
+    seed: int = 42,
+    log=print,
+) -> Dict[str, int]:
+    """Populate an empty database; returns the row counts written."""
+    rng = np.random.default_rng(seed)
+    ensure_schema(engine)
+    with Session(engine) as s:
+        if s.scalar(select(func.count()).select_from(Book)):
+            raise SystemExit("target database already has books; use an empty database")
+
+    t0 = time.perf_counter()
+    now = datetime(2025, 6, 1)
+    with engine.begin() as conn:
+        for chunk in _chunks([{"name": n} for n in author_names(authors, rng)]):
+            conn.execute(insert(Author), chunk)
+        log(f"authors  {authors:>9,}  {time.perf_counter() - t0:6.1f}s")
+        for chunk in _chunks(book_rows(books, rng)):
+            conn.execute(insert(Book), chunk)
+        log(f"books    {books:>9,}  {time.perf_counter() - t0:6.1f}s")
+        links = link_rows(books, authors, rng)
+        for chunk in _chunks(links):
+            conn.execute(insert(BookAuthor), chunk)
+        log(f"links    {len(links):>9,}  {time.perf_counter() - t0:6.1f}s")
+        for chunk in _chunks(
+            [{"username": f"user{i}", "created_at": now} for i in range(1, users + 1)]
+        ):
+            conn.execute(insert(User), chunk)
+
+        keys = review_pairs(users, books, reviews, rng)
+        ratings = rng.choice([1, 2, 3, 4, 5], size=len(keys), p=[0.05, 0.08, 0.20, 0.37, 0.30])
+        ages = rng.integers(0, 5 * 365 * 24 * 3600, size=len(keys))
+        for i in range(0, len(keys), CHUNK):
+            conn.execute(
+                insert(Review),
+                [
+                    {
+                        "user_id": int(k // (books + 1)),
+                        "book_id": int(k % (books + 1)),
+                        "rating": int(r),
+                        "text": None,
+                        "created_at": now - timedelta(seconds=int(a)),
+                    }
+                    for k, r, a in zip(keys[i : i + CHUNK], ratings[i : i + CHUNK], ages[i : i + CHUNK])
+                ],
+            )
+        log(f"reviews  {len(keys):>9,}  {time.perf_counter() - t0:6.1f}s")
+
+    with Session(engine) as s, s.begin():
+        rebuild_search_index(s)
+        rebuild_rating_stats(s)
+        bump_table_versions(s, "books", "reviews")
+    log(f"derived data rebuilt  {time.perf_counter() - t0:6.1f}s")
+    return {"books": books, "authors": authors, "users": users, "reviews": len(keys), "links": len(links)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", required=True, help="SQLAlchemy URL of an empty database")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for name in ("books", "authors", "users", "reviews"):
+        parser.add_argument(f"--{name}", type=int, help=f"override the scale's {name} count")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from db import make_engine
+
+    counts = dict(SCALES[args.scale])
+    counts.update({k: getattr(args, k) for k in counts if getattr(args, k) is not None})
+    engine = make_engine(args.url)
+    generate(engine, seed=args.seed, **counts)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+=============================================================
+In-process title index
+=============================================================
+Type-ahead lookup over (id, title, authors) for pickers that must not load
+the whole catalog on every rerun.
+
+- Prefix matching: every query word must start some word of the title or
+  authors (sorted vocabulary + bisect).
+- Fuzzy matching: share of the query's trigrams found in the title (like
+  pg_trgm's word_similarity), used to fill up the results when prefixes
+  alone find fewer than k books ("hary poter").
+- Kept current with sync(): the DAL logs every created/deleted book id in
+  book_changes, and sync() re-reads just the ids logged since its last seq
+  (a reused id shows up as delete + create and is replaced). Writes that
+  cannot change a title, like dimension edits, cost nothing here.
+
+Postings are compact int arrays; deleted books are tombstoned and the
+postings are rebuilt once enough of them pile up.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from dal import book_changes_since, book_title_rows, latest_book_change
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+MIN_SIMILARITY = 0.5   # share of query trigrams a fuzzy hit must contain
+_COMPACT_RATIO = 0.2   # rebuild postings when this share of entries is stale
+_COMMON_MIN = 1000     # never skip trigrams with fewer postings than this
+
+
+@dataclass(frozen=True)
+class TitleMatch:
+    book_id: int
+    title: str
+    authors: str
+    score: float  # 1.0 for prefix matches, trigram similarity otherwise
+
+
+def _fold(s: str) -> str:
+    """Lowercase and strip diacritics ("Émile" -> "emile")."""
+    s = unicodedata.normalize("NFKD", (s or "").lower())
+    return "".join(c for c in s if not unicodedata.combining(c))
+
+
+def _trigrams(s: str) -> Set[str]:
+    """Trigrams of each word padded like pg_trgm ("  w", " wo", ..., "rd ")."""
+    out: Set[str] = set()
+    for w in _WORD.findall(s):
+        w = f"  {w} "
+        out.update(w[i:i + 3] for i in range(len(w) - 2))
+    return out
+
+
+class TitleIndex:
+    """
+    Thread-safe; one instance can be shared by all sessions of a process
+    (e.g. via st.cache_resource).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._docs: Dict[int, Tuple[str, str]] = {}   # id -> (title, authors)
+        self._folded: Dict[int, str] = {}              # id -> folded title (ranking)
+        self._ntri: Dict[int, int] = {}                # id -> len(title trigrams)
+        self._words: Dict[str, array] = {}             # word -> ids (title + authors)
+        self._vocab: List[str] = []                    # sorted words, for prefixes
+        self._tri: Dict[str, array] = {}               # trigram -> ids (title)
+        self._dead: Set[int] = set()                   # removed ids still in postings
+        self._stale = 0                                # tombstoned posting entries
+        self._live = 0
+        self._seq = 0                                  # last book_changes seq applied
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # -----------------------------------------------------------------------
+    # Maintenance
+    # -----------------------------------------------------------------------
+
+    def add(self, rows: Iterable[Tuple[int, str, str]]) -> None:
+        """Index (id, title, authors) rows; re-adding an id replaces it."""
+        new_words: List[str] = []
+        with self._lock:
+            for book_id, title, authors in rows:
+                if book_id in self._docs:
+                    self.remove([book_id])
+                if book_id in self._dead:
+                    self._compact()  # old postings must not match the new row
+                self._add_one(int(book_id), title or "", authors or "", new_words)
+            if len(new_words) > 64:
+                self._vocab = sorted(self._words)
+            else:
+                for w in new_words:
+                    i = bisect_left(self._vocab, w)
+                    if i == len(self._vocab) or self._vocab[i] != w:  # _compact() may have added it
+                        self._vocab.insert(i, w)
+
+    def _add_one(self, book_id: int, title: str, authors: str, new_words: List[str]) -> None:
+        self._docs[book_id] = (title, authors)
+        folded = self._folded[book_id] = _fold(title)
+        for w in set(_WORD.findall(folded)) | set(_WORD.findall(_fold(authors))):
+            ids = self._words.get(w)
+            if ids is None:
+                ids = self._words[w] = array("i")
+                new_words.append(w)
+            ids.append(book_id)
+            self._live += 1
+        tris = _trigrams(folded)
+        self._ntri[book_id] = len(tris)
+        for t in tris:
+            self._tri.setdefault(t, array("i")).append(book_id)
+            self._live += 1
+
+    def remove(self, book_ids: Iterable[int]) -> None:
+        with self._lock:
+            for book_id in book_ids:
+                doc = self._docs.pop(book_id, None)
+                if doc is None:
+                    continue
+                self._dead.add(book_id)
+                folded = self._folded.pop(book_id)
+                words = set(_WORD.findall(folded)) | set(_WORD.findall(_fold(doc[1])))
+                self._stale += len(words) + self._ntri.pop(book_id, 0)
+            if self._stale > _COMPACT_RATIO * max(1, self._live):
+                self._compact()
+
+    def _compact(self) -> None:
+        """Drop tombstoned ids from all postings."""
+        if not self._dead:
+            return
+        live = self._docs
+        for table in (self._words, self._tri):
+            for key in list(table):
+                kept = array("i", (i for i in table[key] if i in live))
+                if kept:
+                    table[key] = kept
+                else:
+                    del table[key]
+        self._vocab = sorted(self._words)
+        self._live -= self._stale
+        self._stale = 0
+        self._dead.clear()
+
+    def sync(self, session: Session) -> None:
+        """
+        Bring the index in line with the books table: a full load the first
+        time, then only the book ids logged in book_changes since the last
+        sync (one primary-key range query when nothing changed).
+        """
+        with self._lock:
+            if not self._docs:
+                seq = latest_book_change(session)  # taken first: later changes get re-read
+                self.add(book_title_rows(session))
+                self._seq = seq
+                return
+            seq, ids = book_changes_since(session, self._seq)
+            if ids:
+                self.remove(ids)
+                self.add(book_title_rows(session, ids=ids))
+            self._seq = seq
+
+    # -----------------------------------------------------------------------
+    # Query
+    # -----------------------------------------------------------------------
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        out: Set[int] = set()
+        i = bisect_left(self._vocab, prefix)
+        while i < len(self._vocab) and self._vocab[i].startswith(prefix):
+            out.update(self._words[self._vocab[i]])
+            i += 1
+        return out
+
+    def search(self, q: str, k: int = 10) -> List[TitleMatch]:
+        """
+        Top-k books for q: prefix matches first (titles starting with the
+        query, then shorter titles), then fuzzy trigram matches.
+        """
+        folded = _fold(q).strip()
+        words = _WORD.findall(folded)
+        if not words or k <= 0:
+            return []
+
+        with self._lock:
+            docs = self._docs
+            hits: Optional[Set[int]] = None
+            # Longest words first: their prefixes are the most selective.
+            for w in sorted(words, key=len, reverse=True):
+                ids = self._prefix_ids(w)
+                hits = ids if hits is None else hits & ids
+                if not hits:
+                    break
+            hits = {i for i in hits or () if i in docs}
+
+            def _prefix_rank(i: int):
+                title = self._folded[i]
+                return (not title.startswith(folded), len(title), title, i)
+
+            out = [
+                TitleMatch(i, *docs[i], 1.0)
+                for i in heapq.nsmallest(k, hits, key=_prefix_rank)
+            ]
+            if len(out) >= k:
+                return out
+
+            # Trigrams shared by a large part of the catalog (" th", "the")
+            # cost the most and discriminate the least: they only count
+            # towards the query size, not towards candidates.
+            qtri = _trigrams(folded)
+            common = max(_COMMON_MIN, len(docs) // 10)
+            shared: Dict[int, int] = {}
+            for t in qtri:
+                ids = self._tri.get(t, ())
+                if len(ids) > common:
+                    continue
+                for i in ids:
+                    shared[i] = shared.get(i, 0) + 1
+            need = MIN_SIMILARITY * len(qtri)
+            scored = (
+                (n, -self._ntri[i], i)
+                for i, n in shared.items()
+                if n >= need and i in docs and i not in hits
+            )
+            for n, _, i in heapq.nlargest(k - len(out), scored):
+                out.append(TitleMatch(i, *docs[i], round(n / len(qtri), 3)))
+            return out
+
+    def get(self, book_id: int) -> Optional[TitleMatch]:
+        doc = self._docs.get(book_id)
+        return TitleMatch(book_id, *doc, 1.0) if doc else None
+
+
+def build_title_index(session: Session) -> TitleIndex:
+    idx = TitleIndex()
+    idx.sync(session)
+    return idx
@@ -0,0 +1,57 @@
+"""
+=============================================================
+App bootstrap
+=============================================================
+Startup work for app.py, done once instead of on every rerun:
+
+- ensure_ready(): schema check once per process. Reads the schema_version
+  marker (one row) and runs ensure_schema() only if it is missing or older
+  than schema.SCHEMA_VERSION.
+- current_user_id(): username -> users.id with a single upsert the first time
+  a session uses that username, then served from st.session_state.
+
+After the first run, a rerun costs app.py no queries.
+"""
+
+from __future__ import annotations
+
+import threading
+
+import streamlit as st
+from sqlalchemy.engine import Engine
+
+from dal import ensure_user_id
+from db import engine as default_engine, get_session
+from schema import SCHEMA_VERSION, ensure_schema, schema_version
+
+_lock = threading.Lock()
+_ready = False
+
+
+def ensure_ready(engine: Engine | None = None) -> None:
+    """Bring the schema up to date once per process (thread-safe)."""
+    global _ready
+    if _ready:
+        return
+    engine = engine or default_engine
+    with _lock:
+        if _ready:
+            return
+        current = schema_version(engine)
+        if current is None or current < SCHEMA_VERSION:
+            ensure_schema(engine)
+        _ready = True
+
+
+def current_user_id(username: str) -> int:
+    """
+    users.id for `username`, created on first use. Cached per session under
+    st.session_state["user_id"] together with the username it belongs to.
+    """
+    if st.session_state.get("user_id_for") == username and "user_id" in st.session_state:
+        return st.session_state["user_id"]
+    with get_session() as s:
+        user_id = ensure_user_id(s, username)
+    st.session_state["user_id"] = user_id
+    st.session_state["user_id_for"] = username
+    return user_id
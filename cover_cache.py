@@ -0,0 +1,325 @@
+"""
+=============================================================
+Cover thumbnail cache
+=============================================================
+Card-sized cover thumbnails stored on local disk, so the Browse grid and the
+Add hits do not download a full-size cover per card on every page view.
+
+- cover_src(url) returns the local thumbnail path when it exists; otherwise it
+  queues the cover in the background and returns a remote URL to show
+  meanwhile (the Open Library -M size instead of -L).
+- Only covers from COVER_CACHE_HOSTS are fetched server-side (default: Open
+  Library covers and the archive.org hosts they redirect to; every redirect
+  hop is checked). Any other URL, e.g. one typed in manual entry, is returned
+  unchanged for the browser to load, so the server never requests arbitrary
+  hosts.
+- Downloads run on a small thread pool, one per URL at a time; resizing runs
+  in a process pool (Pillow; WebP, or JPEG when WebP is unavailable). Without
+  Pillow the downloaded image is stored unchanged.
+- Thumbnails are content-addressed (<dir>/ab/<sha256>.<ext>); an SQLite index
+  maps URLs to digests and records last use. Past COVER_CACHE_MB the least
+  recently used entries are dropped, and files no URL points at are deleted.
+
+Config (env): COVER_CACHE_DIR (default .cache/covers), COVER_CACHE_MB (200),
+COVER_THUMB_WIDTH (320 px), COVER_CACHE_HOSTS (comma-separated; ".example.org"
+also matches subdomains).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import multiprocessing as mp
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+try:  # optional: thumbnails are resized only when Pillow is installed
+    from PIL import Image, features
+except ImportError:  # pragma: no cover
+    Image = None
+    features = None
+
+CACHE_DIR = os.getenv("COVER_CACHE_DIR", os.path.join(".cache", "covers"))
+MAX_BYTES = int(float(os.getenv("COVER_CACHE_MB", "200")) * 1024 * 1024)
+THUMB_WIDTH = int(os.getenv("COVER_THUMB_WIDTH", "320"))
+THUMB_QUALITY = 80
+DOWNLOAD_WORKERS = 4
+RESIZE_WORKERS = 2
+DOWNLOAD_TIMEOUT = 10
+MAX_SOURCE_BYTES = 10 * 1024 * 1024  # refuse anything larger than a cover
+RETRY_FAILED_AFTER = 3600  # seconds before a failed URL is tried again
+MAX_REDIRECTS = 3
+ALLOWED_HOSTS = tuple(
+    h.strip().lower()
+    for h in os.getenv("COVER_CACHE_HOSTS", "covers.openlibrary.org,.archive.org").split(",")
+    if h.strip()
+)
+TOUCH_EVERY = 3600  # seconds between last-use updates for the same URL
+
+_OL_COVER_LARGE = "-L.jpg"
+
+
+# ---------------------------------------------------------------------------
+# Resizing (runs in worker processes)
+# ---------------------------------------------------------------------------
+
+def _thumb_format() -> str:
+    if Image is None:
+        return ""
+    return "WEBP" if features.check("webp") else "JPEG"
+
+
+def make_thumbnail(data: bytes, width: int = THUMB_WIDTH, fmt: str = "") -> Tuple[bytes, str]:
+    """
+    Downscale an encoded image to `width` px (never upscaled) and re-encode it.
+    Returns (bytes, file extension). Without Pillow the input is returned.
+    """
+    fmt = fmt or _thumb_format()
+    if not fmt:
+        return data, "jpg"
+    with Image.open(io.BytesIO(data)) as im:
+        im.draft("RGB", (width, width * 2))  # JPEG: decode at reduced scale
+        im = im.convert("RGB")
+        if im.width > width:
+            im = im.resize((width, max(1, round(im.height * width / im.width))), Image.LANCZOS)
+        out = io.BytesIO()
+        if fmt == "WEBP":
+            im.save(out, fmt, quality=THUMB_QUALITY, method=4)
+        else:
+            im.save(out, fmt, quality=THUMB_QUALITY, optimize=True, progressive=True)
+    return out.getvalue(), "webp" if fmt == "WEBP" else "jpg"
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+class CoverCache:
+    """
+    URL -> local thumbnail, filled in the background. Thread-safe; several
+    processes can share one directory (the index is SQLite in WAL mode).
+    """
+
+    def __init__(
+        self,
+        root: str = CACHE_DIR,
+        *,
+        max_bytes: int = MAX_BYTES,
+        width: int = THUMB_WIDTH,
+        allowed_hosts: Sequence[str] = ALLOWED_HOSTS,
+    ):
+        self.root = root
+        self.allowed_hosts = tuple(allowed_hosts)
+        self.max_bytes = max_bytes
+        self.width = width
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._failed: Dict[str, float] = {}
+        self._touched: Dict[str, float] = {}
+        self._downloads: Optional[ThreadPoolExecutor] = None
+        self._resizer: Optional[ProcessPoolExecutor] = None
+        self._http = requests.Session()
+        self._http.headers["User-Agent"] = "BookShelfApp/1.0 (cover thumbnails)"
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "failed": 0, "evicted": 0, "passthrough": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:  # bumped from render and fill threads
+            self.stats[name] += 1
+
+    def allowed(self, url: str) -> bool:
+        """Whether url may be fetched server-side (http(s) on an allowed host)."""
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        if parts.scheme not in ("http", "https") or not host:
+            return False
+        return any(
+            host.endswith(h) if h.startswith(".") else host == h for h in self.allowed_hosts
+        )
+
+    # -- index --------------------------------------------------------------
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            os.makedirs(self.root, exist_ok=True)
+            db = sqlite3.connect(os.path.join(self.root, "index.sqlite"), timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS covers ("
+                "url TEXT PRIMARY KEY, path TEXT NOT NULL, "
+                "size INTEGER NOT NULL, used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS ix_covers_used ON covers (used)")
+            db.execute("CREATE INDEX IF NOT EXISTS ix_covers_path ON covers (path)")
+            self._local.db = db
+        return db
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Local thumbnail path for url, or None (no download is started)."""
+        row = self._db().execute("SELECT path FROM covers WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return None
+        path = os.path.join(self.root, row[0])
+        if not os.path.exists(path):  # evicted by another process
+            self._db().execute("DELETE FROM covers WHERE url = ?", (url,))
+            return None
+        now = time.time()
+        if now - self._touched.get(url, 0) > TOUCH_EVERY:
+            self._touched[url] = now
+            self._db().execute("UPDATE covers SET used = ? WHERE url = ?", (now, url))
+        return path
+
+    def _store(self, url: str, thumb: bytes, ext: str) -> str:
+        digest = hashlib.sha256(thumb).hexdigest()
+        rel = os.path.join(digest[:2], f"{digest}.{ext}")
+        path = os.path.join(self.root, rel)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(thumb)
+            os.replace(tmp, path)  # atomic: readers never see partial files
+        self._db().execute(
+            "INSERT OR REPLACE INTO covers VALUES (?, ?, ?, ?)", (url, rel, len(thumb), time.time())
+        )
+        self._count("stored")
+        self._evict()
+        return path
+
+    def _evict(self) -> None:
+        """Drop least recently used URLs until the distinct files fit the budget."""
+        db = self._db()
+        total = db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM covers GROUP BY path)"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for url, rel, size in db.execute(
+            "SELECT url, path, size FROM covers ORDER BY used"
+        ).fetchall():
+            db.execute("DELETE FROM covers WHERE url = ?", (url,))
+            self._count("evicted")
+            if not db.execute("SELECT 1 FROM covers WHERE path = ? LIMIT 1", (rel,)).fetchone():
+                try:
+                    os.remove(os.path.join(self.root, rel))
+                except FileNotFoundError:
+                    pass
+                total -= size
+            if total <= target:
+                break
+
+    # -- background fill ----------------------------------------------------
+
+    def _resize(self, data: bytes) -> Tuple[bytes, str]:
+        if Image is None:
+            return make_thumbnail(data, self.width)
+        try:
+            with self._lock:
+                if self._resizer is None:
+                    # spawn: never fork the multi-threaded app process
+                    self._resizer = ProcessPoolExecutor(
+                        max_workers=RESIZE_WORKERS, mp_context=mp.get_context("spawn")
+                    )
+                pool = self._resizer
+            return pool.submit(make_thumbnail, data, self.width).result()
+        except BrokenProcessPool:
+            with self._lock:
+                self._resizer = None
+            return make_thumbnail(data, self.width)
+
+    def _download(self, url: str) -> bytes:
+        """GET url, following redirects only to allowed hosts; size-capped."""
+        for _ in range(MAX_REDIRECTS + 1):
+            if not self.allowed(url):
+                raise ValueError(f"cover host not allowed: {urlsplit(url).hostname}")
+            with self._http.get(
+                url, timeout=DOWNLOAD_TIMEOUT, stream=True, allow_redirects=False
+            ) as r:
+                if r.is_redirect:
+                    url = urljoin(url, r.headers["Location"])
+                    continue
+                r.raise_for_status()
+                return r.raw.read(MAX_SOURCE_BYTES + 1, decode_content=True)
+        raise ValueError("too many redirects")
+
+    def _fill(self, url: str) -> Optional[str]:
+        try:
+            data = self._download(url)
+            if len(data) > MAX_SOURCE_BYTES:
+                raise ValueError(f"cover larger than {MAX_SOURCE_BYTES} bytes")
+            thumb, ext = self._resize(data)
+            return self._store(url, thumb, ext)
+        except Exception:
+            with self._lock:
+                self._failed[url] = time.monotonic()
+            self._count("failed")
+            return None
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    def prefetch(self, url: str) -> Future:
+        """Queue url for download + thumbnailing (deduplicated while in flight)."""
+        with self._lock:
+            fut = self._inflight.get(url)
+            if fut is None:
+                if self._downloads is None:
+                    self._downloads = ThreadPoolExecutor(
+                        max_workers=DOWNLOAD_WORKERS, thread_name_prefix="cover-fetch"
+                    )
+                fut = self._inflight[url] = self._downloads.submit(self._fill, url)
+            return fut
+
+    def src(self, url: Optional[str]) -> Optional[str]:
+        """What to hand to st.image: the local thumbnail, else a remote URL."""
+        if not url:
+            return None
+        if not url.startswith(("http://", "https://")):
+            return url
+        if not self.allowed(url):
+            self._count("passthrough")  # the browser loads it, as before
+            return url
+        path = self.lookup(url)
+        if path:
+            self._count("hits")
+            return path
+        self._count("misses")
+        failed_at = self._failed.get(url)
+        if failed_at is None or time.monotonic() - failed_at > RETRY_FAILED_AFTER:
+            self.prefetch(url)
+        return remote_fallback(url)
+
+
+def remote_fallback(url: str) -> str:
+    """Smaller remote image for a cache miss: Open Library -L covers as -M."""
+    if "covers.openlibrary.org" in url and url.endswith(_OL_COVER_LARGE):
+        return url[: -len(_OL_COVER_LARGE)] + "-M.jpg"
+    return url
+
+
+_cache: Optional[CoverCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cover_cache() -> CoverCache:
+    """The process-wide cover cache, created on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CoverCache()
+    return _cache
+
+
+def cover_src(url: Optional[str]) -> Optional[str]:
+    return get_cover_cache().src(url)
@@ -1,15 +1,35 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional, Sequence, Tuple
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-from sqlalchemy import delete, func, select, text
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import (
+    Float,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.orm import Session, joinedload, selectinload
 
-from models import Author, Book, BookAuthor, Review
+import search
+from models import Author, Book, BookAuthor, BookChange, BookRatingStats, Review, TableVersion, User
 
 # Number of cards per page in UI listings.
 PAGE_SIZE = 12
 
+# Orderings accepted by list_books(sort=...). "relevance" needs a search query
+# and falls back to "title" without one.
+SORT_MODES = ("relevance", "title", "volume", "pages", "year", "rating", "newest")
+
 # ---------------------------------------------------------------------------
 # Utilities / lookups
 # ---------------------------------------------------------------------------
@@ -37,6 +57,123 @@ def _get_or_create_author(session: Session, name: str | None) -> Author | None:
     return author
 
 
+def _dialect_insert(session: Session, model):
+    """
+    INSERT construct with native upsert support (ON CONFLICT) for SQLite and
+    PostgreSQL, or None on other dialects.
+    """
+    name = session.get_bind().dialect.name
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert(model)
+
+
+# ---------------------------------------------------------------------------
+# Table versions (cache invalidation)
+# ---------------------------------------------------------------------------
+
+# Logical table names used in table_versions: "books" covers books, authors
+# and their links; "reviews" covers reviews and their rating aggregates.
+
+
+def bump_table_versions(session: Session, *names: str) -> None:
+    """
+    Increment the version of each named table inside the caller's transaction.
+    """
+    for name in names:
+        stmt = _dialect_insert(session, TableVersion)
+        if stmt is not None:
+            session.execute(
+                stmt.values(name=name, version=1).on_conflict_do_update(
+                    index_elements=[TableVersion.name],
+                    set_={"version": TableVersion.version + 1},
+                )
+            )
+            continue
+        res = session.execute(
+            update(TableVersion)
+            .where(TableVersion.name == name)
+            .values(version=TableVersion.version + 1)
+        )
+        if not res.rowcount:
+            session.execute(insert(TableVersion).values(name=name, version=1))
+
+
+def table_versions(session: Session, *names: str) -> Tuple[int, ...]:
+    """
+    Current versions for the named tables (0 if never written), in order.
+    Cheap enough to call on every rerun; meant as part of cache keys.
+    """
+    rows = dict(
+        session.execute(
+            select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(names))
+        ).all()
+    )
+    return tuple(int(rows.get(n, 0)) for n in names)
+
+
+def log_book_changes(session: Session, book_ids: Iterable[int]) -> None:
+    """
+    Record created/deleted book ids in book_changes (caller's transaction),
+    so title indexes can catch up without rescanning the catalog.
+    """
+    rows = [{"book_id": int(i)} for i in dict.fromkeys(book_ids)]
+    if rows:
+        session.execute(insert(BookChange), rows)
+
+
+def latest_book_change(session: Session) -> int:
+    return int(session.scalar(select(func.max(BookChange.seq))) or 0)
+
+
+def book_changes_since(session: Session, seq: int) -> Tuple[int, List[int]]:
+    """
+    (newest seq, distinct book ids logged after `seq`). One range scan on the
+    primary key: cost follows the number of changes, not the catalog size.
+    """
+    rows = session.execute(
+        select(BookChange.seq, BookChange.book_id)
+        .where(BookChange.seq > seq)
+        .order_by(BookChange.seq)
+    ).all()
+    if not rows:
+        return seq, []
+    return int(rows[-1][0]), list(dict.fromkeys(int(r[1]) for r in rows))
+
+
+# ---------------------------------------------------------------------------
+# Users
+# ---------------------------------------------------------------------------
+
+def ensure_user_id(session: Session, username: str) -> int:
+    """
+    Id of the user with this username, creating the user if needed. One
+    INSERT ... ON CONFLICT (username) DO UPDATE ... RETURNING id statement on
+    SQLite/Postgres (the no-op update makes RETURNING yield existing rows).
+    """
+    stmt = _dialect_insert(session, User)
+    if stmt is not None:
+        return session.execute(
+            stmt.values(username=username)
+            .on_conflict_do_update(
+                index_elements=[User.username],
+                set_={"username": stmt.excluded.username},
+            )
+            .returning(User.id)
+        ).scalar_one()
+    user_id = session.scalar(select(User.id).where(User.username == username))
+    if user_id is None:
+        user = User(username=username)
+        session.add(user)
+        session.flush()
+        user_id = user.id
+    return user_id
+
+
 # ---------------------------------------------------------------------------
 # Create / update
 # ---------------------------------------------------------------------------
@@ -85,6 +222,9 @@ def create_book(
 
     session.add(book)
     session.flush()  # ensures book.id is available
+    search.index_books(session, [book.id])
+    log_book_changes(session, [book.id])
+    bump_table_versions(session, "books")
     return book
 
 
@@ -100,6 +240,9 @@ def update_book_dimensions(
 ) -> Book | None:
     """
     Patch dimension-ish fields on a book. Returns the updated Book or None if not found.
+
+    None of these fields are part of the search document, so the full-text
+    index is left untouched.
     """
     book = session.get(Book, book_id)
     if not book:
@@ -117,6 +260,7 @@ def update_book_dimensions(
         book.format = format
 
     session.flush()
+    bump_table_versions(session, "books")
     return book
 
 
@@ -124,42 +268,209 @@ def update_book_dimensions(
 # Queries / listing
 # ---------------------------------------------------------------------------
 
+@dataclass(frozen=True)
+class BookPage:
+    """
+    One keyset-paginated page of books.
+
+    Cursors are opaque tokens; pass one back to list_books() to move.
+    A None cursor means there is nothing further in that direction.
+    """
+    items: List[Book]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+def _encode_cursor(direction: str, mode: str, key: Sequence[Any]) -> str:
+    """
+    Pack a direction ('n' or 'p'), the ordering mode and a sort key into a
+    URL-safe token.
+    """
+    raw = json.dumps([direction, mode, list(key)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str, mode: str) -> Tuple[str, List[Any]]:
+    """
+    Inverse of _encode_cursor(). Raises ValueError on malformed tokens or
+    tokens issued for a different ordering mode.
+    """
+    try:
+        direction, token_mode, key = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii"))
+        )
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
+    if direction not in ("n", "p") or token_mode != mode or not isinstance(key, list):
+        raise ValueError("invalid cursor")
+    return direction, key
+
+
+def _filtered_books(session: Session, stmt, q: Optional[str], sort: Optional[str]):
+    """
+    Apply the search filter and ordering shared by list_books() and count_books().
+
+    Returns (stmt, mode, keys, descending) where keys are the keyset columns
+    (sort key + Book.id tiebreak). Sorts on nullable columns only list books
+    that have a value, so every ordering is a plain index range scan.
+    """
+    mode = sort or ("relevance" if q else "title")
+    if mode not in SORT_MODES:
+        raise ValueError(f"unknown sort: {sort!r}")
+
+    fts = None
+    if q:
+        fts = search.match_subquery(session, q)
+        if fts is not None:
+            stmt = stmt.join(fts, fts.c.book_id == Book.id)
+        else:
+            like = f"%{q.lower()}%"
+            stmt = stmt.where(func.lower(Book.title).like(like))
+    if mode == "relevance" and fts is None:
+        mode = "title"
+
+    if mode == "relevance":
+        return stmt, mode, (fts.c.rank, Book.id), False
+    if mode == "title":
+        return stmt, mode, (Book.title, Book.id), False
+    if mode == "newest":
+        return stmt, mode, (Book.id,), True
+    if mode == "rating":
+        stmt = stmt.join(BookRatingStats, BookRatingStats.book_id == Book.id)
+        return stmt, mode, (BookRatingStats.avg_rating, BookRatingStats.book_id), True
+
+    col = {"volume": Book.volume_cm3, "pages": Book.pages, "year": Book.year}[mode]
+    return stmt.where(col.is_not(None)), mode, (col, Book.id), True
+
+
 def list_books(
     session: Session,
     *,
     q: Optional[str] = None,
-    page: int = 1,
-) -> Tuple[List[Book], int]:
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> BookPage:
     """
-    Paginated list of books with authors.
-    Returns (items, total_count) where items is a list[Book].
+    Keyset-paginated list of books with authors.
+
+    - q: optional full-text query over title, authors and description
+    - sort: one of SORT_MODES; defaults to "relevance" with a query and
+      "title" without. volume/pages/year/rating/newest list largest first.
+    - cursor: token from a previous BookPage (next_cursor / prev_cursor);
+      None returns the first page
 
-    - q: optional case-insensitive title substring filter
-    - page: 1-based page index
+    Seeks straight to the cursor position instead of using OFFSET, so deep
+    pages cost the same as the first one. Use count_books() for totals.
     """
-    page = max(1, int(page))
+    stmt, mode, keys, descending = _filtered_books(
+        session, select(Book).options(selectinload(Book.authors)), q, sort
+    )
+    # Non-id sort keys ride along as extra columns to build cursors from.
+    extra = keys[:-1]
+    stmt = stmt.add_columns(*extra)
 
-    base_stmt = select(Book).options(joinedload(Book.authors))
+    forward = True
+    if cursor:
+        direction, key = _decode_cursor(cursor, mode)
+        forward = direction == "n"
+        bound = tuple_(*(literal(v) for v in key))
+        ahead = forward != descending
+        stmt = stmt.where(tuple_(*keys) > bound if ahead else tuple_(*keys) < bound)
 
-    if q:
-        like = f"%{q.lower()}%"
-        base_stmt = base_stmt.where(func.lower(Book.title).like(like))
+    ascending = forward != descending
+    order = [k.asc() if ascending else k.desc() for k in keys]
+    rows = list(session.execute(stmt.order_by(*order).limit(PAGE_SIZE + 1)).all())
+    has_more = len(rows) > PAGE_SIZE
+    rows = rows[:PAGE_SIZE]
 
-    # total count
-    total_stmt = select(func.count()).select_from(base_stmt.subquery())
-    total = int(session.scalar(total_stmt) or 0)
+    if not forward:
+        if not has_more:
+            # Walked back to the start: serve a full first page instead.
+            return list_books(session, q=q, sort=sort)
+        rows.reverse()
 
-    items = (
-        session.execute(
-            base_stmt.order_by(Book.title.asc())
-            .limit(PAGE_SIZE)
-            .offset((page - 1) * PAGE_SIZE)
-        )
-        .unique()
-        .scalars()
-        .all()
+    def _key(row) -> List[Any]:
+        # The last keyset column is always the book id (or an equal join key).
+        return [*row[1:], row[0].id]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or not forward:
+            next_cursor = _encode_cursor("n", mode, _key(rows[-1]))
+        if cursor:
+            prev_cursor = _encode_cursor("p", mode, _key(rows[0]))
+    return BookPage(
+        items=[row[0] for row in rows],
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
     )
-    return items, total
+
+
+def count_books(
+    session: Session, *, q: Optional[str] = None, sort: Optional[str] = None
+) -> int:
+    """
+    Number of books list_books() would page through for the same q/sort.
+
+    Kept separate from list_books() so callers can cache or skip it.
+    """
+    stmt, _, _, _ = _filtered_books(
+        session, select(func.count()).select_from(Book), q, sort
+    )
+    return int(session.scalar(stmt) or 0)
+
+
+# ---------------------------------------------------------------------------
+# Lightweight projections for in-process indexes (see book_index.py)
+# ---------------------------------------------------------------------------
+
+def book_ids_fingerprint(session: Session) -> Tuple[int, int]:
+    """
+    (count, max id) of the catalog: changes whenever books are added or deleted.
+    """
+    n, max_id = session.execute(select(func.count(Book.id), func.max(Book.id))).one()
+    return int(n or 0), int(max_id or 0)
+
+
+def all_book_ids(session: Session) -> List[int]:
+    return list(session.scalars(select(Book.id)))
+
+
+def book_title_rows(
+    session: Session,
+    *,
+    after_id: Optional[int] = None,
+    ids: Optional[Sequence[int]] = None,
+) -> List[Tuple[int, str, str]]:
+    """
+    (id, title, "Author A, Author B") rows without loading ORM objects.
+    Restrict with after_id (id > after_id) and/or ids.
+    """
+    stmt = select(Book.id, Book.title).order_by(Book.id)
+    if after_id is not None:
+        stmt = stmt.where(Book.id > after_id)
+    if ids is not None:
+        if not ids:
+            return []
+        stmt = stmt.where(Book.id.in_(list(ids)))
+    rows = session.execute(stmt).all()
+    if not rows:
+        return []
+
+    authors: Dict[int, List[str]] = {}
+    link = (
+        select(BookAuthor.book_id, Author.name)
+        .join(Author, Author.id == BookAuthor.author_id)
+        .order_by(BookAuthor.book_id, Author.name)
+    )
+    if after_id is not None:
+        link = link.where(BookAuthor.book_id > after_id)
+    if ids is not None:
+        link = link.where(BookAuthor.book_id.in_(list(ids)))
+    for book_id, name in session.execute(link):
+        authors.setdefault(book_id, []).append(name)
+
+    return [(i, t, ", ".join(authors.get(i, ()))) for i, t in rows]
 
 
 def top_recent_reviews(session: Session, limit: int = 10) -> List[Review]:
@@ -183,6 +494,23 @@ def get_user_review(session: Session, user_id: int, book_id: int) -> Review | No
     )
 
 
+def get_user_reviews_for_books(
+    session: Session, user_id: int, book_ids: Sequence[int]
+) -> Dict[int, Review]:
+    """
+    One user's reviews for a batch of books in a single query.
+    Returns {book_id: Review} for the books the user has reviewed.
+    """
+    if not book_ids:
+        return {}
+    rows = session.execute(
+        select(Review).where(
+            Review.user_id == user_id, Review.book_id.in_(list(book_ids))
+        )
+    ).scalars()
+    return {rv.book_id: rv for rv in rows}
+
+
 def upsert_review(
     session: Session, user_id: int, book_id: int, rating: int, text_value: str | None
 ) -> Review:
@@ -196,14 +524,20 @@ def upsert_review(
 
     rv = get_user_review(session, user_id, book_id)
     if rv:
+        old_rating = rv.rating
         rv.rating = rating
         rv.text = text_value
         session.flush()
+        if old_rating != rating:
+            _apply_rating_delta(session, book_id, add=rating, remove=old_rating)
+        bump_table_versions(session, "reviews")
         return rv
 
     rv = Review(user_id=user_id, book_id=book_id, rating=rating, text=text_value)
     session.add(rv)
     session.flush()
+    _apply_rating_delta(session, book_id, add=rating)
+    bump_table_versions(session, "reviews")
     return rv
 
 
@@ -226,29 +560,172 @@ def delete_user_review(session: Session, user_id: int, book_id: int) -> int:
     """
     Delete a user's review of a book. Returns number of rows deleted (0 or 1).
     """
-    res = session.execute(
-        delete(Review).where(Review.user_id == user_id, Review.book_id == book_id)
-    )
-    return int(res.rowcount or 0)
+    where = (Review.user_id == user_id, Review.book_id == book_id)
+    old_rating = session.scalar(select(Review.rating).where(*where))
+    res = session.execute(delete(Review).where(*where))
+    n = int(res.rowcount or 0)
+    if n:
+        _apply_rating_delta(session, book_id, remove=old_rating)
+        bump_table_versions(session, "reviews")
+    return n
 
 
 def rating_summary_for_books(
     session: Session, book_ids: Sequence[int]
 ) -> Dict[int, Tuple[float, int]]:
     """
-    Aggregate ratings for the given books.
+    Rating aggregates for the given books, read from book_rating_stats
+    (one primary-key lookup per book, no scan of reviews).
     Returns {book_id: (avg_rating, n_reviews)}.
     """
     if not book_ids:
         return {}
 
     rows = session.execute(
-        select(Review.book_id, func.avg(Review.rating), func.count(Review.id))
-        .where(Review.book_id.in_(list(book_ids)))
-        .group_by(Review.book_id)
+        select(
+            BookRatingStats.book_id,
+            BookRatingStats.avg_rating,
+            BookRatingStats.rating_count,
+        ).where(BookRatingStats.book_id.in_(list(book_ids)))
     ).all()
 
-    return {bid: (float(avg), int(n)) for bid, avg, n in rows}
+    return {bid: (float(avg), int(n)) for bid, avg, n in rows if n}
+
+
+# ---------------------------------------------------------------------------
+# Rating stats (denormalized aggregates of reviews)
+# ---------------------------------------------------------------------------
+
+_HISTOGRAM = ("n1", "n2", "n3", "n4", "n5")
+
+
+def _apply_rating_delta(
+    session: Session,
+    book_id: int,
+    *,
+    add: Optional[int] = None,
+    remove: Optional[int] = None,
+) -> None:
+    """
+    Fold one rating change into book_rating_stats within the caller's
+    transaction: `add` is the new rating (if any), `remove` the old one.
+    Rows whose count drops to zero are deleted.
+    """
+    d_sum = (add or 0) - (remove or 0)
+    d_count = (add is not None) - (remove is not None)
+    d_hist = {
+        col: (add == star) - (remove == star)
+        for star, col in enumerate(_HISTOGRAM, start=1)
+    }
+    if not d_sum and not d_count and not any(d_hist.values()):
+        return
+
+    t = BookRatingStats.__table__
+    new_sum = t.c.rating_sum + d_sum
+    new_count = t.c.rating_count + d_count
+    changes = {
+        "rating_sum": new_sum,
+        "rating_count": new_count,
+        # SET expressions see the pre-update row, so recompute from deltas.
+        "avg_rating": case(
+            (new_count > 0, cast(new_sum, Float) / new_count), else_=None
+        ),
+        **{col: t.c[col] + d for col, d in d_hist.items()},
+    }
+
+    stmt = _dialect_insert(session, BookRatingStats)
+    if stmt is not None:
+        initial = {
+            "book_id": book_id,
+            "rating_sum": d_sum,
+            "rating_count": d_count,
+            "avg_rating": (d_sum / d_count) if d_count > 0 else None,
+            **d_hist,
+        }
+        session.execute(
+            stmt.values(**initial).on_conflict_do_update(
+                index_elements=[t.c.book_id], set_=changes
+            )
+        )
+    else:
+        res = session.execute(update(t).where(t.c.book_id == book_id).values(**changes))
+        if not res.rowcount and d_count > 0:
+            session.add(
+                BookRatingStats(
+                    book_id=book_id,
+                    rating_sum=d_sum,
+                    rating_count=d_count,
+                    avg_rating=d_sum / d_count,
+                    **d_hist,
+                )
+            )
+            session.flush()
+
+    if d_count < 0:
+        session.execute(
+            delete(BookRatingStats).where(
+                BookRatingStats.book_id == book_id,
+                BookRatingStats.rating_count <= 0,
+            )
+        )
+
+
+def _rating_stats_from_reviews():
+    """
+    SELECT computing book_rating_stats rows from scratch out of reviews.
+    """
+    r = Review.rating
+    return (
+        select(
+            Review.book_id,
+            func.sum(r).label("rating_sum"),
+            func.count(r).label("rating_count"),
+            cast(func.avg(r), Float).label("avg_rating"),
+            *(
+                func.sum(case((r == star, 1), else_=0)).label(col)
+                for star, col in enumerate(_HISTOGRAM, start=1)
+            ),
+        )
+        .where(r.is_not(None))
+        .group_by(Review.book_id)
+    )
+
+
+def check_rating_stats(session: Session) -> List[int]:
+    """
+    Compare book_rating_stats with a fresh aggregate of reviews.
+    Returns the ids of books whose stored stats are missing, extra or wrong.
+    """
+    cols = ("rating_sum", "rating_count", *_HISTOGRAM)
+    expected = {
+        row.book_id: tuple(int(getattr(row, c)) for c in cols)
+        for row in session.execute(_rating_stats_from_reviews())
+    }
+    stored = {
+        row.book_id: tuple(int(getattr(row, c)) for c in cols)
+        for row in session.execute(
+            select(BookRatingStats.book_id, *(BookRatingStats.__table__.c[c] for c in cols))
+        )
+    }
+    return sorted(
+        bid
+        for bid in expected.keys() | stored.keys()
+        if expected.get(bid) != stored.get(bid)
+    )
+
+
+def rebuild_rating_stats(session: Session) -> int:
+    """
+    Recompute book_rating_stats from reviews. Returns the number of rows written.
+    """
+    session.execute(delete(BookRatingStats))
+    src = _rating_stats_from_reviews()
+    session.execute(
+        BookRatingStats.__table__.insert().from_select(
+            [c.name for c in src.selected_columns], src
+        )
+    )
+    return int(session.scalar(select(func.count()).select_from(BookRatingStats)) or 0)
 
 
 # ---------------------------------------------------------------------------
@@ -258,41 +735,102 @@ def rating_summary_for_books(
 def top_chonkers_sql():
     """
     Raw SQL for the 20 largest volumes (cm³) among books with complete dimensions.
+    Reads the indexed volume_cm3 column, so this is an index range scan.
     """
     return text(
         """
         SELECT
           id,
           title,
-          (height_cm * width_cm * thickness_cm) / 1000.0 AS volume_cm3
+          volume_cm3
         FROM books
-        WHERE height_cm IS NOT NULL
-          AND width_cm IS NOT NULL
-          AND thickness_cm IS NOT NULL
+        WHERE volume_cm3 IS NOT NULL
         ORDER BY volume_cm3 DESC
         LIMIT 20
         """
     )
 
 
-def shelf_space_by_user_treemap_sql():
+def shelf_space_by_user_treemap_sql(
+    top_n: Optional[int] = None, max_users: Optional[int] = None
+):
     """
-    One row per (user, book) with computed volume in cm³.
+    Shelf space per user (reviewed books with a volume), for the treemap.
+
+    top_n=None: one row per (user, book) with computed volume in cm³.
+
+    top_n=N: grouped in SQL in one pass over the reviews, at most
+    max_users * (N + 1) + 1 rows:
+      - each user's N largest books (ROW_NUMBER over the user's reviews),
+      - one "Other (k books)" row per user summing the rest,
+      - with max_users, users beyond the largest max_users (by total volume,
+        ranked in a small per-user CTE) collapse into one "Other users" row.
+    Columns: username, book_id (NULL for buckets), title, volume_cm3,
+    n_books, n_users.
     """
+    if top_n is None:
+        return text(
+            """
+            SELECT
+              u.username,
+              b.id        AS book_id,
+              b.title,
+              b.volume_cm3
+            FROM reviews r
+            JOIN users   u ON u.id = r.user_id
+            JOIN books   b ON b.id = r.book_id
+            WHERE b.volume_cm3 IS NOT NULL
+            """
+        )
+
     return text(
         """
+        WITH per_book AS (
+          SELECT
+            r.user_id,
+            b.id          AS book_id,
+            b.title,
+            b.volume_cm3,
+            ROW_NUMBER() OVER (
+              PARTITION BY r.user_id ORDER BY b.volume_cm3 DESC, b.id
+            )             AS rn
+          FROM reviews r
+          JOIN books   b ON b.id = r.book_id
+          WHERE b.volume_cm3 IS NOT NULL
+        ),
+        per_user AS (
+          SELECT
+            user_id,
+            ROW_NUMBER() OVER (ORDER BY SUM(volume_cm3) DESC, user_id) AS urn
+          FROM per_book
+          GROUP BY user_id
+        ),
+        tiles AS (
+          SELECT
+            CASE WHEN pu.urn <= :max_users THEN p.user_id END                 AS tile_user,
+            CASE WHEN pu.urn <= :max_users AND p.rn <= :top_n THEN p.book_id END AS tile_book,
+            p.user_id, p.title, p.volume_cm3
+          FROM per_book p
+          JOIN per_user pu ON pu.user_id = p.user_id
+        )
         SELECT
-          u.username,
-          b.id        AS book_id,
-          b.title,
-          (b.height_cm * b.width_cm * b.thickness_cm) / 1000.0 AS volume_cm3
-        FROM reviews r
-        JOIN users   u ON u.id = r.user_id
-        JOIN books   b ON b.id = r.book_id
-        WHERE b.height_cm IS NOT NULL
-          AND b.width_cm  IS NOT NULL
-          AND b.thickness_cm IS NOT NULL
+          COALESCE(MAX(u.username), 'Other users')                     AS username,
+          t.tile_book                                                  AS book_id,
+          CASE
+            WHEN t.tile_book IS NOT NULL THEN MAX(t.title)
+            WHEN t.tile_user IS NOT NULL THEN 'Other (' || COUNT(*) || ' books)'
+            ELSE COUNT(*) || ' books'
+          END                                                          AS title,
+          SUM(t.volume_cm3)                                            AS volume_cm3,
+          COUNT(*)                                                     AS n_books,
+          COUNT(DISTINCT t.user_id)                                    AS n_users
+        FROM tiles t
+        LEFT JOIN users u ON u.id = t.tile_user
+        GROUP BY t.tile_user, t.tile_book
         """
+    ).bindparams(
+        top_n=int(top_n),
+        max_users=int(max_users) if max_users is not None else 2**31 - 1,
     )
 
 
@@ -309,6 +847,18 @@ def find_book_by_external_id(session: Session, external_id: str | None) -> Book
     return session.scalar(select(Book).where(Book.external_id == external_id))
 
 
+def existing_external_ids(session: Session, external_ids: Sequence[str]) -> Set[str]:
+    """
+    Which of the given external ids are already in the catalog (one IN query).
+    """
+    ids = {e for e in external_ids if e}
+    if not ids:
+        return set()
+    return set(
+        session.scalars(select(Book.external_id).where(Book.external_id.in_(ids)).distinct())
+    )
+
+
 def create_book_from_api(session: Session, payload: dict) -> Tuple[Book, bool]:
     """
     Create a Book from an external payload (e.g., OpenLibrary).
@@ -347,9 +897,182 @@ def create_book_from_api(session: Session, payload: dict) -> Tuple[Book, bool]:
         session.add(BookAuthor(book_id=book.id, author_id=author.id))
 
     session.flush()
+    search.index_books(session, [book.id])
+    log_book_changes(session, [book.id])
+    bump_table_versions(session, "books")
     return book, True
 
 
+@dataclass(frozen=True)
+class BulkIngestResult:
+    """
+    Outcome for one payload of create_books_from_api_bulk(), in input order.
+    book_id is None only when the payload was rejected (see error).
+    """
+    index: int
+    book_id: Optional[int]
+    created: bool
+    error: Optional[str] = None
+
+
+_BOOK_FIELDS = (
+    "external_id", "title", "year", "description", "cover_url", "language",
+    "pages", "height_cm", "width_cm", "thickness_cm",
+)
+
+
+def create_books_from_api_bulk(
+    session: Session,
+    payloads: Iterable[dict],
+    *,
+    chunk_size: int = 500,
+) -> List[BulkIngestResult]:
+    """
+    Set-based variant of create_book_from_api() for many payloads.
+
+    Per chunk: existing books are resolved by external_id (and by the unique
+    (title, year) pair) with IN queries, missing authors and books are
+    bulk-inserted, then all book_authors links in one executemany.
+    Duplicates inside the input resolve to the first occurrence.
+
+    Unlike the other DAL writers this COMMITS after every chunk of
+    `chunk_size` payloads so large imports make progress incrementally.
+    """
+    results: List[BulkIngestResult] = []
+    chunk: List[dict] = []
+    for payload in payloads:
+        chunk.append(payload)
+        if len(chunk) >= max(1, int(chunk_size)):
+            results.extend(_ingest_chunk(session, chunk, offset=len(results)))
+            session.commit()
+            chunk = []
+    if chunk:
+        results.extend(_ingest_chunk(session, chunk, offset=len(results)))
+        session.commit()
+    return results
+
+
+def _ingest_chunk(
+    session: Session, payloads: List[dict], *, offset: int
+) -> List[BulkIngestResult]:
+    """
+    One chunk of create_books_from_api_bulk(); does not commit.
+    """
+    rows: List[Optional[dict]] = []
+    for p in payloads:
+        title = (p.get("title") or "").strip()
+        if not title:
+            rows.append(None)
+            continue
+        row = {f: p.get(f) for f in _BOOK_FIELDS}
+        row["title"] = title
+        row["external_id"] = row["external_id"] or None
+        rows.append(row)
+
+    # 1) Resolve books that already exist.
+    ext_ids = {r["external_id"] for r in rows if r and r["external_id"]}
+    by_ext: Dict[str, int] = {}
+    if ext_ids:
+        for ext, bid in session.execute(
+            select(Book.external_id, func.min(Book.id))
+            .where(Book.external_id.in_(ext_ids))
+            .group_by(Book.external_id)
+        ):
+            by_ext[ext] = bid
+
+    # NULL years never collide on uq_book_title_year, so only match real years.
+    titles = {r["title"] for r in rows if r and r["year"] is not None}
+    by_title_year: Dict[Tuple[str, int], int] = {}
+    if titles:
+        for title, year, bid in session.execute(
+            select(Book.title, Book.year, Book.id).where(
+                Book.title.in_(titles), Book.year.is_not(None)
+            )
+        ):
+            by_title_year[(title, year)] = bid
+
+    # 2) Decide per payload: existing id, first occurrence in chunk, or new.
+    #    slot[i] is ("id", book_id) | ("new", position in to_create) | None
+    slots: List[Optional[Tuple[str, int]]] = []
+    to_create: List[dict] = []
+    created_idx: List[int] = []
+    seen_ext: Dict[str, Tuple[str, int]] = {}
+    seen_ty: Dict[Tuple[str, int], Tuple[str, int]] = {}
+    for i, r in enumerate(rows):
+        if r is None:
+            slots.append(None)
+            continue
+        ext, ty = r["external_id"], (r["title"], r["year"])
+        if ext and ext in by_ext:
+            slot = ("id", by_ext[ext])
+        elif r["year"] is not None and ty in by_title_year:
+            slot = ("id", by_title_year[ty])
+        elif ext and ext in seen_ext:
+            slot = seen_ext[ext]
+        elif r["year"] is not None and ty in seen_ty:
+            slot = seen_ty[ty]
+        else:
+            slot = ("new", len(to_create))
+            to_create.append(r)
+            created_idx.append(i)
+        if ext:
+            seen_ext.setdefault(ext, slot)
+        if r["year"] is not None:
+            seen_ty.setdefault(ty, slot)
+        slots.append(slot)
+
+    # 3) Authors: one IN lookup, one bulk insert for the missing names.
+    author_lists: List[List[str]] = []
+    for i in created_idx:
+        names = [str(n).strip() for n in (payloads[i].get("authors") or [])]
+        author_lists.append(list(dict.fromkeys(n for n in names if n)))
+    names = {n for lst in author_lists for n in lst}
+    author_ids: Dict[str, int] = {}
+    if names:
+        author_ids = dict(
+            session.execute(select(Author.name, Author.id).where(Author.name.in_(names))).all()
+        )
+        missing = sorted(names - author_ids.keys())
+        if missing:
+            session.execute(insert(Author), [{"name": n} for n in missing])
+            author_ids.update(
+                session.execute(
+                    select(Author.name, Author.id).where(Author.name.in_(missing))
+                ).all()
+            )
+
+    # 4) Books + links.
+    new_ids: List[int] = []
+    if to_create:
+        new_ids = list(
+            session.scalars(
+                insert(Book).returning(Book.id, sort_by_parameter_order=True),
+                to_create,
+            )
+        )
+        links = [
+            {"book_id": bid, "author_id": author_ids[n]}
+            for bid, lst in zip(new_ids, author_lists)
+            for n in lst
+        ]
+        if links:
+            session.execute(insert(BookAuthor), links)
+        search.index_books(session, new_ids)
+        log_book_changes(session, new_ids)
+        bump_table_versions(session, "books")
+
+    results: List[BulkIngestResult] = []
+    for i, slot in enumerate(slots):
+        if slot is None:
+            results.append(BulkIngestResult(offset + i, None, False, "title is required"))
+        elif slot[0] == "id":
+            results.append(BulkIngestResult(offset + i, slot[1], False))
+        else:
+            first = created_idx[slot[1]] == i
+            results.append(BulkIngestResult(offset + i, new_ids[slot[1]], first))
+    return results
+
+
 # ---------------------------------------------------------------------------
 # Deletes
 # ---------------------------------------------------------------------------
@@ -362,7 +1085,13 @@ def delete_book(session: Session, book_id: int) -> int:
     Note: this assumes FKs do NOT have ON DELETE CASCADE.
     """
     # Remove dependents first
+    search.unindex_books(session, [book_id])
     session.execute(delete(Review).where(Review.book_id == book_id))
+    session.execute(delete(BookRatingStats).where(BookRatingStats.book_id == book_id))
     session.execute(delete(BookAuthor).where(BookAuthor.book_id == book_id))
     res = session.execute(delete(Book).where(Book.id == book_id))
-    return int(res.rowcount or 0)
+    n = int(res.rowcount or 0)
+    if n:
+        log_book_changes(session, [book_id])
+        bump_table_versions(session, "books", "reviews")
+    return n
@@ -1,22 +1,131 @@
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
-from typing import Iterator
+from typing import Any, Iterator
 import os
+import threading
+import time
 
-def _db_url():
+def _sql_secrets() -> dict:
     try:
         import streamlit as st
-        url = st.secrets.get("connections", {}).get("sql", {}).get("url")
-        if url:
-            return url
+        return dict(st.secrets.get("connections", {}).get("sql", {}))
     except Exception:
-        pass
+        return {}
+
+def _db_url():
+    url = _sql_secrets().get("url")
+    if url:
+        return url
     # Env var fallback
     return os.getenv("DATABASE_URL", "sqlite:///books.db")
 
+def _read_url():
+    """Optional read replica: secrets [connections.sql] read_url, else env
+    DATABASE_READ_URL. None means reads go to the primary."""
+    return _sql_secrets().get("read_url") or os.getenv("DATABASE_READ_URL") or None
+
+def _setting(name: str, default: Any) -> Any:
+    """
+    Engine tuning knob: secrets [connections.sql] <name>, else env DB_<NAME>,
+    else default (whose type the value is cast to).
+    """
+    value = _sql_secrets().get(name)
+    if value is None:
+        value = os.getenv(f"DB_{name.upper()}")
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return str(value).strip().lower() in ("1", "true", "yes", "on")
+    return type(default)(value)
+
+# ---------------------------------------------------------------------------
+# Engine profiles (picked from the URL's backend)
+# ---------------------------------------------------------------------------
+
+def _sqlite_engine(url) -> Engine:
+    """
+    SQLite: WAL so readers never wait for the writer, NORMAL fsync (safe in
+    WAL), a busy timeout instead of instant "database is locked", a bigger
+    page cache and mmap'd reads. PRAGMA optimize runs at most once per
+    sqlite_optimize_interval seconds when a connection goes back to the pool.
+    """
+    busy_ms = _setting("sqlite_busy_timeout_ms", 5000)
+    engine = create_engine(
+        url,
+        future=True,
+        connect_args={"timeout": busy_ms / 1000.0},
+    )
+    pragmas = [
+        f"PRAGMA busy_timeout={busy_ms}",
+        f"PRAGMA synchronous={_setting('sqlite_synchronous', 'NORMAL')}",
+        f"PRAGMA cache_size={-_setting('sqlite_cache_kib', 65536)}",
+        f"PRAGMA mmap_size={_setting('sqlite_mmap_bytes', 256 * 1024 * 1024)}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if url.database and url.database != ":memory:":
+        pragmas.insert(0, f"PRAGMA journal_mode={_setting('sqlite_journal_mode', 'WAL')}")
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        try:
+            for p in pragmas:
+                cur.execute(p)
+        finally:
+            cur.close()
+
+    interval = _setting("sqlite_optimize_interval", 3600)
+    last = [time.monotonic()]
+    lock = threading.Lock()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_conn, _record):
+        if interval <= 0 or dbapi_conn is None:
+            return
+        with lock:
+            if time.monotonic() - last[0] < interval:
+                return
+            last[0] = time.monotonic()
+        try:
+            dbapi_conn.execute("PRAGMA optimize")
+        except Exception:
+            pass  # best effort; never fail a checkin
+
+    return engine
+
+def _postgres_engine(url) -> Engine:
+    """
+    Postgres: explicit pool sizing, pre-ping against dropped connections,
+    recycling, and a server-side statement timeout for every session.
+    """
+    timeout_ms = _setting("statement_timeout_ms", 30000)
+    connect_args = {}
+    if timeout_ms > 0:
+        connect_args["options"] = f"-c statement_timeout={timeout_ms}"
+    return create_engine(
+        url,
+        future=True,
+        pool_size=_setting("pool_size", 5),
+        max_overflow=_setting("max_overflow", 10),
+        pool_timeout=_setting("pool_timeout", 30),
+        pool_recycle=_setting("pool_recycle", 1800),
+        pool_pre_ping=_setting("pool_pre_ping", True),
+        connect_args=connect_args,
+    )
+
+def make_engine(db_url: str) -> Engine:
+    url = make_url(db_url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return _sqlite_engine(url)
+    if backend == "postgresql":
+        return _postgres_engine(url)
+    return create_engine(url, future=True, pool_pre_ping=True)
+
 DB_URL = _db_url()
-engine = create_engine(DB_URL, future=True)
+engine = make_engine(DB_URL)
 SessionLocal = sessionmaker(
     bind=engine,
     autoflush=False,
@@ -25,6 +134,29 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+# Read path: the replica if one is configured, otherwise the primary's pool.
+# On Postgres the transactions are BEGIN READ ONLY (the driver's readonly
+# flag, reset when the connection goes back to the pool); SQLite reads never
+# open a transaction under pysqlite. Flushing a read session is an error.
+READ_DB_URL = _read_url()
+read_engine = make_engine(READ_DB_URL) if READ_DB_URL else engine
+# Distinct pools, e.g. for event hooks (sql_trace); options engines share these.
+ENGINES = (engine,) if read_engine is engine else (engine, read_engine)
+if read_engine.dialect.name == "postgresql":
+    read_engine = read_engine.execution_options(postgresql_readonly=True)
+ReadSessionLocal = sessionmaker(
+    bind=read_engine,
+    autoflush=False,
+    autocommit=False,
+    future=True,
+    expire_on_commit=False,
+)
+
+@event.listens_for(ReadSessionLocal, "before_flush")
+def _refuse_flush(session, _flush_context, _instances):
+    if session.new or session.dirty or session.deleted:
+        raise RuntimeError("write attempted in a read session; use get_session()")
+
 @contextmanager
 def get_session() -> Iterator:
     session = SessionLocal()
@@ -36,3 +168,15 @@ def get_session() -> Iterator:
         raise
     finally:
         session.close()
+
+@contextmanager
+def get_read_session() -> Iterator:
+    """
+    Session for pure reads: no commit on exit, the transaction (if any) is
+    just released when the session closes. Uses the read replica if set.
+    """
+    session = ReadSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
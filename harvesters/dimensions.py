@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from typing import Iterable, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from harvesters.openlibrary_client import _parse_dimensions
+
+# ---------------------------------------------------------------------------
+# Batch dimension parsing
+#
+# Vectorized equivalent of openlibrary_client._parse_dimensions for whole
+# columns of `physical_dimensions` strings (dump imports, backfills). Every
+# step is an Arrow compute kernel over the full column; results are identical
+# to the scalar parser, which benchmarks/bench_dimensions.py checks on a
+# corpus of real-world strings.
+# ---------------------------------------------------------------------------
+
+COLUMNS = ["height_cm", "width_cm", "thickness_cm"]
+
+_N = r"\d+(?:[.,]\d+)?"  # same token as openlibrary_client._NUM
+
+# First three numbers in one pass. Every group is optional, so the regex never
+# has to backtrack into a number: captures equal _NUM.findall(s)[:3].
+_FIRST_THREE = rf"^\D*(?P<h>{_N})?\D*(?P<w>{_N})?\D*(?P<t>{_N})?"
+_FIRST_NUM = rf"(?P<n>{_N})"
+_SEP = r"\s*[x×]\s*"  # openlibrary_client._DIM_SEP on lowercased text
+_INCH = r"inch|in\."
+_MM = r"millimet(?:er|re)|mm"
+
+
+def _blank_to_null(arr: pa.Array) -> pa.Array:
+    """Non-participating groups come back as ''; make them null."""
+    return pc.if_else(pc.equal(arr, ""), pa.scalar(None, pa.string()), arr)
+
+
+def _to_float(arr: pa.Array) -> np.ndarray:
+    """Decimal-comma aware string -> float64 (NaN for null)."""
+    num = pc.cast(pc.replace_substring(_blank_to_null(arr), ",", "."), pa.float64())
+    return num.to_numpy(zero_copy_only=False, writable=True)
+
+
+def parse_dimensions_batch(values: Union[pd.Series, Iterable]) -> pd.DataFrame:
+    """
+    Parse many `physical_dimensions` strings at once.
+
+    Returns a DataFrame (index aligned with a Series input) with float columns
+    height_cm, width_cm, thickness_cm in centimeters; NaN where the scalar
+    parser returns None.
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    arr = pa.array([v if isinstance(v, str) and v else None for v in s], type=pa.string())
+    low = pc.utf8_lower(arr)
+
+    m = pc.extract_regex(low, _FIRST_THREE)
+    nums = {col: _to_float(m.field(f)) for col, f in zip(COLUMNS, "hwt")}
+
+    # Fewer than three numbers: the scalar parser splits on 'x' instead and
+    # takes the first number of each of the first three parts.
+    fallback = np.isnan(nums["thickness_cm"]) & pc.is_valid(arr).to_numpy(zero_copy_only=False)
+    for col in COLUMNS:
+        nums[col][fallback] = np.nan
+    if fallback.any():
+        idx = np.flatnonzero(fallback)
+        parts = pc.split_pattern_regex(low.take(pa.array(idx)), _SEP)
+        enough = pc.greater_equal(pc.list_value_length(parts), 3).to_numpy(zero_copy_only=False)
+        if enough.any():
+            parts = parts.filter(pa.array(enough))
+            rows = idx[enough]
+            for i, col in enumerate(COLUMNS):
+                first = pc.extract_regex(pc.list_element(parts, i), _FIRST_NUM).field("n")
+                nums[col][rows] = _to_float(first)
+
+    inch = pc.match_substring_regex(low, _INCH).to_numpy(zero_copy_only=False)
+    mm = pc.match_substring_regex(low, _MM).to_numpy(zero_copy_only=False)
+    factor = np.where(inch == True, 2.54, np.where(mm == True, 0.1, 1.0))  # noqa: E712 - null-safe
+
+    for col in COLUMNS:
+        nums[col] *= factor
+
+    # Arrow's \d, \s and lower() are ASCII-only; keep exact parity with the
+    # scalar parser by sending the (rare) strings with other non-ASCII
+    # characters than '×' through it.
+    ascii_ok = pc.string_is_ascii(pc.replace_substring(arr, "×", ""))
+    for i in np.flatnonzero(~pc.fill_null(ascii_ok, True).to_numpy(zero_copy_only=False)):
+        for col, v in zip(COLUMNS, _parse_dimensions(s.iloc[i])):
+            nums[col][i] = np.nan if v is None else v
+
+    return pd.DataFrame(nums, index=s.index)
+
+
+def parse_dimensions_scalar(values: Iterable) -> pd.DataFrame:
+    """
+    Reference path: the scalar parser applied per string (for comparisons).
+    """
+    rows = [_parse_dimensions(v if isinstance(v, str) else "") for v in values]
+    return pd.DataFrame(rows, columns=COLUMNS, dtype=float)
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from harvesters.openlibrary_client import (
+    BASE,
+    DEFAULT_LIMIT,
+    DEFAULT_TIMEOUT,
+    EDITIONS_MAX_PAGES,
+    EDITIONS_PAGE_SIZE,
+    HTTP_POOL_SIZE,
+    RETRY_BACKOFF,
+    RETRY_STATUSES,
+    RETRY_TOTAL,
+    PayloadResult,
+    _choose_edition_with_dims,
+    _dims_from_edition,
+    _empty_dims,
+    _hits_from_search,
+    _payload_from_hit,
+)
+
+# ---------------------------------------------------------------------------
+# Asyncio counterpart of openlibrary_client: same return shapes, one pooled
+# httpx.AsyncClient, a semaphore bounding in-flight requests, and the same
+# retry/backoff policy as the sync session's urllib3 Retry.
+# ---------------------------------------------------------------------------
+
+DEFAULT_CONCURRENCY = 8
+
+
+class AsyncOpenLibraryClient:
+    """
+    Usage:
+        async with AsyncOpenLibraryClient() as ol:
+            hits = await ol.search_title("dune")
+            results = await ol.build_payloads_for_hits(hits)
+
+    `base_url` can point at a local stand-in server for tests.
+    """
+
+    def __init__(
+        self,
+        *,
+        base_url: str = BASE,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self._sem = asyncio.Semaphore(max(1, int(max_concurrency)))
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(
+            timeout=timeout,
+            headers={
+                "User-Agent": "BookShelfApp/1.0 (+https://github.com/yourname/yourrepo)",
+                "Accept": "application/json",
+            },
+            limits=httpx.Limits(
+                max_connections=max(HTTP_POOL_SIZE, int(max_concurrency)),
+                max_keepalive_connections=HTTP_POOL_SIZE,
+            ),
+            follow_redirects=True,
+        )
+
+    async def __aenter__(self) -> "AsyncOpenLibraryClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self._client.aclose()
+
+    # -----------------------------------------------------------------------
+    # HTTP
+    # -----------------------------------------------------------------------
+
+    async def _get_json(self, path: str, params: Dict[str, Any]) -> Tuple[int, Any]:
+        """
+        GET with retries on RETRY_STATUSES and transport errors. Backoff is
+        RETRY_BACKOFF * 2**(n-1) seconds, or Retry-After when the server sends it.
+        Returns (status, parsed JSON or None).
+        """
+        url = f"{self.base_url}{path}"
+        for attempt in range(RETRY_TOTAL + 1):
+            last = attempt == RETRY_TOTAL
+            try:
+                async with self._sem:
+                    r = await self._client.get(url, params=params)
+            except httpx.TransportError:
+                if last:
+                    raise
+                await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+                continue
+
+            if r.status_code in RETRY_STATUSES and not last:
+                await asyncio.sleep(_retry_after(r) or RETRY_BACKOFF * (2 ** attempt))
+                continue
+            if r.status_code != 200:
+                return r.status_code, None
+            return 200, r.json()
+        return 0, None  # unreachable; keeps type checkers happy
+
+    # -----------------------------------------------------------------------
+    # API (mirrors openlibrary_client)
+    # -----------------------------------------------------------------------
+
+    async def search_title(self, q: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        q = (q or "").strip()
+        if not q:
+            return []
+        status, data = await self._get_json("/search.json", {"q": q, "limit": limit})
+        if status != 200:
+            raise httpx.HTTPStatusError(
+                f"{status} error for Open Library search: {q!r}",
+                request=httpx.Request("GET", f"{self.base_url}/search.json"),
+                response=httpx.Response(status),
+            )
+        return _hits_from_search(data, limit)
+
+    async def fetch_dims_for_work(self, work_key: str) -> Dict[str, Optional[float]]:
+        """
+        Same page budget and pick as openlibrary_client.scan_editions(), but
+        pages are decoded whole (no streaming).
+        """
+        wk = (work_key or "").split("/")[-1]
+        if not wk:
+            return _empty_dims()
+        seen: List[Dict[str, Any]] = []
+        for page in range(max(1, EDITIONS_MAX_PAGES)):
+            params = {"limit": EDITIONS_PAGE_SIZE}
+            if page:
+                params["offset"] = page * EDITIONS_PAGE_SIZE
+            status, data = await self._get_json(f"/works/{wk}/editions.json", params)
+            if status != 200:
+                break
+            entries = [e for e in (data or {}).get("entries", []) or [] if isinstance(e, dict)]
+            for e in entries:
+                if e.get("physical_dimensions"):
+                    return _dims_from_edition(e)
+            seen.extend(entries)
+            if len(entries) < EDITIONS_PAGE_SIZE:
+                break
+        return _dims_from_edition(_choose_edition_with_dims(seen))
+
+    async def build_payload_from_title_hit(self, hit: Dict[str, Any]) -> Dict[str, Any]:
+        return _payload_from_hit(hit, await self.fetch_dims_for_work(hit.get("external_id")))
+
+    async def build_payloads_for_hits(
+        self, hits: Sequence[Dict[str, Any]]
+    ) -> List[PayloadResult]:
+        """
+        Payloads for many hits concurrently (bounded by the semaphore);
+        per-hit failures are isolated, order is preserved.
+        """
+        async def _one(hit: Dict[str, Any]) -> PayloadResult:
+            try:
+                return PayloadResult(hit, await self.build_payload_from_title_hit(hit))
+            except Exception as e:
+                return PayloadResult(hit, None, str(e) or e.__class__.__name__)
+
+        return list(await asyncio.gather(*(_one(h) for h in hits)))
+
+
+def _retry_after(r: httpx.Response) -> Optional[float]:
+    try:
+        return max(0.0, float(r.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
+
+def build_payloads_for_hits_sync(
+    hits: Sequence[Dict[str, Any]], max_concurrency: int = DEFAULT_CONCURRENCY
+) -> List[PayloadResult]:
+    """
+    Convenience entry point for batch scripts without an event loop.
+    """
+    async def _run() -> List[PayloadResult]:
+        async with AsyncOpenLibraryClient(max_concurrency=max_concurrency) as ol:
+            return await ol.build_payloads_for_hits(hits)
+
+    return asyncio.run(_run())
@@ -1,8 +1,16 @@
 from __future__ import annotations
 
+import codecs
+import json
+import os
 import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
 
 import requests
 from requests.adapters import HTTPAdapter, Retry
@@ -15,41 +23,238 @@ BASE = "https://openlibrary.org"
 COVERS = "https://covers.openlibrary.org/b/"
 DEFAULT_TIMEOUT = 12  # seconds
 DEFAULT_LIMIT = 12
+DEFAULT_WORKERS = 8   # concurrent editions.json calls in build_payloads_for_hits
+HTTP_POOL_SIZE = 10   # keep-alive connections per host (>= DEFAULT_WORKERS)
+
+# Retry/backoff policy (shared with the asyncio client)
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
 
 # One shared session with retry/backoff for resilience
 _session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
 
 
 def _get_session() -> requests.Session:
     """
     Lazily create a requests. Session with reasonable retries and a helpful UA.
+    Thread-safe; the connection pool is sized for build_payloads_for_hits().
     """
     global _session
-    if _session is None:
-        s = requests.Session()
-        s.headers.update(
-            {
-                "User-Agent": "BookShelfApp/1.0 (+https://github.com/yourname/yourrepo)",
-                "Accept": "application/json",
-            }
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            s.headers.update(
+                {
+                    "User-Agent": "BookShelfApp/1.0 (+https://github.com/yourname/yourrepo)",
+                    "Accept": "application/json",
+                }
+            )
+            retries = Retry(
+                total=RETRY_TOTAL,
+                backoff_factor=RETRY_BACKOFF,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset(["GET", "HEAD"]),
+            )
+            adapter = HTTPAdapter(
+                max_retries=retries,
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+            )
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+    return _session
+
+
+# ---------------------------------------------------------------------------
+# Persistent HTTP cache (SQLite file shared by processes and restarts)
+# ---------------------------------------------------------------------------
+
+# Configure via env: OPENLIBRARY_CACHE_PATH ("" disables), OPENLIBRARY_CACHE_MAX_MB,
+# OPENLIBRARY_CACHE_TTL_SEARCH / OPENLIBRARY_CACHE_TTL_EDITIONS (seconds).
+CACHE_PATH = os.getenv("OPENLIBRARY_CACHE_PATH", os.path.join(".cache", "openlibrary_http.sqlite"))
+CACHE_MAX_BYTES = int(float(os.getenv("OPENLIBRARY_CACHE_MAX_MB", "64")) * 1024 * 1024)
+CACHE_TTLS = {
+    "search": int(os.getenv("OPENLIBRARY_CACHE_TTL_SEARCH", str(60 * 60))),
+    "editions": int(os.getenv("OPENLIBRARY_CACHE_TTL_EDITIONS", str(7 * 24 * 60 * 60))),
+}
+
+
+class _HttpCache:
+    """
+    Size-bounded LRU of response bodies keyed by URL, with the validators
+    (ETag / Last-Modified) needed to revalidate stale entries cheaply.
+    One SQLite connection per thread; WAL lets several workers share the file.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "revalidated": 0, "evictions": 0}
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS http_cache ("
+                "key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT, "
+                "fetched_at REAL NOT NULL, last_access REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS ix_http_cache_last_access ON http_cache (last_access)"
+            )
+            self._local.db = db
+        return db
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    def get(self, key: str) -> Optional[Tuple[bytes, Optional[str], Optional[str], float]]:
+        row = self._db().execute(
+            "SELECT body, etag, last_modified, fetched_at FROM http_cache WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row:
+            self._db().execute(
+                "UPDATE http_cache SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+        return row
+
+    def touch(self, key: str) -> None:
+        """Mark an entry fresh again after a 304 Not Modified."""
+        now = time.time()
+        self._db().execute(
+            "UPDATE http_cache SET fetched_at = ?, last_access = ? WHERE key = ?",
+            (now, now, key),
         )
-        retries = Retry(
-            total=3,
-            backoff_factor=0.3,
-            status_forcelist=(429, 500, 502, 503, 504),
-            allowed_methods=frozenset(["GET", "HEAD"]),
+
+    def put(self, key: str, body: bytes, etag: Optional[str], last_modified: Optional[str]) -> None:
+        now = time.time()
+        db = self._db()
+        db.execute(
+            "INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, body, etag, last_modified, now, now, len(body)),
         )
-        adapter = HTTPAdapter(max_retries=retries)
-        s.mount("https://", adapter)
-        s.mount("http://", adapter)
-        _session = s
-    return _session
+        self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        while total > self.max_bytes:
+            victims = db.execute(
+                "SELECT key, size FROM http_cache ORDER BY last_access LIMIT 32"
+            ).fetchall()
+            if not victims:
+                break
+            # Delete only the oldest entries needed to fit, and count each one.
+            doomed = []
+            for key, size in victims:
+                doomed.append((key,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+            cur = db.executemany("DELETE FROM http_cache WHERE key = ?", doomed)
+            self.count("evictions", max(cur.rowcount, 0))
+
+    def clear(self) -> None:
+        self._db().execute("DELETE FROM http_cache")
+
+
+_cache: Optional[_HttpCache] = _HttpCache(CACHE_PATH, CACHE_MAX_BYTES) if CACHE_PATH else None
+
+
+def cache_stats() -> Dict[str, int]:
+    """
+    Hit/miss/revalidation/eviction counters of the HTTP cache (this process).
+    """
+    return dict(_cache.counters) if _cache else {}
+
+
+def _cache_lookup(
+    key: str, endpoint: str
+) -> Tuple[Optional[bytes], Optional[Tuple[bytes, Optional[str], Optional[str], float]], Dict[str, str]]:
+    """
+    Returns (fresh body or None, cached entry, conditional request headers).
+    """
+    if _cache is None:
+        return None, None, {}
+    try:
+        entry = _cache.get(key)
+    except sqlite3.Error:
+        entry = None  # cache trouble must never break lookups
+    headers: Dict[str, str] = {}
+    if entry:
+        body, etag, last_modified, fetched_at = entry
+        if time.time() - fetched_at < CACHE_TTLS.get(endpoint, 0):
+            _cache.count("hits")
+            return body, entry, headers
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    return None, entry, headers
+
+
+def _cache_store(key: str, status: int, body: bytes, response_headers: Any) -> None:
+    """
+    Record a network response: 304 refreshes the entry, 200 replaces it.
+    """
+    if _cache is None:
+        return
+    try:
+        if status == 304:
+            _cache.count("revalidated")
+            _cache.touch(key)
+            return
+        _cache.count("misses")
+        if status == 200:
+            _cache.put(key, body, response_headers.get("ETag"), response_headers.get("Last-Modified"))
+    except sqlite3.Error:
+        pass
+
+
+def _cached_get(url: str, params: Dict[str, Any], endpoint: str) -> Tuple[int, Optional[bytes]]:
+    """
+    GET through the persistent cache. Returns (status, body).
+
+    Fresh entries (younger than CACHE_TTLS[endpoint]) are served without
+    network; stale ones are revalidated with If-None-Match/If-Modified-Since
+    and a 304 refreshes them in place. Only 200 responses are stored.
+    """
+    key = f"{url}?{urlencode(sorted(params.items()))}"
+    fresh, entry, headers = _cache_lookup(key, endpoint)
+    if fresh is not None:
+        return 200, fresh
+
+    r = _get_session().get(url, params=params, headers=headers, timeout=DEFAULT_TIMEOUT)
+    _cache_store(key, r.status_code, r.content, r.headers)
+    if r.status_code == 304 and entry:
+        return 200, entry[0]
+    return r.status_code, r.content
 
 
 # ---------------------------------------------------------------------------
 # Types / helpers
 # ---------------------------------------------------------------------------
 
+@dataclass(frozen=True)
+class PayloadResult:
+    """
+    Outcome of building one payload in build_payloads_for_hits():
+    exactly one of payload / error is set.
+    """
+    hit: Dict[str, Any]
+    payload: Optional[Dict[str, Any]]
+    error: Optional[str] = None
+
+
 @dataclass(frozen=True)
 class EditionPick:
     """
@@ -86,14 +291,19 @@ def search_title(q: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
     if not q:
         return []
 
-    session = _get_session()
-    r = session.get(
-        f"{BASE}/search.json",
-        params={"q": q, "limit": limit},
-        timeout=DEFAULT_TIMEOUT,
+    status, body = _cached_get(
+        f"{BASE}/search.json", {"q": q, "limit": limit}, "search"
     )
-    r.raise_for_status()
-    docs = (r.json() or {}).get("docs", [])[: max(0, int(limit))]
+    if status != 200:
+        raise requests.HTTPError(f"{status} error for Open Library search: {q!r}")
+    return _hits_from_search(json.loads(body or b"null"), limit)
+
+
+def _hits_from_search(data: Any, limit: int) -> List[Dict[str, Any]]:
+    """
+    Map a search.json response to UI hits (shared with the asyncio client).
+    """
+    docs = (data or {}).get("docs", [])[: max(0, int(limit))]
 
     hits: List[Dict[str, Any]] = []
     for d in docs:
@@ -200,36 +410,217 @@ def _choose_edition_with_dims(entries: Sequence[Dict[str, Any]]) -> Optional[Dic
 
 
 # ---------------------------------------------------------------------------
-# Work → editions (single call for dimensions/pages)
+# Work → editions (lazy scan until an edition with dimensions shows up)
 # ---------------------------------------------------------------------------
 
+EDITIONS_PAGE_SIZE = 50
+# Pages of editions.json read per work at most (env: OPENLIBRARY_EDITIONS_MAX_PAGES)
+EDITIONS_MAX_PAGES = int(os.getenv("OPENLIBRARY_EDITIONS_MAX_PAGES", "4"))
+_STREAM_CHUNK = 16 * 1024
+_ENTRIES_START = re.compile(r'"entries"\s*:\s*\[')
+
+_scan_lock = threading.Lock()
+_scan_counters = {"scans": 0, "pages": 0, "bytes": 0, "with_dims": 0}
+
+
+@dataclass(frozen=True)
+class EditionScan:
+    """
+    Outcome of scan_editions(): the chosen edition and what it cost.
+    `bytes` counts body bytes read from the network as sent, i.e. before
+    gzip decoding (cached pages are free).
+    """
+    edition: Optional[Dict[str, Any]]
+    entries: int
+    pages: int
+    bytes: int
+    complete: bool  # every edition of the work was looked at (False if a page failed)
+
+
+class _EntryStream:
+    """
+    Incremental parser for the `entries` array of an editions.json body:
+    feed() raw chunks, get back the entries completed so far.
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self.started = False  # saw '"entries": ['
+        self.done = False     # saw the closing ']'
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        buf = self._buf + self._text.decode(chunk)
+        pos = 0
+        if not self.started:
+            m = _ENTRIES_START.search(buf)
+            if not m:
+                self._buf = buf
+                return []
+            self.started, pos = True, m.end()
+
+        out: List[Dict[str, Any]] = []
+        while not self.done:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if buf[pos] == "]":
+                self.done = True
+                break
+            try:
+                entry, pos = self._json.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # entry continues in the next chunk
+            if isinstance(entry, dict):
+                out.append(entry)
+        self._buf = buf[pos:]
+        return out
+
+
+def _entries_of(body: Optional[bytes]) -> List[Dict[str, Any]]:
+    data = json.loads(body or b"null") or {}
+    return [e for e in data.get("entries", []) or [] if isinstance(e, dict)]
+
+
+@dataclass
+class _PageRead:
+    """What _iter_editions_page() cost and whether the page could be fetched."""
+    bytes: int = 0        # network body bytes as sent (compressed)
+    failed: bool = False  # non-200 response without a cached body
+
+
+def _iter_editions_page(url: str, params: Dict[str, Any], read: _PageRead) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the entries of one editions.json page as they arrive.
+
+    Fresh cached pages are parsed from the cache. Otherwise the body is
+    streamed and parsed incrementally; closing the generator early abandons
+    the rest of the download. Only pages read to the end are cached.
+    read.bytes accumulates network body bytes; read.failed is set when the
+    page could not be fetched (so an empty page is not taken as the end).
+    """
+    key = f"{url}?{urlencode(sorted(params.items()))}"
+    fresh, entry, headers = _cache_lookup(key, "editions")
+    if fresh is not None:
+        yield from _entries_of(fresh)
+        return
+
+    with _get_session().get(
+        url, params=params, headers=headers, timeout=DEFAULT_TIMEOUT, stream=True
+    ) as r:
+        if r.status_code != 200:
+            _cache_store(key, r.status_code, b"", r.headers)
+            if r.status_code == 304 and entry:
+                yield from _entries_of(entry[0])
+            else:
+                read.failed = True
+            return
+
+        parser = _EntryStream()
+        body: List[bytes] = []
+        chunks = r.iter_content(_STREAM_CHUNK)
+        try:
+            for chunk in chunks:
+                body.append(chunk)
+                entries = parser.feed(chunk)
+                if parser.done:
+                    # Array closed: drain the tail so the page can be cached
+                    # before the caller gets a chance to stop.
+                    body.extend(chunks)
+                    _cache_store(key, 200, b"".join(body), r.headers)
+                yield from entries
+                if parser.done:
+                    return
+
+            # Unexpected layout: fall back to parsing the whole body.
+            if not parser.started:
+                _cache_store(key, 200, b"".join(body), r.headers)
+                yield from _entries_of(b"".join(body))
+        finally:
+            read.bytes += r.raw.tell()  # bytes off the wire, also when abandoned early
+
+
+def scan_editions(
+    work_key: str,
+    *,
+    page_size: int = EDITIONS_PAGE_SIZE,
+    max_pages: int = EDITIONS_MAX_PAGES,
+) -> EditionScan:
+    """
+    Page through /works/{id}/editions.json lazily and stop at the first
+    edition with physical_dimensions. Without one inside the page budget, the
+    pick falls back like _choose_edition_with_dims() over what was seen.
+    """
+    wk = (work_key or "").split("/")[-1]  # "OL12345W"
+    seen: List[Dict[str, Any]] = []
+    read = _PageRead()
+    pages = 0
+    pick: Optional[Dict[str, Any]] = None
+    complete = not wk
+
+    url = f"{BASE}/works/{wk}/editions.json"
+    while wk and pick is None and pages < max(1, int(max_pages)):
+        params = {"limit": page_size} if pages == 0 else {"limit": page_size, "offset": pages * page_size}
+        page = _iter_editions_page(url, params, read)
+        pages += 1
+        n = 0
+        for e in page:
+            n += 1
+            seen.append(e)
+            if e.get("physical_dimensions"):
+                pick = e
+                page.close()
+                break
+        if read.failed:
+            break  # unknown whether more editions exist: not complete
+        if pick is None and n < page_size:
+            complete = True
+            break
+
+    if pick is None:
+        pick = _choose_edition_with_dims(seen)
+
+    with _scan_lock:
+        _scan_counters["scans"] += 1
+        _scan_counters["pages"] += pages
+        _scan_counters["bytes"] += read.bytes
+        _scan_counters["with_dims"] += bool(pick and pick.get("physical_dimensions"))
+    return EditionScan(pick, len(seen), pages, read.bytes, complete)
+
+
+def scan_stats() -> Dict[str, int]:
+    """
+    Totals over scan_editions() calls in this process (pages, bytes, and how
+    many scans ended on an edition with dimensions).
+    """
+    with _scan_lock:
+        return dict(_scan_counters)
+
+
 def fetch_dims_for_work(work_key: str) -> Dict[str, Optional[float]]:
     """
-    ONE HTTP CALL:
-      Given a work key like '/works/OL12345W', hit
-      /works/{id}/editions.json and return {height_cm, width_cm, thickness_cm, pages}.
+    Given a work key like '/works/OL12345W', scan its editions (see
+    scan_editions) and return {height_cm, width_cm, thickness_cm, pages}.
     """
-    out: Dict[str, Optional[float]] = {
+    return _dims_from_edition(scan_editions(work_key).edition)
+
+
+def _empty_dims() -> Dict[str, Optional[float]]:
+    return {
         "height_cm": None,
         "width_cm": None,
         "thickness_cm": None,
         "pages": None,
     }
-    if not work_key:
-        return out
 
-    wk = work_key.split("/")[-1]  # "OL12345W"
-    if not wk:
-        return out
 
-    url = f"{BASE}/works/{wk}/editions.json"
-    session = _get_session()
-    r = session.get(url, params={"limit": 50}, timeout=DEFAULT_TIMEOUT)
-    if r.status_code != 200:
-        return out
-
-    entries = (r.json() or {}).get("entries", []) or []
-    ed = _choose_edition_with_dims(entries)
+def _dims_from_edition(ed: Optional[Dict[str, Any]]) -> Dict[str, Optional[float]]:
+    """
+    Normalize one edition's dimensions/pages (cm; thickness estimated from pages).
+    """
+    out = _empty_dims()
     if not ed:
         return out
 
@@ -269,16 +660,116 @@ def _to_int_or_none(x: Any) -> Optional[int]:
 
 
 # ---------------------------------------------------------------------------
-# Build payload for DAL (ONE extra call on Add)
+# Speculative prefetch of edition dimensions for visible search hits
+# ---------------------------------------------------------------------------
+
+PREFETCH_TTL = 300  # seconds a prefetched result stays usable
+
+_prefetch_pool: Optional[ThreadPoolExecutor] = None
+_prefetch_lock = threading.Lock()
+_prefetched: Dict[str, Tuple[float, Dict[str, Optional[float]]]] = {}
+_inflight: Dict[str, Future] = {}
+
+
+class DimsPrefetch:
+    """
+    Handle for one prefetch_dims() call; cancel() drops the fetches that
+    have not started yet (e.g. when a new search replaces the hits).
+    """
+
+    def __init__(self, futures: Dict[str, Future]):
+        self._futures = futures
+
+    def cancel(self) -> None:
+        for key, fut in self._futures.items():
+            if fut.cancel():
+                with _prefetch_lock:
+                    if _inflight.get(key) is fut:
+                        del _inflight[key]
+
+    @property
+    def pending(self) -> int:
+        return sum(1 for f in self._futures.values() if not f.done())
+
+
+def _prefetch_one(key: str) -> Dict[str, Optional[float]]:
+    try:
+        dims = fetch_dims_for_work(key)
+        with _prefetch_lock:
+            _prefetched[key] = (time.monotonic(), dims)
+        return dims
+    finally:
+        with _prefetch_lock:
+            _inflight.pop(key, None)
+
+
+def prefetch_dims(work_keys: Sequence[str]) -> DimsPrefetch:
+    """
+    Start fetching edition dimensions for work keys in the background on a
+    shared, bounded thread pool. Results land in a short-lived cache that
+    build_payload_from_title_hit() consults first.
+    """
+    global _prefetch_pool
+    futures: Dict[str, Future] = {}
+    now = time.monotonic()
+    with _prefetch_lock:
+        if _prefetch_pool is None:
+            _prefetch_pool = ThreadPoolExecutor(
+                max_workers=DEFAULT_WORKERS, thread_name_prefix="ol-prefetch"
+            )
+        for stale in [k for k, (t, _) in _prefetched.items() if now - t > PREFETCH_TTL]:
+            del _prefetched[stale]
+        for key in dict.fromkeys(k for k in work_keys if k):
+            if key in _prefetched:
+                continue
+            fut = _inflight.get(key)
+            if fut is None:
+                fut = _inflight[key] = _prefetch_pool.submit(_prefetch_one, key)
+            futures[key] = fut
+    return DimsPrefetch(futures)
+
+
+def _prefetched_dims(key: Optional[str]) -> Optional[Dict[str, Optional[float]]]:
+    """
+    Prefetched dims for key: from the cache, or by joining a fetch already
+    in flight. None when nothing was prefetched (caller fetches itself).
+    """
+    if not key:
+        return None
+    with _prefetch_lock:
+        entry = _prefetched.get(key)
+        fut = _inflight.get(key)
+    if entry and time.monotonic() - entry[0] <= PREFETCH_TTL:
+        return dict(entry[1])
+    if fut is not None:
+        try:
+            return dict(fut.result(timeout=DEFAULT_TIMEOUT))
+        except Exception:
+            return None
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Build payload for DAL (editions scan on Add)
 # ---------------------------------------------------------------------------
 
 def build_payload_from_title_hit(hit: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Build the payload for DAL using exactly ONE HTTP call at add time:
-    - Call editions.json to get dimensions/pages (in cm).
+    Build the payload for DAL:
+    - Reuse dimensions prefetched in the background (see prefetch_dims), or
+    - Scan editions.json for dimensions/pages (in cm), usually one page.
     """
-    dims = fetch_dims_for_work(hit.get("external_id"))
+    key = hit.get("external_id")
+    dims = _prefetched_dims(key)
+    if dims is None:
+        dims = fetch_dims_for_work(key)
+    return _payload_from_hit(hit, dims)
 
+
+def _payload_from_hit(hit: Dict[str, Any], dims: Dict[str, Optional[float]]) -> Dict[str, Any]:
+    """
+    Combine a search hit with fetched dimensions into a DAL payload.
+    """
     return {
         "external_id": hit.get("external_id"),   
         "title": hit.get("title"),
@@ -293,3 +784,24 @@ def build_payload_from_title_hit(hit: Dict[str, Any]) -> Dict[str, Any]:
         "pages": _to_int_or_none(dims.get("pages")),
     }
 
+
+def build_payloads_for_hits(
+    hits: Sequence[Dict[str, Any]], max_workers: int = DEFAULT_WORKERS
+) -> List[PayloadResult]:
+    """
+    build_payload_from_title_hit() for many hits at once, on a bounded thread
+    pool sharing the pooled session. Results keep the input order; a failing
+    hit yields a PayloadResult with `error` and does not affect the others.
+    """
+    if not hits:
+        return []
+
+    def _one(hit: Dict[str, Any]) -> PayloadResult:
+        try:
+            return PayloadResult(hit, build_payload_from_title_hit(hit))
+        except Exception as e:
+            return PayloadResult(hit, None, str(e) or e.__class__.__name__)
+
+    workers = max(1, min(int(max_workers), len(hits)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ol-payload") as pool:
+        return list(pool.map(_one, hits))
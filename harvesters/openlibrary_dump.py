@@ -0,0 +1,470 @@
+"""
+Streaming importer for Open Library bulk dumps: editions/works lines are
+parsed in a process pool, loaded in batches (COPY + INSERT ... SELECT on
+Postgres, create_books_from_api_bulk elsewhere) and checkpointed by byte
+offset so an interrupted import can resume. Used by `manage.py import-dump`.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from dal import bump_table_versions, create_books_from_api_bulk, log_book_changes
+from harvesters.openlibrary_client import (
+    _cover_url,
+    _estimate_thickness_cm_from_pages,
+    _parse_dimensions,
+    _to_int_or_none,
+)
+from search import index_books
+
+# ---------------------------------------------------------------------------
+# Open Library bulk dumps (https://openlibrary.org/developers/dumps)
+#
+# Each line is tab-separated: type, key, revision, last_modified, JSON.
+# Editions and works dumps are both accepted; works key the catalog
+# (external_id = "/works/OL...W"), as in search_title().
+# ---------------------------------------------------------------------------
+
+DEFAULT_BATCH_SIZE = 5000
+_YEAR = re.compile(r"\b(1[4-9]\d\d|20\d\d)\b")
+_AUTHOR_SEP = "\x1f"  # joins author names in the Postgres COPY stage
+
+
+@dataclass
+class ImportStats:
+    """
+    Running totals for one import; `offset` is the resumable byte position
+    in the decompressed dump.
+    """
+    offset: int = 0
+    lines: int = 0
+    payloads: int = 0
+    created: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.lines / self.seconds if self.seconds else 0.0
+
+
+# ---------------------------------------------------------------------------
+# Parsing (runs in worker processes)
+# ---------------------------------------------------------------------------
+
+def _first_key(items: Any) -> Optional[str]:
+    """
+    First key from a list of {"key": ...} references.
+    """
+    for it in items or []:
+        if isinstance(it, dict) and it.get("key"):
+            return it["key"]
+    return None
+
+
+def _author_keys(rec: Dict[str, Any]) -> List[str]:
+    keys: List[str] = []
+    for a in rec.get("authors") or []:
+        if isinstance(a, dict):
+            k = a.get("key") or (a.get("author") or {}).get("key")
+            if k:
+                keys.append(k)
+    return keys
+
+
+def _year(value: Any) -> Optional[int]:
+    m = _YEAR.search(str(value or ""))
+    return int(m.group(1)) if m else None
+
+
+def _parse_record(line: bytes, only_with_dims: bool) -> Optional[Dict[str, Any]]:
+    """
+    Turn one dump line into a payload for dal.create_books_from_api_bulk(),
+    with author *keys* in "author_keys" (names are resolved later).
+    """
+    parts = line.rstrip(b"\n").split(b"\t", 4)
+    if len(parts) != 5 or parts[0] not in (b"/type/edition", b"/type/work"):
+        return None
+    try:
+        rec = json.loads(parts[4])
+    except ValueError:
+        return None
+
+    is_edition = parts[0] == b"/type/edition"
+    work_key = _first_key(rec.get("works")) if is_edition else rec.get("key")
+    title = (rec.get("title") or "").strip()
+    if not work_key or not title:
+        return None
+
+    dims = rec.get("physical_dimensions") or ""
+    pages = _to_int_or_none(rec.get("number_of_pages"))
+    if only_with_dims and not (dims or pages):
+        return None
+
+    h, w, t = _parse_dimensions(dims)
+    if t is None and pages:
+        t = _estimate_thickness_cm_from_pages(pages)
+
+    desc = rec.get("description")
+    if isinstance(desc, dict):
+        desc = desc.get("value")
+    lang = _first_key(rec.get("languages"))
+    covers = [c for c in rec.get("covers") or [] if isinstance(c, int) and c > 0]
+
+    return {
+        "external_id": work_key,
+        "title": title[:300],
+        "year": _year(rec.get("publish_date") if is_edition else rec.get("first_publish_date")),
+        "description": desc if isinstance(desc, str) else None,
+        "cover_url": _cover_url(covers[0]) if covers else None,
+        "language": lang.split("/")[-1][:10] if lang else None,
+        "pages": pages,
+        "height_cm": _to_int_or_none(h),
+        "width_cm": _to_int_or_none(w),
+        "thickness_cm": _to_int_or_none(t),
+        "author_keys": _author_keys(rec),
+    }
+
+
+def _parse_batch(lines: Sequence[bytes], only_with_dims: bool) -> List[Dict[str, Any]]:
+    """
+    Worker entry point: parse a batch of raw dump lines.
+    """
+    out = []
+    for line in lines:
+        p = _parse_record(line, only_with_dims)
+        if p is not None:
+            out.append(p)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Streaming / checkpoints
+# ---------------------------------------------------------------------------
+
+def _open_dump(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def iter_line_batches(
+    path: str, *, start_offset: int = 0, batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[Tuple[int, List[bytes]]]:
+    """
+    Yield (end_offset, lines) batches from a (gzipped) dump, starting at a
+    byte offset of the decompressed stream. Memory is bounded by batch_size.
+    """
+    with _open_dump(path) as f:
+        if start_offset:
+            f.seek(start_offset)  # gzip: decompresses and discards up to here
+        offset = start_offset
+        batch: List[bytes] = []
+        for line in f:
+            offset += len(line)
+            batch.append(line)
+            if len(batch) >= batch_size:
+                yield offset, batch
+                batch = []
+        if batch:
+            yield offset, batch
+
+
+def load_checkpoint(path: str, dump_path: str) -> int:
+    """
+    Byte offset saved for dump_path, or 0 when there is no usable checkpoint.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if data.get("dump") != os.path.abspath(dump_path):
+        return 0
+    return int(data.get("offset") or 0)
+
+
+def save_checkpoint(path: str, dump_path: str, stats: ImportStats) -> None:
+    """
+    Atomically record progress after a committed batch.
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "dump": os.path.abspath(dump_path),
+                "offset": stats.offset,
+                "lines": stats.lines,
+                "created": stats.created,
+            },
+            f,
+        )
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Author names (key -> name) staged on disk
+# ---------------------------------------------------------------------------
+
+class AuthorNames:
+    """
+    Disk-backed author key -> name lookup built from an authors dump, so
+    edition/work records can be linked to names without holding the full
+    authors dump in memory.
+    """
+
+    def __init__(self, path: str):
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS names (key TEXT PRIMARY KEY, name TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (done INTEGER)")
+
+    @classmethod
+    def build(cls, authors_dump: str, path: str, batch_size: int = 50_000) -> "AuthorNames":
+        """
+        Stage names from an authors dump; reuses a completed staging file.
+        """
+        names = cls(path)
+        if names._db.execute("SELECT done FROM meta").fetchone():
+            return names
+        names._db.execute("DELETE FROM names")
+        for _, lines in iter_line_batches(authors_dump, batch_size=batch_size):
+            rows = []
+            for line in lines:
+                parts = line.rstrip(b"\n").split(b"\t", 4)
+                if len(parts) != 5 or parts[0] != b"/type/author":
+                    continue
+                try:
+                    rec = json.loads(parts[4])
+                except ValueError:
+                    continue
+                name = (rec.get("name") or "").strip()
+                if name:
+                    rows.append((parts[1].decode("utf-8"), name[:200]))
+            names._db.executemany("INSERT OR REPLACE INTO names VALUES (?, ?)", rows)
+            names._db.commit()
+        names._db.execute("INSERT INTO meta VALUES (1)")
+        names._db.commit()
+        return names
+
+    def lookup(self, keys: Sequence[str]) -> Dict[str, str]:
+        out: Dict[str, str] = {}
+        keys = list(set(keys))
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            out.update(
+                self._db.execute(f"SELECT key, name FROM names WHERE key IN ({marks})", chunk)
+            )
+        return out
+
+
+def _attach_author_names(
+    payloads: List[Dict[str, Any]], names: Optional[AuthorNames]
+) -> None:
+    keys = [k for p in payloads for k in p.get("author_keys", [])]
+    lookup = names.lookup(keys) if (names and keys) else {}
+    for p in payloads:
+        p["authors"] = [lookup[k] for k in p.pop("author_keys", []) if k in lookup]
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def _copy_value(v: Any) -> str:
+    """
+    Encode one value for COPY ... FROM STDIN (text format).
+    """
+    if v is None:
+        return r"\N"
+    s = str(v)
+    return (
+        s.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+_STAGE_COLUMNS = (
+    "external_id", "title", "year", "description", "cover_url", "language",
+    "pages", "height_cm", "width_cm", "thickness_cm", "authors",
+)
+
+
+def _load_batch_postgres(session: Session, payloads: List[Dict[str, Any]]) -> int:
+    """
+    COPY a batch into a temp stage table, then move it into books/authors/
+    book_authors with set-based INSERT ... SELECT. Returns books created.
+    """
+    session.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS ol_stage ("
+        "external_id text, title text, year int, description text, cover_url text, "
+        "language text, pages int, height_cm int, width_cm int, thickness_cm int, "
+        "authors text) ON COMMIT DELETE ROWS"
+    ))
+    buf = io.StringIO()
+    for p in payloads:
+        row = dict(p, authors=_AUTHOR_SEP.join(p.get("authors") or []))
+        buf.write("\t".join(_copy_value(row.get(c)) for c in _STAGE_COLUMNS))
+        buf.write("\n")
+
+    copy_sql = f"COPY ol_stage ({', '.join(_STAGE_COLUMNS)}) FROM STDIN"
+    cursor = session.connection().connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy"):  # psycopg 3
+            with cursor.copy(copy_sql) as cp:
+                cp.write(buf.getvalue())
+        else:  # psycopg2
+            buf.seek(0)
+            cursor.copy_expert(copy_sql, buf)
+    finally:
+        cursor.close()
+
+    session.execute(text(
+        "INSERT INTO authors (name) "
+        "SELECT DISTINCT n FROM ol_stage, unnest(string_to_array(authors, chr(31))) AS n "
+        "WHERE n <> '' ON CONFLICT (name) DO NOTHING"
+    ))
+    new_ids = list(session.scalars(text(
+        """
+        WITH src AS (
+          SELECT DISTINCT ON (external_id) *
+          FROM ol_stage
+          ORDER BY external_id, (height_cm IS NULL), (pages IS NULL)
+        ), new AS (
+          INSERT INTO books (external_id, title, year, description, cover_url,
+                             language, pages, height_cm, width_cm, thickness_cm)
+          SELECT external_id, title, year, description, cover_url,
+                 language, pages, height_cm, width_cm, thickness_cm
+          FROM src
+          WHERE NOT EXISTS (SELECT 1 FROM books b WHERE b.external_id = src.external_id)
+          ON CONFLICT DO NOTHING
+          RETURNING id, external_id
+        ), links AS (
+          INSERT INTO book_authors (book_id, author_id)
+          SELECT DISTINCT new.id, a.id
+          FROM new
+          JOIN src ON src.external_id = new.external_id
+          CROSS JOIN LATERAL unnest(string_to_array(src.authors, chr(31))) AS n
+          JOIN authors a ON a.name = n
+        )
+        SELECT id FROM new
+        """
+    )))
+    index_books(session, new_ids)
+    if new_ids:
+        log_book_changes(session, new_ids)
+        bump_table_versions(session, "books")
+    return len(new_ids)
+
+
+def _best_per_work(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    One payload per external_id, preferring editions with a height, then with
+    a page count (the ORDER BY of the Postgres DISTINCT ON); ties keep the
+    first. Works stay in order of first appearance.
+    """
+    def _rank(p: Dict[str, Any]) -> Tuple[bool, bool]:
+        return (p.get("height_cm") is None, p.get("pages") is None)
+
+    best: Dict[str, Dict[str, Any]] = {}
+    for p in payloads:
+        cur = best.get(p["external_id"])
+        if cur is None or _rank(p) < _rank(cur):
+            best[p["external_id"]] = p
+    order = {k: i for i, k in enumerate(dict.fromkeys(p["external_id"] for p in payloads))}
+    return sorted(best.values(), key=lambda p: order[p["external_id"]])
+
+
+def _load_batch(session: Session, payloads: List[Dict[str, Any]]) -> int:
+    """
+    Load one parsed batch and commit it. Returns the number of books created.
+    Both backends keep the same edition per work (_best_per_work).
+    """
+    if not payloads:
+        return 0
+    if session.get_bind().dialect.name == "postgresql":
+        n = _load_batch_postgres(session, payloads)
+        session.commit()
+        return n
+
+    payloads = _best_per_work(payloads)
+    results = create_books_from_api_bulk(session, payloads, chunk_size=len(payloads))
+    return sum(1 for r in results if r.created)
+
+
+def import_dump(
+    session: Session,
+    dump_path: str,
+    *,
+    authors_dump: Optional[str] = None,
+    checkpoint_path: Optional[str] = None,
+    resume: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: Optional[int] = None,
+    only_with_dims: bool = False,
+    progress: Optional[Callable[[ImportStats], None]] = None,
+) -> ImportStats:
+    """
+    Stream an Open Library editions/works dump into the catalog.
+
+    Lines are parsed in a process pool (workers=0 parses inline), batches are
+    loaded and committed in dump order, and the decompressed byte offset is
+    checkpointed after each commit so an interrupted run can `resume`.
+    """
+    checkpoint_path = checkpoint_path or f"{dump_path}.checkpoint.json"
+    start = load_checkpoint(checkpoint_path, dump_path) if resume else 0
+    names = (
+        AuthorNames.build(authors_dump, f"{authors_dump}.names.sqlite")
+        if authors_dump
+        else None
+    )
+
+    stats = ImportStats(offset=start)
+    started = time.perf_counter()
+
+    def _finish(end_offset: int, n_lines: int, payloads: List[Dict[str, Any]]) -> None:
+        _attach_author_names(payloads, names)
+        stats.created += _load_batch(session, payloads)
+        stats.offset = end_offset
+        stats.lines += n_lines
+        stats.payloads += len(payloads)
+        stats.seconds = time.perf_counter() - started
+        save_checkpoint(checkpoint_path, dump_path, stats)
+        if progress:
+            progress(stats)
+
+    batches = iter_line_batches(dump_path, start_offset=start, batch_size=batch_size)
+    if workers == 0:
+        for end_offset, lines in batches:
+            _finish(end_offset, len(lines), _parse_batch(lines, only_with_dims))
+        return stats
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Bounded window of in-flight batches keeps memory flat while the
+        # main process loads results in order.
+        window = 2 * workers
+        pending: Deque[Tuple[int, int, Future]] = deque()
+        for end_offset, lines in batches:
+            pending.append(
+                (end_offset, len(lines), pool.submit(_parse_batch, lines, only_with_dims))
+            )
+            if len(pending) >= window:
+                end, n, fut = pending.popleft()
+                _finish(end, n, fut.result())
+        while pending:
+            end, n, fut = pending.popleft()
+            _finish(end, n, fut.result())
+    return stats
@@ -1,14 +1,12 @@
-from sqlalchemy import select
+from dal import ensure_user_id
 from db import engine, get_session
-from models import Base, User
+from schema import ensure_schema
 
 def main():
-    Base.metadata.create_all(bind=engine)
+    ensure_schema(engine)
     # Optional: ensure a demo user exists
     with get_session() as s:
-        demo = s.scalar(select(User).where(User.username == "demo"))
-        if not demo:
-            s.add(User(username="demo"))
+        ensure_user_id(s, "demo")
 
 if __name__ == "__main__":
     main()
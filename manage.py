@@ -0,0 +1,104 @@
+"""
+Maintenance commands for the catalog database.
+
+Usage:
+    python manage.py rebuild-search         # repopulate the full-text search index
+    python manage.py check-rating-stats     # compare book_rating_stats with reviews
+    python manage.py rebuild-rating-stats   # recompute book_rating_stats from reviews
+    python manage.py import-dump FILE       # stream an Open Library editions/works dump
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+from dal import check_rating_stats, rebuild_rating_stats
+from db import engine, get_session
+from harvesters.openlibrary_dump import DEFAULT_BATCH_SIZE, import_dump
+from schema import ensure_schema
+from search import rebuild_search_index
+
+
+def _rebuild_search(args: argparse.Namespace) -> None:
+    with get_session() as s:
+        n = rebuild_search_index(s)
+    print(f"Indexed {n} books.")
+
+
+def _check_rating_stats(args: argparse.Namespace) -> None:
+    with get_session() as s:
+        bad = check_rating_stats(s)
+    if not bad:
+        print("Rating stats are consistent.")
+        return
+    print(f"{len(bad)} books with inconsistent rating stats: {bad[:20]}")
+    sys.exit(1)
+
+
+def _rebuild_rating_stats(args: argparse.Namespace) -> None:
+    with get_session() as s:
+        n = rebuild_rating_stats(s)
+    print(f"Rebuilt rating stats for {n} books.")
+
+
+def _import_dump(args: argparse.Namespace) -> None:
+    def _progress(stats):
+        print(
+            f"offset={stats.offset} lines={stats.lines} books={stats.payloads} "
+            f"created={stats.created} ({stats.rows_per_second:,.0f} rows/s)",
+            flush=True,
+        )
+
+    with get_session() as s:
+        stats = import_dump(
+            s,
+            args.path,
+            authors_dump=args.authors_dump,
+            checkpoint_path=args.checkpoint,
+            resume=args.resume,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            only_with_dims=args.only_with_dimensions,
+            progress=_progress,
+        )
+    print(
+        f"Done: {stats.lines} lines, {stats.created} books created in "
+        f"{stats.seconds:.1f}s ({stats.rows_per_second:,.0f} rows/s)."
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("rebuild-search", help="Repopulate the full-text search index")
+    p.set_defaults(func=_rebuild_search)
+
+    p = sub.add_parser("check-rating-stats", help="Compare rating stats with reviews")
+    p.set_defaults(func=_check_rating_stats)
+
+    p = sub.add_parser("rebuild-rating-stats", help="Recompute rating stats from reviews")
+    p.set_defaults(func=_rebuild_rating_stats)
+
+    p = sub.add_parser("import-dump", help="Import an Open Library editions/works dump")
+    p.add_argument("path", help="ol_dump_editions_*.txt.gz or ol_dump_works_*.txt.gz")
+    p.add_argument("--authors-dump", help="ol_dump_authors_*.txt.gz to resolve author names")
+    p.add_argument("--checkpoint", help="checkpoint file (default: PATH.checkpoint.json)")
+    p.add_argument("--resume", action="store_true", help="continue from the checkpoint offset")
+    p.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    p.add_argument("--workers", type=int, default=None, help="parser processes (0 = inline)")
+    p.add_argument(
+        "--only-with-dimensions",
+        action="store_true",
+        help="skip records without physical_dimensions or number_of_pages",
+    )
+    p.set_defaults(func=_import_dump)
+
+    args = parser.parse_args(argv)
+    ensure_schema(engine)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,15 @@ This file defines the SQLAlchemy ORM models.
 Each class maps to a table; relationships map to foreign keys.
 
 - User -> Review -> Book (users write reviews on books)
+- Book -> BookRatingStats  (denormalized rating aggregates, kept by the DAL)
 - Book <-> Author          (many-to-many via book_authors)
+- TableVersion             (per-table write counters for cache invalidation)
+- BookChange               (append-only log of created/deleted book ids, for in-process indexes)
+- SchemaVersion            (single-row marker: schema version applied by ensure_schema)
 
 Conventions:
 - Integer sizes are in centimeters (height_cm, width_cm, thickness_cm).
+- volume_cm3 is a generated column (h * w * t / 1000), NULL unless all three are set.
 - external_id stores an external provider key (Open Library).
 - Keep (title, year) unique to reduce duplicates.
 - Deleting a Book deletes its Reviews).
@@ -18,10 +23,24 @@ Conventions:
 from __future__ import annotations
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import String, Integer, DateTime, Text, ForeignKey, UniqueConstraint
+from sqlalchemy import (
+    Computed,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
+# Shared with the schema migration that adds the column to existing databases.
+VOLUME_SQL = "(height_cm * width_cm * thickness_cm) / 1000.0"
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -73,6 +92,9 @@ class Book(Base):
     thickness_cm: Mapped[Optional[int]]
     pages: Mapped[Optional[int]]
     format: Mapped[Optional[str]] = mapped_column(String(30))
+    volume_cm3: Mapped[Optional[float]] = mapped_column(
+        Float, Computed(VOLUME_SQL, persisted=True)
+    )
 
     authors: Mapped[List["Author"]] = relationship(
         secondary="book_authors", back_populates="books"
@@ -84,6 +106,11 @@ class Book(Base):
 
     __table_args__ = (
         UniqueConstraint("title", "year", name="uq_book_title_year"),
+        # Keyset sort indexes used by dal.list_books (sort key + id tiebreak).
+        Index("ix_books_title_id", "title", "id"),
+        Index("ix_books_volume_id", "volume_cm3", "id"),
+        Index("ix_books_pages_id", "pages", "id"),
+        Index("ix_books_year_id", "year", "id"),
     )
 
 
@@ -116,3 +143,61 @@ class Review(Base):
         UniqueConstraint("user_id", "book_id", name="uq_user_book_once"),
     )
 
+
+class BookRatingStats(Base):
+    """
+    Running rating aggregates per Book (sum, count, average, 1..5 histogram).
+    Maintained by the DAL review writes; rebuildable from reviews.
+    """
+    __tablename__ = "book_rating_stats"
+
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id"), primary_key=True)
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0)
+    rating_count: Mapped[int] = mapped_column(Integer, default=0)
+    avg_rating: Mapped[Optional[float]] = mapped_column(Float)
+    n1: Mapped[int] = mapped_column(Integer, default=0)
+    n2: Mapped[int] = mapped_column(Integer, default=0)
+    n3: Mapped[int] = mapped_column(Integer, default=0)
+    n4: Mapped[int] = mapped_column(Integer, default=0)
+    n5: Mapped[int] = mapped_column(Integer, default=0)
+
+    __table_args__ = (
+        # Keyset index for dal.list_books(sort="rating").
+        Index("ix_book_rating_stats_avg_book", "avg_rating", "book_id"),
+    )
+
+
+class TableVersion(Base):
+    """
+    Monotonic write counter per logical table, bumped by DAL writes in the
+    same transaction. UI caches key their entries on these versions.
+    """
+    __tablename__ = "table_versions"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class BookChange(Base):
+    """
+    Append-only log of book ids whose title index entry changed (created or
+    deleted), written by the DAL in the same transaction. In-process indexes
+    (book_index.py) apply the entries past the last seq they saw.
+    """
+    __tablename__ = "book_changes"
+    __table_args__ = {"sqlite_autoincrement": True}  # never reuse a seq
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True)
+    book_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class SchemaVersion(Base):
+    """
+    Single row (id=1) recording the schema.SCHEMA_VERSION that ensure_schema()
+    last brought the database up to; lets startup skip introspection.
+    """
+    __tablename__ = "schema_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,411 @@
+"""
+=============================================================
+Catalog page cache
+=============================================================
+Read-through cache in front of dal.list_books() / rating_summary_for_books()
+for the Browse tab, shared by all sessions and worker processes.
+
+- L1: in-process LRU bounded by the size of the serialized values.
+- L2: shared store picked from a URL (secrets `connections.page_cache.url`,
+  env PAGE_CACHE_URL): `sqlite:///path` (default: .cache/pages-<db id>.sqlite) or
+  `redis://host:port/db` (needs the optional `redis` package); "" disables it.
+- Keys: the database id (hash of the URL without credentials), (query, sort,
+  cursor) and the table versions the value was computed from
+  (dal.table_versions), so a write simply moves readers to new keys and old
+  entries age out (TTL in L2, LRU in L1). Two catalogs sharing a store never
+  see each other's pages, even at equal versions.
+- Values: compact JSON rows (BookRow), never ORM objects.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from dal import list_books, rating_summary_for_books
+from models import Book
+
+try:  # optional: only needed for a redis:// L2
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+L1_MAX_BYTES = int(float(os.getenv("PAGE_CACHE_L1_MB", "32")) * 1024 * 1024)
+L2_MAX_BYTES = int(float(os.getenv("PAGE_CACHE_L2_MB", "256")) * 1024 * 1024)
+TTL = int(os.getenv("PAGE_CACHE_TTL", "600"))  # seconds an L2 entry lives
+_KEY_PREFIX = "bb:page:v1:"
+
+
+@lru_cache(maxsize=32)
+def database_id(url: str) -> str:
+    """
+    Stable short id of a database: hash of its URL without credentials, with
+    SQLite paths resolved (same file from any working directory).
+    """
+    u = make_url(url)._replace(username=None, password=None)  # set() skips None
+    if u.get_backend_name() == "sqlite" and u.database not in (None, "", ":memory:"):
+        u = u.set(database=os.path.realpath(u.database))
+    return hashlib.sha1(u.render_as_string(hide_password=False).encode("utf-8")).hexdigest()[:16]
+
+
+def _session_db_id(session: Session) -> str:
+    return database_id(str(session.get_bind().url))
+
+
+def _cache_url() -> str:
+    try:
+        import streamlit as st
+        url = st.secrets.get("connections", {}).get("page_cache", {}).get("url")
+        if url is not None:
+            return url
+    except Exception:
+        pass
+    url = os.getenv("PAGE_CACHE_URL")
+    if url is not None:
+        return url
+    from db import DB_URL, READ_DB_URL  # default store: one file per catalog
+
+    name = f"pages-{database_id(READ_DB_URL or DB_URL)}.sqlite"
+    return "sqlite:///" + os.path.join(".cache", name)
+
+
+# ---------------------------------------------------------------------------
+# Rows
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class BookRow:
+    """
+    The Book fields a catalog card needs; authors are names.
+    """
+    id: int
+    title: str
+    external_id: Optional[str]
+    cover_url: Optional[str]
+    authors: Tuple[str, ...]
+    height_cm: Optional[int]
+    width_cm: Optional[int]
+    thickness_cm: Optional[int]
+    pages: Optional[int]
+    format: Optional[str]
+    volume_cm3: Optional[float]
+
+    @classmethod
+    def from_book(cls, b: Book) -> "BookRow":
+        return cls(
+            b.id, b.title, b.external_id, b.cover_url, tuple(a.name for a in b.authors),
+            b.height_cm, b.width_cm, b.thickness_cm, b.pages, b.format, b.volume_cm3,
+        )
+
+    def to_json(self) -> list:
+        return [
+            self.id, self.title, self.external_id, self.cover_url, list(self.authors),
+            self.height_cm, self.width_cm, self.thickness_cm, self.pages, self.format,
+            self.volume_cm3,
+        ]
+
+    @classmethod
+    def from_json(cls, row: list) -> "BookRow":
+        row = list(row)
+        row[4] = tuple(row[4])
+        return cls(*row)
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    """Same shape as dal.BookPage, with BookRow items."""
+    items: List[BookRow]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+# ---------------------------------------------------------------------------
+# L2 stores
+# ---------------------------------------------------------------------------
+
+class _SQLiteStore:
+    """
+    Shared file store. One connection per thread; WAL lets several processes
+    read and write concurrently.
+    """
+
+    kind = "sqlite"
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._puts = 0
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS page_cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "expires_at REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS ix_page_cache_expires ON page_cache (expires_at)"
+            )
+            self._local.db = db
+        return db
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._db().execute(
+            "SELECT value FROM page_cache WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, value: bytes, ttl: int) -> None:
+        db = self._db()
+        db.execute(
+            "INSERT OR REPLACE INTO page_cache VALUES (?, ?, ?, ?)",
+            (key, value, time.time() + ttl, len(value)),
+        )
+        self._puts += 1
+        if self._puts % 100 == 0:
+            self._prune(db)
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        """Drop expired entries, then the soonest-to-expire ones over budget."""
+        db.execute("DELETE FROM page_cache WHERE expires_at <= ?", (time.time(),))
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM page_cache").fetchone()[0]
+        if total > self.max_bytes:
+            db.execute(
+                "DELETE FROM page_cache WHERE key IN ("
+                "SELECT key FROM page_cache ORDER BY expires_at "
+                "LIMIT (SELECT COUNT(*) / 4 + 1 FROM page_cache))"
+            )
+
+    def clear(self) -> None:
+        self._db().execute("DELETE FROM page_cache")
+
+
+class _RedisStore:
+    """Any Redis-compatible server (Redis, Valkey, KeyDB, ...)."""
+
+    kind = "redis"
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError("page cache URL uses redis:// but the 'redis' package is not installed")
+        self._r = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._r.get(key)
+
+    def put(self, key: str, value: bytes, ttl: int) -> None:
+        self._r.set(key, value, ex=ttl)
+
+    def clear(self) -> None:
+        for key in self._r.scan_iter(match=_KEY_PREFIX + "*"):
+            self._r.delete(key)
+
+
+def _store_from_url(url: str):
+    if not url:
+        return None
+    if url.startswith("sqlite:///"):
+        return _SQLiteStore(url[len("sqlite:///"):], L2_MAX_BYTES)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return _RedisStore(url)
+    raise ValueError(f"unsupported page cache URL: {url!r}")
+
+
+# ---------------------------------------------------------------------------
+# Two-level cache
+# ---------------------------------------------------------------------------
+
+class ResultCache:
+    """
+    L1 (process LRU, byte-bounded) over an optional L2 store. Values are
+    JSON-serializable; L2 errors degrade to misses instead of failing reads.
+    """
+
+    def __init__(self, l2=None, *, l1_max_bytes: int = L1_MAX_BYTES, ttl: int = TTL):
+        self.l2 = l2
+        self.ttl = ttl
+        self.l1_max_bytes = l1_max_bytes
+        self._l1: "OrderedDict[str, bytes]" = OrderedDict()
+        self._l1_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "l1_evictions": 0, "l2_errors": 0}
+        self._seconds = {"l1_hits": 0.0, "l2_hits": 0.0, "misses": 0.0}
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        raw = json.dumps(parts, separators=(",", ":"), default=str)
+        return _KEY_PREFIX + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _l1_get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            raw = self._l1.get(key)
+            if raw is not None:
+                self._l1.move_to_end(key)
+            return raw
+
+    def _l1_put(self, key: str, raw: bytes) -> None:
+        if len(raw) > self.l1_max_bytes:
+            return
+        with self._lock:
+            old = self._l1.pop(key, None)
+            if old is not None:
+                self._l1_bytes -= len(old)
+            self._l1[key] = raw
+            self._l1_bytes += len(raw)
+            while self._l1_bytes > self.l1_max_bytes:
+                _, victim = self._l1.popitem(last=False)
+                self._l1_bytes -= len(victim)
+                self.counters["l1_evictions"] += 1
+
+    def _record(self, kind: str, started: float) -> None:
+        with self._lock:
+            self.counters[kind] += 1
+            self._seconds[kind] += time.perf_counter() - started
+
+    def _l2_error(self) -> None:
+        with self._lock:
+            self.counters["l2_errors"] += 1
+
+    def get_or_load(self, key: str, load: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        raw = self._l1_get(key)
+        if raw is not None:
+            value = json.loads(raw)
+            self._record("l1_hits", started)
+            return value
+
+        if self.l2 is not None:
+            try:
+                raw = self.l2.get(key)
+            except Exception:
+                raw = None
+                self._l2_error()
+            if raw is not None:
+                self._l1_put(key, raw)
+                value = json.loads(raw)
+                self._record("l2_hits", started)
+                return value
+
+        value = load()
+        raw = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        self._l1_put(key, raw)
+        if self.l2 is not None:
+            try:
+                self.l2.put(key, raw, self.ttl)
+            except Exception:
+                self._l2_error()
+        self._record("misses", started)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._l1.clear()
+            self._l1_bytes = 0
+        if self.l2 is not None:
+            self.l2.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Counters, hit ratio, mean latency per outcome (ms) and L1 occupancy.
+        """
+        with self._lock:
+            c = dict(self.counters)
+            secs = dict(self._seconds)
+            entries, size = len(self._l1), self._l1_bytes
+        lookups = c["l1_hits"] + c["l2_hits"] + c["misses"]
+        out: Dict[str, Any] = dict(c)
+        out["hit_ratio"] = round((c["l1_hits"] + c["l2_hits"]) / lookups, 3) if lookups else None
+        for kind, total in secs.items():
+            out[f"{kind}_ms"] = round(1000 * total / c[kind], 3) if c[kind] else None
+        out.update(
+            l1_entries=entries,
+            l1_bytes=size,
+            l1_max_bytes=self.l1_max_bytes,
+            l2=self.l2.kind if self.l2 is not None else None,
+        )
+        return out
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResultCache:
+    """The process-wide cache, configured on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(_store_from_url(_cache_url()))
+    return _cache
+
+
+def cache_stats() -> Dict[str, Any]:
+    return get_cache().stats()
+
+
+# ---------------------------------------------------------------------------
+# Cached DAL reads
+# ---------------------------------------------------------------------------
+
+def cached_list_books(
+    session: Session,
+    *,
+    q: Optional[str],
+    sort: Optional[str],
+    cursor: Optional[str],
+    versions: Sequence[int],
+) -> CachedPage:
+    """
+    list_books() through the cache. `versions` are the table versions the
+    ordering depends on. Invalid cursors raise ValueError (never cached).
+    """
+    def _load() -> dict:
+        page = list_books(session, q=q, sort=sort, cursor=cursor)
+        return {
+            "items": [BookRow.from_book(b).to_json() for b in page.items],
+            "next": page.next_cursor,
+            "prev": page.prev_cursor,
+        }
+
+    key = ResultCache.key("page", _session_db_id(session), q or "", sort, cursor, list(versions))
+    data = get_cache().get_or_load(key, _load)
+    return CachedPage(
+        items=[BookRow.from_json(r) for r in data["items"]],
+        next_cursor=data["next"],
+        prev_cursor=data["prev"],
+    )
+
+
+def cached_rating_summaries(
+    session: Session, book_ids: Sequence[int], *, reviews_version: int
+) -> Dict[int, Tuple[float, int]]:
+    """
+    rating_summary_for_books() through the cache, keyed by the ids and the
+    reviews version (so a review write only invalidates summaries).
+    """
+    if not book_ids:
+        return {}
+
+    def _load() -> list:
+        return [[bid, avg, n] for bid, (avg, n) in rating_summary_for_books(session, book_ids).items()]
+
+    key = ResultCache.key("ratings", _session_db_id(session), list(book_ids), reviews_version)
+    return {int(bid): (avg, int(n)) for bid, avg, n in get_cache().get_or_load(key, _load)}
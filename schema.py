@@ -0,0 +1,82 @@
+"""
+=============================================================
+Schema setup
+=============================================================
+Creates ORM tables plus the structures create_all() does not manage
+(the full-text search index, columns/indexes added to existing tables),
+and backfills derived data (search index, rating stats) for existing databases.
+
+The schema_version row records SCHEMA_VERSION once ensure_schema() has run,
+so startup can check one row instead of introspecting every table. Bump
+SCHEMA_VERSION whenever ensure_schema() learns a new step.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from dal import rebuild_rating_stats
+from models import VOLUME_SQL, Base, Book, BookRatingStats, SchemaVersion
+from search import create_search_index, rebuild_search_index
+
+SCHEMA_VERSION = 2
+
+
+def schema_version(engine: Engine) -> Optional[int]:
+    """
+    Version recorded by the last ensure_schema(), or None for databases that
+    predate the marker (or have no tables yet). A single-row lookup.
+    """
+    try:
+        with engine.connect() as conn:
+            return conn.scalar(
+                select(SchemaVersion.version).where(SchemaVersion.id == 1)
+            )
+    except DBAPIError:
+        return None
+
+
+def ensure_schema(engine: Engine) -> None:
+    """
+    Create missing tables/indexes and record SCHEMA_VERSION. Safe to call
+    repeatedly.
+    """
+    existing = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+    _add_volume_column(engine)
+
+    if BookRatingStats.__tablename__ not in existing:
+        # Derived table added to a database that may already have reviews.
+        with Session(engine) as s, s.begin():
+            rebuild_rating_stats(s)
+
+    if create_search_index(engine):
+        # Fresh index on a possibly non-empty catalog: populate it once.
+        with Session(engine) as s, s.begin():
+            rebuild_search_index(s)
+
+    with Session(engine) as s, s.begin():
+        s.merge(SchemaVersion(id=1, version=SCHEMA_VERSION, applied_at=datetime.utcnow()))
+
+
+def _add_volume_column(engine: Engine) -> None:
+    """
+    Add books.volume_cm3 (and the sort indexes) to databases created before it.
+    SQLite can only ALTER in VIRTUAL generated columns; they are still indexable.
+    """
+    columns = {c["name"] for c in inspect(engine).get_columns("books")}
+    with engine.begin() as conn:
+        if "volume_cm3" not in columns:
+            storage = "VIRTUAL" if engine.dialect.name == "sqlite" else "STORED"
+            conn.execute(text(
+                f"ALTER TABLE books ADD COLUMN volume_cm3 FLOAT "
+                f"GENERATED ALWAYS AS ({VOLUME_SQL}) {storage}"
+            ))
+        for index in Book.__table__.indexes:
+            index.create(conn, checkfirst=True)
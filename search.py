@@ -0,0 +1,204 @@
+"""
+=============================================================
+Full-text search
+=============================================================
+Ranked search over book title, authors and description.
+
+Backends (picked from the session's dialect):
+- SQLite:     FTS5 virtual table `books_fts` (rowid = books.id), ranked by bm25.
+- PostgreSQL: `book_search` table holding a weighted tsvector + GIN index.
+- Others:     no index; callers fall back to a LIKE filter on the title.
+
+The index is a derived copy of the catalog: DAL write functions call
+index_books()/unindex_books() inside their own transaction, and
+rebuild_search_index() repopulates it from scratch for existing databases.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Optional, Sequence
+
+from sqlalchemy import Float, Integer, bindparam, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+# Column weights: title matters more than authors, authors more than description.
+_SQLITE_BM25 = "bm25(books_fts, 10.0, 5.0, 1.0)"
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def backend(bind: Session | Connection | Engine) -> Optional[str]:
+    """
+    Return 'sqlite', 'postgresql', or None when full-text search is unavailable.
+    """
+    name = bind.get_bind().dialect.name if isinstance(bind, Session) else bind.dialect.name
+    return name if name in ("sqlite", "postgresql") else None
+
+
+# ---------------------------------------------------------------------------
+# DDL
+# ---------------------------------------------------------------------------
+
+def _create(conn: Connection, kind: str) -> None:
+    if kind == "sqlite":
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5("
+            "title, authors, description, tokenize='unicode61 remove_diacritics 2')"
+        ))
+    else:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS book_search ("
+            "book_id INTEGER PRIMARY KEY REFERENCES books(id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_book_search_document "
+            "ON book_search USING GIN (document)"
+        ))
+
+
+def create_search_index(bind: Engine | Connection) -> bool:
+    """
+    Create the search structures if missing. Returns True when they were
+    created (i.e. the index is empty and should be rebuilt).
+    """
+    kind = backend(bind)
+    if kind is None:
+        return False
+
+    table = "books_fts" if kind == "sqlite" else "book_search"
+    if inspect(bind).has_table(table):
+        return False
+
+    if isinstance(bind, Engine):
+        with bind.begin() as conn:
+            _create(conn, kind)
+    else:
+        _create(bind, kind)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Sync (called by the DAL inside the caller's transaction)
+# ---------------------------------------------------------------------------
+
+def _populate_sql(kind: str, where: str) -> str:
+    """
+    INSERT ... SELECT that builds index rows straight from books/authors.
+    """
+    if kind == "sqlite":
+        return f"""
+            INSERT INTO books_fts (rowid, title, authors, description)
+            SELECT b.id,
+                   b.title,
+                   COALESCE((SELECT group_concat(a.name, ' ')
+                               FROM book_authors ba
+                               JOIN authors a ON a.id = ba.author_id
+                              WHERE ba.book_id = b.id), ''),
+                   COALESCE(b.description, '')
+            FROM books b
+            {where}
+        """
+    return f"""
+        INSERT INTO book_search (book_id, document)
+        SELECT b.id,
+               setweight(to_tsvector('simple', b.title), 'A')
+               || setweight(to_tsvector('simple', COALESCE((
+                    SELECT string_agg(a.name, ' ')
+                      FROM book_authors ba
+                      JOIN authors a ON a.id = ba.author_id
+                     WHERE ba.book_id = b.id), '')), 'B')
+               || setweight(to_tsvector('simple', COALESCE(b.description, '')), 'C')
+        FROM books b
+        {where}
+        ON CONFLICT (book_id) DO UPDATE SET document = EXCLUDED.document
+    """
+
+
+def unindex_books(session: Session, book_ids: Sequence[int]) -> None:
+    """
+    Remove books from the search index. No-op without a search backend.
+    """
+    kind = backend(session)
+    if kind is None or not book_ids:
+        return
+    sql = (
+        "DELETE FROM books_fts WHERE rowid IN :ids"
+        if kind == "sqlite"
+        else "DELETE FROM book_search WHERE book_id IN :ids"
+    )
+    session.execute(
+        text(sql).bindparams(bindparam("ids", expanding=True)),
+        {"ids": list(book_ids)},
+    )
+
+
+def index_books(session: Session, book_ids: Sequence[int]) -> None:
+    """
+    (Re)index the given books from their current rows. Call after flush().
+    """
+    kind = backend(session)
+    if kind is None or not book_ids:
+        return
+    if kind == "sqlite":
+        # FTS5 has no upsert; replace rows explicitly.
+        unindex_books(session, book_ids)
+    session.execute(
+        text(_populate_sql(kind, "WHERE b.id IN :ids")).bindparams(
+            bindparam("ids", expanding=True)
+        ),
+        {"ids": list(book_ids)},
+    )
+
+
+def rebuild_search_index(session: Session) -> int:
+    """
+    Drop and repopulate the whole index. Returns the number of indexed books.
+    """
+    kind = backend(session)
+    if kind is None:
+        return 0
+    create_search_index(session.connection())
+    session.execute(text("DELETE FROM books_fts" if kind == "sqlite" else "DELETE FROM book_search"))
+    session.execute(text(_populate_sql(kind, "")))
+    if kind == "sqlite":
+        session.execute(text("INSERT INTO books_fts (books_fts) VALUES ('optimize')"))
+        return int(session.scalar(text("SELECT count(*) FROM books_fts")) or 0)
+    return int(session.scalar(text("SELECT count(*) FROM book_search")) or 0)
+
+
+# ---------------------------------------------------------------------------
+# Query
+# ---------------------------------------------------------------------------
+
+def match_subquery(session: Session, q: Optional[str]):
+    """
+    Subquery of (book_id, rank) for books matching every word of q as a prefix.
+    Lower rank is better. Returns None when q has no words or there is no backend.
+    """
+    kind = backend(session)
+    tokens = _TOKEN.findall((q or "").lower())
+    if kind is None or not tokens:
+        return None
+
+    if kind == "sqlite":
+        match = " ".join(f'"{t}"*' for t in tokens)
+        stmt = text(
+            f"SELECT rowid AS book_id, {_SQLITE_BM25} AS rank "
+            "FROM books_fts WHERE books_fts MATCH :match"
+        )
+    else:
+        match = " & ".join(f"{t}:*" for t in tokens)
+        stmt = text(
+            # float8: ts_rank is float4, but cursors carry the rank back as a
+            # Python float; the keyset comparison must round-trip exactly.
+            "SELECT book_id, -CAST(ts_rank(document, query) AS double precision) AS rank "
+            "FROM book_search, to_tsquery('simple', :match) AS query "
+            "WHERE document @@ query"
+        )
+    return (
+        stmt.bindparams(match=match)
+        .columns(book_id=Integer, rank=Float)
+        .subquery("fts")
+    )
@@ -0,0 +1,329 @@
+"""
+=============================================================
+SQL instrumentation
+=============================================================
+Event hooks on the app's engines (db.ENGINES) that attribute every statement
+to the Streamlit rerun and view that issued it.
+
+- app.py opens a RenderTrace per rerun (begin_render/end_render) and wraps
+  the active view in section(name); statements outside any section count
+  under "app". Traces are per script thread, so sessions do not mix.
+- Fragments are decorated with traced(name): inside a full run they are a
+  section (all cards of a page share one, so per-card queries add up there);
+  a fragment-only rerun gets a RenderTrace of its own.
+- Per section: statements, total/max time and rows, grouped by statement
+  shape (SQL with literals and IN-lists collapsed). A shape run
+  REPEAT_THRESHOLD+ times in one section is flagged as a likely N+1.
+- Rows come from cursor.rowcount in after_cursor_execute (public hook, no
+  result wrapping). Drivers that do not report it for SELECTs (pysqlite)
+  leave those shapes' rows unknown (None); DML counts rows affected.
+- Statements slower than SLOW_MS are logged (logger "sql_trace", shape and
+  time only, never parameters) and kept in the trace.
+- Statements with no open trace (e.g. background threads) only feed the
+  process-wide untracked() counter and the slow log.
+- Finished traces serialize to dicts (to_dict) and JSON lines; with
+  SQL_TRACE_FILE set every render is appended to that file.
+
+Off unless SQL_TRACE=1; tabs/sql_debug.py renders the sidebar panel.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger("sql_trace")
+
+SLOW_MS = float(os.getenv("SQL_TRACE_SLOW_MS", "100"))
+REPEAT_THRESHOLD = int(os.getenv("SQL_TRACE_REPEAT", "5"))
+TRACE_FILE = os.getenv("SQL_TRACE_FILE", "")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+|\?")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def enabled() -> bool:
+    return os.getenv("SQL_TRACE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def statement_shape(sql: str) -> str:
+    """SQL with literals/placeholders as ? and IN-lists as (?...)."""
+    s = _STRING.sub("?", sql)
+    s = _PARAM.sub("?", s)
+    s = _NUMBER.sub("?", s)
+    s = _LIST.sub("(?...)", s)
+    return _SPACE.sub(" ", s).strip()
+
+
+# ---------------------------------------------------------------------------
+# Trace model
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ShapeStats:
+    shape: str
+    count: int = 0
+    ms: float = 0.0
+    max_ms: float = 0.0
+    rows: Optional[int] = None  # None: the driver never reported a row count
+
+
+def _add(total: Optional[int], n: int) -> int:
+    return n if total is None else total + n
+
+
+@dataclass
+class SectionStats:
+    name: str
+    statements: int = 0
+    ms: float = 0.0
+    rows: Optional[int] = None
+    shapes: Dict[str, ShapeStats] = field(default_factory=dict)
+
+    def add_rows(self, shape: ShapeStats, n: int) -> None:
+        shape.rows = _add(shape.rows, n)
+        self.rows = _add(self.rows, n)
+
+
+class RenderTrace:
+    """Statements issued during one rerun, by section and shape."""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.started = time.time()
+        self.wall_ms = 0.0
+        self.sections: Dict[str, SectionStats] = {}
+        self.slow: List[Dict[str, Any]] = []
+        self._stack = ["app"]
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+
+    def record(self, shape: str, ms: float):
+        sec = self.sections.get(self._stack[-1])
+        if sec is None:
+            sec = self.sections[self._stack[-1]] = SectionStats(self._stack[-1])
+        st = sec.shapes.get(shape)
+        if st is None:
+            st = sec.shapes[shape] = ShapeStats(shape)
+        st.count += 1
+        st.ms += ms
+        st.max_ms = max(st.max_ms, ms)
+        sec.statements += 1
+        sec.ms += ms
+        if ms >= SLOW_MS:
+            self.slow.append({"section": sec.name, "shape": shape, "ms": round(ms, 2)})
+        return sec, st
+
+    @property
+    def statements(self) -> int:
+        return sum(s.statements for s in self.sections.values())
+
+    @property
+    def ms(self) -> float:
+        return sum(s.ms for s in self.sections.values())
+
+    @property
+    def rows(self) -> Optional[int]:
+        known = [s.rows for s in self.sections.values() if s.rows is not None]
+        return sum(known) if known else None
+
+    def repeated(self, threshold: int = REPEAT_THRESHOLD) -> List[Dict[str, Any]]:
+        """Shapes run `threshold`+ times within one section (likely N+1)."""
+        return [
+            {"section": sec.name, "shape": st.shape, "count": st.count, "ms": round(st.ms, 2)}
+            for sec in self.sections.values()
+            for st in sec.shapes.values()
+            if st.count >= threshold
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "label": self.label,
+            "wall_ms": round(self.wall_ms, 2),
+            "statements": self.statements,
+            "sql_ms": round(self.ms, 2),
+            "rows": self.rows,
+            "sections": {
+                sec.name: {
+                    "statements": sec.statements,
+                    "sql_ms": round(sec.ms, 2),
+                    "rows": sec.rows,
+                    "shapes": [
+                        {
+                            "shape": st.shape,
+                            "count": st.count,
+                            "ms": round(st.ms, 2),
+                            "max_ms": round(st.max_ms, 2),
+                            "rows": st.rows,
+                        }
+                        for st in sorted(sec.shapes.values(), key=lambda x: -x.ms)
+                    ],
+                }
+                for sec in self.sections.values()
+            },
+            "repeated": self.repeated(),
+            "slow": self.slow,
+        }
+
+
+def to_jsonl(traces: Iterable[RenderTrace]) -> str:
+    return "".join(json.dumps(t.to_dict()) + "\n" for t in traces)
+
+
+# ---------------------------------------------------------------------------
+# Current trace (per script thread)
+# ---------------------------------------------------------------------------
+
+_local = threading.local()
+_lock = threading.Lock()
+_untracked = {"statements": 0, "ms": 0.0}
+_slow_log: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+
+def begin_render(label: str = "") -> RenderTrace:
+    """Start collecting for this thread's rerun (replaces an unfinished one)."""
+    _local.trace = RenderTrace(label)
+    return _local.trace
+
+
+def current() -> Optional[RenderTrace]:
+    return getattr(_local, "trace", None)
+
+
+def end_render() -> Optional[RenderTrace]:
+    """Close the thread's trace, append it to SQL_TRACE_FILE, and return it."""
+    trace = current()
+    _local.trace = None
+    if trace is None:
+        return None
+    trace.wall_ms = 1000 * (time.perf_counter() - trace._t0)
+    for r in trace.repeated():
+        log.info("repeated statement (%dx in %s): %s", r["count"], r["section"], r["shape"])
+    if TRACE_FILE:
+        with _lock, open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(trace.to_dict()) + "\n")
+    return trace
+
+
+@contextmanager
+def section(name: str) -> Iterator[None]:
+    """Attribute statements to `name` (e.g. the active view); no-op untraced."""
+    trace = current()
+    if trace is None:
+        yield
+        return
+    with trace.section(name):
+        yield
+
+
+def traced(name: str, on_finish: Optional[Callable[[RenderTrace], None]] = None):
+    """
+    Decorator for st.fragment functions. Within a traced run it is
+    section(name); a fragment-only rerun gets its own trace (label
+    "fragment:<name>"), closed afterwards and passed to on_finish.
+    No-op unless enabled().
+    """
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return fn(*args, **kwargs)
+            if current() is not None:
+                with section(name):
+                    return fn(*args, **kwargs)
+            begin_render(f"fragment:{name}")
+            try:
+                with section(name):
+                    return fn(*args, **kwargs)
+            finally:
+                trace = end_render()
+                if on_finish is not None and trace is not None:
+                    on_finish(trace)
+        return wrapper
+    return decorate
+
+
+def untracked() -> Dict[str, Any]:
+    with _lock:
+        return dict(_untracked)
+
+
+def slow_log() -> List[Dict[str, Any]]:
+    with _lock:
+        return list(_slow_log)
+
+
+# ---------------------------------------------------------------------------
+# Engine hooks
+# ---------------------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("sql_trace_t0", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get("sql_trace_t0")
+    if not stack:
+        return
+    ms = 1000 * (time.perf_counter() - stack.pop())
+    shape = statement_shape(statement)
+    if ms >= SLOW_MS:
+        log.warning("slow query %.1f ms: %s", ms, shape)
+        with _lock:
+            _slow_log.append({"ts": time.time(), "ms": round(ms, 2), "shape": shape})
+    trace = current()
+    if trace is None:
+        with _lock:
+            _untracked["statements"] += 1
+            _untracked["ms"] += ms
+        return
+    sec, st = trace.record(shape, ms)
+    # DBAPI rowcount: rows affected by DML; rows returned by a SELECT where
+    # the driver knows it up front (psycopg), else -1 (pysqlite).
+    rowcount = getattr(cursor, "rowcount", -1)
+    if rowcount is not None and rowcount >= 0:
+        sec.add_rows(st, rowcount)
+
+
+def _handle_error(ctx):
+    conn = ctx.connection
+    if conn is not None and conn.info.get("sql_trace_t0"):
+        conn.info["sql_trace_t0"].pop()
+
+
+def install(*engines: Engine) -> None:
+    """Attach the hooks once per engine (defaults to db.ENGINES)."""
+    if not engines:
+        from db import ENGINES
+        engines = ENGINES
+    with _lock:
+        for engine in engines:
+            if engine.__dict__.get("_sql_trace_installed"):
+                continue
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(engine, "handle_error", _handle_error)
+            engine.__dict__["_sql_trace_installed"] = True
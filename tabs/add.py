@@ -4,9 +4,20 @@ from typing import Any, Dict, List, Optional, Sequence
 
 import streamlit as st
 
-from db import get_session
-from dal import create_book, create_book_from_api
-from harvesters.openlibrary_client import search_title, build_payload_from_title_hit
+from cover_cache import cover_src
+from db import get_read_session, get_session
+from dal import (
+    create_book,
+    create_book_from_api,
+    create_books_from_api_bulk,
+    existing_external_ids,
+)
+from harvesters.openlibrary_client import (
+    build_payload_from_title_hit,
+    build_payloads_for_hits,
+    prefetch_dims,
+    search_title,
+)
 
 
 # Cache the lightweight search call for snappy UX
@@ -27,6 +38,36 @@ def _normalize_int(v: Any) -> Optional[int]:
         return None
 
 
+def _set_hits(hits: List[Dict[str, Any]]) -> None:
+    """
+    Store new search hits, mark the ones already in the library (one batched
+    query), and start prefetching edition dims for the rest in the background.
+    The previous search's pending prefetches are cancelled.
+    """
+    previous = st.session_state.pop("ol_prefetch", None)
+    if previous is not None:
+        previous.cancel()
+
+    st.session_state["ol_hits"] = hits
+    keys = [h.get("external_id") for h in hits]
+    try:
+        with get_read_session() as s:
+            in_library = existing_external_ids(s, keys)
+    except Exception:
+        in_library = set()
+    st.session_state["ol_in_library"] = in_library
+    st.session_state["ol_prefetch"] = prefetch_dims(
+        [k for k in keys if k and k not in in_library]
+    )
+
+
+def _mark_in_library(external_ids: Sequence[Optional[str]]) -> None:
+    """Hide Select/Add on hits that were just added (until the next search)."""
+    in_library = set(st.session_state.get("ol_in_library", set()))
+    in_library.update(k for k in external_ids if k)
+    st.session_state["ol_in_library"] = in_library
+
+
 def render_add_tab() -> None:
     st.subheader("Add a new book")
 
@@ -41,22 +82,27 @@ def render_add_tab() -> None:
             if q_s:
                 with st.spinner("Searching Open Library..."):
                     try:
-                        st.session_state["ol_hits"] = cached_search_title(q_s, limit=9) or []
+                        _set_hits(cached_search_title(q_s, limit=9) or [])
                     except Exception as e:
-                        st.session_state["ol_hits"] = []
+                        _set_hits([])
                         st.error(f"Search failed: {e}")
             else:
-                st.session_state["ol_hits"] = []
+                _set_hits([])
                 st.warning("Enter a title to search.")
 
+    # Results of the last Add / Add selected (shown after their rerun)
+    for kind, msg in st.session_state.pop("ol_flash", []):
+        getattr(st, kind)(msg)
+
     hits: Sequence[Dict[str, Any]] = st.session_state.get("ol_hits", []) or []
+    in_library = st.session_state.get("ol_in_library", set())
     if hits:
         cols = st.columns(3)
         for i, h in enumerate(hits):
             with cols[i % 3]:
                 cover = h.get("cover_url")
                 if cover:
-                    st.image(cover, use_container_width=True)
+                    st.image(cover_src(cover), use_container_width=True)
                 st.write(f"**{h.get('title','(no title)')}**")
                 authors = h.get("authors") or []
                 if authors:
@@ -64,7 +110,13 @@ def render_add_tab() -> None:
                 year = h.get("year")
                 st.caption(f"Year: {year or '—'}")
 
+                # Already in the library: no need to hit the network at all
+                if h.get("external_id") in in_library:
+                    st.caption("✓ Already in your library")
+                    continue
+
                 # Use external_id to make the key stable across pages
+                st.checkbox("Select", key=f"ol_sel_{h.get('external_id', i)}")
                 add_key = f"ol_add_{h.get('external_id', i)}"
                 if st.button("Add", key=add_key, use_container_width=True):
                     try:
@@ -72,12 +124,64 @@ def render_add_tab() -> None:
                             payload = build_payload_from_title_hit(h)  # includes dims/pages when available
                             with get_session() as s:
                                 book, created = create_book_from_api(s, payload)
-                        st.success(("Added" if created else "Already in library") + f": {payload.get('title') or '(no title)'}")
+                                external_id = book.external_id
+                        _mark_in_library([external_id or h.get("external_id")])
+                        st.session_state["ol_flash"] = [(
+                            "success",
+                            ("Added" if created else "Already in library") + f": {payload.get('title') or '(no title)'}",
+                        )]
                         st.rerun()
                     except Exception as e:
                         st.error(f"Add failed: {e}")
                         st.exception(e)  # full traceback for debugging
 
+        # --- Add all selected hits: editions fetched concurrently, one commit ---
+        selected = [
+            h for i, h in enumerate(hits)
+            if h.get("external_id") not in in_library
+            and st.session_state.get(f"ol_sel_{h.get('external_id', i)}")
+        ]
+        if st.button(
+            f"Add selected ({len(selected)})",
+            disabled=not selected,
+            use_container_width=True,
+        ):
+            with st.spinner(f"Fetching edition details for {len(selected)} books…"):
+                results = build_payloads_for_hits(selected)
+            ok = [r for r in results if r.payload]
+            fetch_errors = [
+                ("error", f"{r.hit.get('title') or '(no title)'}: {r.error}")
+                for r in results
+                if r.error
+            ]
+            for _, msg in fetch_errors:
+                st.error(msg)
+            if ok:
+                try:
+                    with get_session() as s:
+                        saved = create_books_from_api_bulk(
+                            s, [r.payload for r in ok], chunk_size=len(ok)
+                        )
+                    stored = [x for x in saved if x.book_id is not None]
+                    rejected = [x for x in saved if x.book_id is None]
+                    n_new = sum(1 for x in stored if x.created)
+                    summary = f"Added {n_new} book(s); {len(stored) - n_new} already in library"
+                    if rejected:
+                        summary += f"; {len(rejected)} rejected"
+                    flash = [("success", summary + "."), *fetch_errors]
+                    flash += [
+                        ("error", f"{ok[x.index].hit.get('title') or '(no title)'}: {x.error}")
+                        for x in rejected
+                    ]
+                    _mark_in_library([ok[x.index].payload.get("external_id") for x in stored])
+                    for i, h in enumerate(hits):
+                        st.session_state.pop(f"ol_sel_{h.get('external_id', i)}", None)
+                    st.session_state["ol_flash"] = flash
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Add failed: {e}")
+                    st.exception(e)
+
     st.divider()
 
     # --- B) Manual form ---
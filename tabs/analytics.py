@@ -3,56 +3,97 @@ from __future__ import annotations
 
 import pandas as pd
 import plotly.express as px
+import pyarrow as pa
 import streamlit as st
 from sqlalchemy import text
 
-from db import get_session
-from dal import top_chonkers_sql, shelf_space_by_user_treemap_sql
+from arrow_io import read_arrow_table, to_pandas
+from db import get_read_session, read_engine
+from dal import table_versions, top_chonkers_sql, shelf_space_by_user_treemap_sql
 
 
 # ----------------------------
 # Cached data loaders
+# - Each loader takes the versions of the tables it reads (dal.table_versions);
+#   DAL writes bump them, so only loaders touching a written table recompute.
+# - Results are read in chunks into typed pyarrow Tables (arrow_io) and cached
+#   with st.cache_resource: every session shares the same immutable table
+#   instead of unpickling a private DataFrame copy on each hit.
 # ----------------------------
-@st.cache_data(show_spinner=False, ttl=60)
-def _load_top_chonkers_df() -> pd.DataFrame:
-    with get_session() as s:
-        df = pd.read_sql(top_chonkers_sql(), s.bind)
-    # Ensure numeric dtype
-    if "volume_cm3" in df.columns:
-        df["volume_cm3"] = pd.to_numeric(df["volume_cm3"], errors="coerce")
-    return df
-
-
-@st.cache_data(show_spinner=False, ttl=60)
-def _load_shelf_space_df() -> pd.DataFrame:
-    with get_session() as s:
-        df = pd.read_sql(shelf_space_by_user_treemap_sql(), s.bind)
-    for col in ("volume_cm3",):
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    return df
-
-
-@st.cache_data(show_spinner=False, ttl=60)
-def _load_recent_books_df(limit: int = 8) -> pd.DataFrame:
-    with get_session() as s:
-        df = pd.read_sql(
-            text(
-                f"""
-                SELECT id, title, year, height_cm, width_cm, thickness_cm, pages,
-                       CASE
-                         WHEN height_cm IS NOT NULL AND width_cm IS NOT NULL AND thickness_cm IS NOT NULL
-                         THEN (height_cm*width_cm*thickness_cm)/1000.0
-                       END AS volume_cm3
-                FROM books
-                ORDER BY id DESC
-                LIMIT :limit
-                """
-            ),
-            s.bind,
-            params={"limit": int(limit)},
-        )
-    return df
+TOP_CHONKERS_SCHEMA = pa.schema(
+    [("id", pa.int64()), ("title", pa.string()), ("volume_cm3", pa.float64())]
+)
+SHELF_SPACE_SCHEMA = pa.schema(
+    [
+        ("username", pa.string()),
+        ("book_id", pa.int64()),
+        ("title", pa.string()),
+        ("volume_cm3", pa.float64()),
+        ("n_books", pa.int64()),
+        ("n_users", pa.int64()),
+    ]
+)
+RECENT_BOOKS_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("title", pa.string()),
+        ("year", pa.int32()),
+        ("height_cm", pa.int32()),
+        ("width_cm", pa.int32()),
+        ("thickness_cm", pa.int32()),
+        ("pages", pa.int32()),
+        ("volume_cm3", pa.float64()),
+    ]
+)
+
+# Treemap size bound: TREEMAP_TOP_N books per user + an "Other" tile each,
+# for the TREEMAP_MAX_USERS users with the most shelf space + one "Other users".
+TREEMAP_TOP_N = 10
+TREEMAP_MAX_USERS = 50
+
+
+@st.cache_resource(show_spinner=False, ttl=600, max_entries=4)
+def _top_chonkers_table(books_v: int) -> pa.Table:
+    return read_arrow_table(read_engine, top_chonkers_sql(), TOP_CHONKERS_SCHEMA)
+
+
+@st.cache_resource(show_spinner=False, ttl=600, max_entries=4)
+def _shelf_space_table(books_v: int, reviews_v: int) -> pa.Table:
+    return read_arrow_table(
+        read_engine,
+        shelf_space_by_user_treemap_sql(TREEMAP_TOP_N, TREEMAP_MAX_USERS),
+        SHELF_SPACE_SCHEMA,
+    )
+
+
+@st.cache_resource(show_spinner=False, ttl=600, max_entries=4)
+def _recent_books_table(books_v: int, limit: int = 8) -> pa.Table:
+    return read_arrow_table(
+        read_engine,
+        text(
+            """
+            SELECT id, title, year, height_cm, width_cm, thickness_cm, pages,
+                   volume_cm3
+            FROM books
+            ORDER BY id DESC
+            LIMIT :limit
+            """
+        ),
+        RECENT_BOOKS_SCHEMA,
+        params={"limit": int(limit)},
+    )
+
+
+def _load_top_chonkers_df(books_v: int) -> pd.DataFrame:
+    return to_pandas(_top_chonkers_table(books_v))
+
+
+def _load_shelf_space_df(books_v: int, reviews_v: int) -> pd.DataFrame:
+    return to_pandas(_shelf_space_table(books_v, reviews_v))
+
+
+def _load_recent_books_df(books_v: int, limit: int = 8) -> pd.DataFrame:
+    return to_pandas(_recent_books_table(books_v, limit))
 
 
 # ----------------------------
@@ -61,9 +102,12 @@ def _load_recent_books_df(limit: int = 8) -> pd.DataFrame:
 def render_analytics_tab() -> None:
     st.subheader("Analytics")
 
+    with get_read_session() as s:
+        books_v, reviews_v = table_versions(s, "books", "reviews")
+
     # ---- Top Chonkers (largest by volume)
     st.markdown("### Top Chonkers (by volume)")
-    df1 = _load_top_chonkers_df()
+    df1 = _load_top_chonkers_df(books_v)
     if df1.empty or df1["volume_cm3"].fillna(0).le(0).all():
         st.caption("Add height, width, and thickness to some books to see this chart.")
     else:
@@ -83,7 +127,7 @@ def render_analytics_tab() -> None:
 
     # ---- Shelf space per user (treemap)
     st.markdown("### Shelf Space per User (only for reviewed books)")
-    df3 = _load_shelf_space_df()
+    df3 = _load_shelf_space_df(books_v, reviews_v)
 
     if df3.empty or df3["volume_cm3"].isna().all() or df3["volume_cm3"].fillna(0).le(0).all():
         st.caption("No volumes to plot yet. Add dimensions and at least one review per user.")
@@ -97,16 +141,17 @@ def render_analytics_tab() -> None:
         fig.update_layout(margin=dict(t=30, l=0, r=0, b=0))
         st.plotly_chart(fig, use_container_width=True)
 
-        # Quick totals
+        # Quick totals (bucket rows stand for several books/users)
         total_liters = (df3["volume_cm3"].fillna(0).sum() / 1000.0)
+        n_users = int(df3.groupby("username")["n_users"].max().sum())
         st.caption(
-            f"Users: {df3['username'].nunique()} • "
-            f"Books (tiles): {len(df3)} • "
+            f"Users: {n_users} • "
+            f"Books: {int(df3['n_books'].sum())} ({len(df3)} tiles) • "
             f"Total volume: {total_liters:.1f} L"
         )
 
     # ---- Optional debug table
     with st.expander("Recently added (debug)", expanded=False):
-        df_recent = _load_recent_books_df(limit=8)
+        df_recent = _load_recent_books_df(books_v, limit=8)
         st.dataframe(df_recent, use_container_width=True)
 
@@ -2,249 +2,396 @@
 Browse tab for the Streamlit app.
 
 Notes:
-- Intentionally avoids caching so edits/reviews reflect immediately after actions.
-- Keeps DAL calls exactly as in the original (no behavioral changes).
-- Uses 3-column card grid with inline editors for reviews and dimensions.
+- Pages and rating summaries come from the shared page cache (page_cache.py),
+  keyed on table versions, so edits/reviews still reflect immediately after
+  actions; the current user's own reviews are always read live.
+- Pages with keyset cursors (see dal.list_books) kept in session state.
+- Uses 3-column card grid with inline editors for reviews and dimensions;
+  each card is a fragment, so its edits rerun only that card.
 """
 
 import math
+from typing import Optional
+
 import streamlit as st
-from db import get_session
+from cover_cache import cover_src
+from db import get_read_session, get_session
 from dal import (
-    list_books,
+    SORT_MODES,
+    count_books,
+    table_versions,
     update_book_dimensions,
     PAGE_SIZE,
     delete_book,
     upsert_review,
-    get_user_review,
+    get_user_reviews_for_books,
     delete_user_review,
     rating_summary_for_books,
 )
+from page_cache import BookRow, cached_list_books, cached_rating_summaries
+from tabs.sql_debug import trace_fragment
 import urllib.parse
 
 
+@st.cache_data(show_spinner=False, ttl=600)
+def _cached_total(q: str, sort: str, versions: tuple) -> int:
+    """
+    Total for the footer. `versions` are the table versions the count reads;
+    a write to those tables changes the key, anything else reuses the entry.
+    """
+    with get_read_session() as s:
+        return count_books(s, q=q or None, sort=sort)
+
+
+def _goto(cursor, step):
+    """Button callback: move the keyset cursor and the displayed page number."""
+    st.session_state["browse_cursor"] = cursor
+    st.session_state["browse_page_no"] = (
+        st.session_state.get("browse_page_no", 1) + step if cursor else 1
+    )
+
+
+# ----------------------------------------------------------------------
+# Card actions (button callbacks)
+# - Run before the card fragment reruns; they record fresh values in
+#   browse_cards[book_id], which the card prefers over the page-level data
+#   until the next full run reloads the page
+# ----------------------------------------------------------------------
+def _card_state(book_id: int) -> dict:
+    return st.session_state.setdefault("browse_cards", {}).setdefault(book_id, {})
+
+
+def _save_review(book_id: int) -> None:
+    state = _card_state(book_id)
+    rating = st.session_state[f"rate_{book_id}"]
+    text = st.session_state.get(f"rev_{book_id}") or None
+    try:
+        with get_session() as s:
+            upsert_review(s, st.session_state["user_id"], book_id, rating, text)
+            state["summary"] = rating_summary_for_books(s, [book_id]).get(book_id, (None, 0))
+        state["review"] = (rating, text)
+        state["flash"] = ("success", "Saved review!")
+    except Exception as e:
+        state["flash"] = ("error", f"Could not save review: {e}")
+
+
+def _delete_review(book_id: int) -> None:
+    state = _card_state(book_id)
+    try:
+        with get_session() as s:
+            delete_user_review(s, st.session_state["user_id"], book_id)
+            state["summary"] = rating_summary_for_books(s, [book_id]).get(book_id, (None, 0))
+        state["review"] = None
+        state["flash"] = ("success", "Deleted your review.")
+    except Exception as e:
+        state["flash"] = ("error", f"Delete failed: {e}")
+
+
+def _save_dims(book_id: int) -> None:
+    state = _card_state(book_id)
+    try:
+        with get_session() as s:
+            book = update_book_dimensions(
+                s,
+                book_id,
+                height_cm=st.session_state[f"h_{book_id}"] or None,
+                width_cm=st.session_state[f"w_{book_id}"] or None,
+                thickness_cm=st.session_state[f"t_{book_id}"] or None,
+                pages=st.session_state[f"p_{book_id}"] or None,
+                format=st.session_state[f"fmt_{book_id}"] or None,
+            )
+            if book is None:
+                state["deleted"] = True
+                return
+            s.refresh(book)  # picks up the generated volume_cm3
+            state["book"] = BookRow.from_book(book)
+        state["flash"] = ("success", "Saved dimensions!")
+    except Exception as e:
+        state["flash"] = ("error", f"Could not save dimensions: {e}")
+
+
+def _delete_book(book_id: int) -> None:
+    state = _card_state(book_id)
+    try:
+        with get_session() as s:
+            delete_book(s, book_id)
+        state["deleted"] = True
+    except Exception as e:
+        state["flash"] = ("error", f"Delete failed: {e}")
+
+
+@st.fragment
+@trace_fragment("card")
+def _book_card(b: BookRow, summary: tuple, review: Optional[tuple]) -> None:
+    """
+    One catalog card. Runs as a fragment: its widgets and actions (save
+    review, save dims, delete) rerun only this card, not the page.
+    """
+    state = _card_state(b.id)
+    if state.get("deleted"):
+        st.caption(f"🗑️ Deleted: {b.title}")
+        return
+    b = state.get("book", b)
+    avg, n = state.get("summary", summary)
+    review = state.get("review", review)
+    if "flash" in state:
+        kind, msg = state.pop("flash")
+        getattr(st, kind)(msg)
+
+    # ----------------------------------------------------------
+    # Cover image (if available)
+    # - Local thumbnail from cover_cache; remote image until it is ready
+    # ----------------------------------------------------------
+    if b.cover_url:
+        st.image(cover_src(b.cover_url), use_container_width=True, caption=b.title)
+
+    # ----------------------------------------------------------
+    # Title link
+    # - If external_id is set, link to Open Library (books path)
+    # - Otherwise, fallback to a Google search for the title
+    # ----------------------------------------------------------
+    if b.external_id:
+        # external_id usually looks like "/books/OL123M" or "/works/OL123W"
+        olid = b.external_id.split("/")[-1]
+        ol_url = f"https://openlibrary.org/books/{olid}"
+        st.markdown(f"### [{b.title}]({ol_url})")
+    else:
+        query = urllib.parse.quote_plus(b.title)
+        gb_url = f"https://www.google.com/search?q={query}"
+        st.markdown(f"### [{b.title}]({gb_url})")
+
+    # Authors list (or placeholder)
+    st.caption(", ".join(b.authors) or "Unknown author")
+
+    # ----------------------------------------------------------
+    # Small rating badge under title (avg + count)
+    # ----------------------------------------------------------
+    if avg is not None:
+        st.caption(f"⭐ {avg:.1f} ({n})")
+    else:
+        st.caption("No ratings yet")
+
+    # ----------------------------------------------------------
+    # Review editor (inline)
+    # - Prefill with the current user's existing review (if any)
+    # - Save or delete reruns this card with the new values
+    # ----------------------------------------------------------
+    with st.expander("⭐ Rate / Review"):
+        default_rating, default_text = review if review else (4, "")
+
+        st.slider(
+            f"Your rating for {b.title}",
+            1,
+            5,
+            default_rating,
+            key=f"rate_{b.id}",
+        )
+        st.text_area(
+            "Review (optional)",
+            value=default_text or "",
+            key=f"rev_{b.id}",
+        )
+
+        c1, c2 = st.columns([1, 1])
+
+        # Save review (upsert)
+        c1.button(
+            "Save review", key=f"save_rev_{b.id}", on_click=_save_review, args=(b.id,)
+        )
+
+        # Optional: delete your own review (if present)
+        if review:
+            c2.button(
+                "Delete my review",
+                key=f"del_rev_{b.id}",
+                on_click=_delete_review,
+                args=(b.id,),
+            )
+
+    # ----------------------------------------------------------
+    # Dimensions editor
+    # - Allows editing of physical dimensions & pages
+    # - Displays computed volume when all dims are present
+    # ----------------------------------------------------------
+    with st.expander("Dimensions / Edit"):
+        c1, c2, c3 = st.columns(3)
+        height = c1.number_input(
+            f"Height cm (#{b.id})",
+            min_value=0,
+            value=b.height_cm or 0,
+            step=1,
+            key=f"h_{b.id}",
+        )
+        width = c2.number_input(
+            f"Width cm (#{b.id})",
+            min_value=0,
+            value=b.width_cm or 0,
+            step=1,
+            key=f"w_{b.id}",
+        )
+        thick = c3.number_input(
+            f"Thickness cm (#{b.id})",
+            min_value=0,
+            value=b.thickness_cm or 0,
+            step=1,
+            key=f"t_{b.id}",
+        )
+        c4, c5 = st.columns(2)
+        c4.number_input(
+            f"Pages (#{b.id})", min_value=0, value=b.pages or 0, step=1, key=f"p_{b.id}"
+        )
+        c5.selectbox(
+            f"Format (#{b.id})",
+            ["", "paperback", "hardcover", "ebook", "other"],
+            index=0
+            if not b.format
+            else ["", "paperback", "hardcover", "ebook", "other"].index(
+                b.format
+            ),
+            key=f"fmt_{b.id}",
+        )
+
+        # Persist dimension edits
+        st.button("Save dims", key=f"save_dims_{b.id}", on_click=_save_dims, args=(b.id,))
+
+        # Show stored volume (cm³); preview unsaved edits locally
+        edited = (height, width, thick) != (
+            b.height_cm or 0,
+            b.width_cm or 0,
+            b.thickness_cm or 0,
+        )
+        if not edited and b.volume_cm3 is not None:
+            st.write(f"**Volume:** {b.volume_cm3:.1f} cm³")
+        elif all([height, width, thick]):
+            vol = (height * width * thick) / 1000.0
+            st.write(f"**Volume:** {vol:.1f} cm³ (unsaved)")
+
+    # ----------------------------------------------------------
+    # 🗑️ Danger zone: Hard delete book (+ dependents)
+    # - Removes Book, Reviews, and Author links (no cascade in DB)
+    # - The card collapses to a note; the grid refills on the next full run
+    # ----------------------------------------------------------
+    with st.expander("🗑️ Danger zone"):
+        st.caption(
+            "This permanently removes the book, its reviews, and links "
+            "to authors."
+        )
+        col_del1, col_del2 = st.columns([1, 1])
+        confirm_key = f"confirm_del_{b.id}"
+        if col_del1.checkbox(
+            "I understand — delete this book", key=confirm_key
+        ):
+            col_del2.button(
+                "Delete permanently",
+                key=f"do_del_{b.id}",
+                on_click=_delete_book,
+                args=(b.id,),
+            )
+
+
 def render_browse_tab():
     """Render the library browsing UI: search, paginate, edit, and manage books."""
     st.subheader("Browse Library")
 
     # ------------------------------------------------------------------
-    # Search & Pagination controls
+    # Search & sort controls
+    # - Changing either restarts paging from the first page
     # ------------------------------------------------------------------
-    col1, col2 = st.columns(2)
+    col1, col2 = st.columns([3, 1])
     with col1:
-        # Simple case-insensitive title search (handled in DAL)
+        # Ranked full-text search over title/authors/description (handled in DAL)
         q = st.text_input(
-            "Search title", placeholder="e.g., The Pragmatic Programmer"
+            "Search title, author or description",
+            placeholder="e.g., The Pragmatic Programmer",
         )
     with col2:
-        # Page is 1-based; PAGE_SIZE defined in DAL
-        page = st.number_input("Page", min_value=1, step=1, value=1)
+        # volume/pages/year/rating are largest-first and only include books
+        # that have the value (e.g. volume needs all three dims)
+        sort_options = [m for m in SORT_MODES if q or m != "relevance"]
+        sort = st.selectbox(
+            "Sort by",
+            sort_options,
+            format_func=lambda m: {
+                "relevance": "Relevance",
+                "title": "Title (A–Z)",
+                "volume": "Biggest (volume)",
+                "pages": "Most pages",
+                "year": "Year (newest first)",
+                "rating": "Average rating",
+                "newest": "Recently added",
+            }[m],
+        )
+    if st.session_state.get("browse_filter") != (q, sort):
+        st.session_state["browse_filter"] = (q, sort)
+        st.session_state["browse_cursor"] = None
+        st.session_state["browse_page_no"] = 1
 
     # ------------------------------------------------------------------
     # Load current page of books + aggregated rating summaries
-    # - rating_summary_for_books returns {book_id: (avg, count)}
-    # - Avoids N+1 by aggregating for visible items
+    # - table_versions stamps the cache keys (one small query)
+    # - cached_list_books seeks to the stored cursor (no OFFSET scan) on a miss
+    # - cached_rating_summaries returns {book_id: (avg, count)}
+    # - get_user_reviews_for_books returns {book_id: Review} for this user
+    # - One session, fixed number of queries regardless of page size
     # ------------------------------------------------------------------
-    with get_session() as s:
-        books, total = list_books(s, q=q, page=page)
-        summaries = rating_summary_for_books(s, [b.id for b in books])
+    try:
+        with get_read_session() as s:
+            books_v, reviews_v = table_versions(s, "books", "reviews")
+            # Only the rating sort depends on reviews
+            versions = (books_v, reviews_v) if sort == "rating" else (books_v,)
+            page = cached_list_books(
+                s,
+                q=q,
+                sort=sort,
+                cursor=st.session_state.get("browse_cursor"),
+                versions=versions,
+            )
+            books = page.items
+            book_ids = [b.id for b in books]
+            summaries = cached_rating_summaries(s, book_ids, reviews_version=reviews_v)
+            my_reviews = get_user_reviews_for_books(
+                s, st.session_state["user_id"], book_ids
+            )
+    except ValueError:
+        # Stale/invalid cursor: start over from the first page
+        _goto(None, 0)
+        st.rerun()
 
+    total = _cached_total(q or "", sort, versions)
     st.caption(f"Total books: {total}")
     total_pages = max(1, math.ceil(total / PAGE_SIZE))
 
-    # 3-column grid for book cards
+    # 3-column grid for book cards (each card is a fragment, see _book_card)
+    # Per-card overrides from card actions are dropped: this run's page
+    # data is fresh.
+    st.session_state["browse_cards"] = {}
     cols = st.columns(3, gap="large")
-
     for i, b in enumerate(books):
         with cols[i % 3]:
-            # ----------------------------------------------------------
-            # Cover image (if available)
-            # ----------------------------------------------------------
-            if b.cover_url:
-                st.image(b.cover_url, use_container_width=True, caption=b.title)
-
-            # ----------------------------------------------------------
-            # Title link
-            # - If external_id is set, link to Open Library (books path)
-            # - Otherwise, fallback to a Google search for the title
-            # ----------------------------------------------------------
-            if b.external_id:
-                # external_id usually looks like "/books/OL123M" or "/works/OL123W"
-                olid = b.external_id.split("/")[-1]
-                ol_url = f"https://openlibrary.org/books/{olid}"
-                st.markdown(f"### [{b.title}]({ol_url})")
-            else:
-                query = urllib.parse.quote_plus(b.title)
-                gb_url = f"https://www.google.com/search?q={query}"
-                st.markdown(f"### [{b.title}]({gb_url})")
-
-            # Authors list (or placeholder)
-            st.caption(", ".join(a.name for a in b.authors) or "Unknown author")
-
-            # ----------------------------------------------------------
-            # Small rating badge under title (avg + count)
-            # ----------------------------------------------------------
-            avg, n = summaries.get(b.id, (None, 0))
-            if avg is not None:
-                st.caption(f"⭐ {avg:.1f} ({n})")
-            else:
-                st.caption("No ratings yet")
-
-            # ----------------------------------------------------------
-            # Review editor (inline)
-            # - Prefill with the current user's existing review (if any)
-            # - Save or delete triggers rerun to reflect state
-            # ----------------------------------------------------------
-            with st.expander("⭐ Rate / Review"):
-                with get_session() as s:
-                    existing = get_user_review(
-                        s, st.session_state["user_id"], b.id
-                    )
-
-                default_rating = existing.rating if existing else 4
-                default_text = existing.text if (existing and existing.text) else ""
-
-                rating = st.slider(
-                    f"Your rating for {b.title}",
-                    1,
-                    5,
-                    default_rating,
-                    key=f"rate_{b.id}",
-                )
-                text = st.text_area(
-                    "Review (optional)",
-                    value=default_text,
-                    key=f"rev_{b.id}",
-                )
-
-                c1, c2 = st.columns([1, 1])
-
-                # Save review (upsert)
-                if c1.button("Save review", key=f"save_rev_{b.id}"):
-                    try:
-                        with get_session() as s:
-                            upsert_review(
-                                s,
-                                st.session_state["user_id"],
-                                b.id,
-                                rating,
-                                text or None,
-                            )
-                        st.success("Saved review!")
-                    except Exception as e:
-                        st.error(f"Could not save review: {e}")
-                    # Rerun to refresh the card UI with latest values
-                    st.cache_data.clear()  # invalidate cached analytics/data loaders
-                    st.rerun()
-
-                # Optional: delete your own review (if present)
-                if existing and c2.button(
-                    "Delete my review", key=f"del_rev_{b.id}"
-                ):
-                    try:
-                        with get_session() as s:
-                            delete_user_review(
-                                s, st.session_state["user_id"], b.id
-                            )
-                        st.success("Deleted your review.")
-                    except Exception as e:
-                        st.error(f"Delete failed: {e}")
-                    st.cache_data.clear()  # invalidate cached analytics/data loaders
-                    st.rerun()
-
-            # ----------------------------------------------------------
-            # Dimensions editor
-            # - Allows editing of physical dimensions & pages
-            # - Displays computed volume when all dims are present
-            # ----------------------------------------------------------
-            with st.expander("Dimensions / Edit"):
-                c1, c2, c3 = st.columns(3)
-                height = c1.number_input(
-                    f"Height cm (#{b.id})",
-                    min_value=0,
-                    value=b.height_cm or 0,
-                    step=1,
-                )
-                width = c2.number_input(
-                    f"Width cm (#{b.id})",
-                    min_value=0,
-                    value=b.width_cm or 0,
-                    step=1,
-                )
-                thick = c3.number_input(
-                    f"Thickness cm (#{b.id})",
-                    min_value=0,
-                    value=b.thickness_cm or 0,
-                    step=1,
-                )
-                c4, c5 = st.columns(2)
-                pages = c4.number_input(
-                    f"Pages (#{b.id})", min_value=0, value=b.pages or 0, step=1
-                )
-                fmt = c5.selectbox(
-                    f"Format (#{b.id})",
-                    ["", "paperback", "hardcover", "ebook", "other"],
-                    index=0
-                    if not b.format
-                    else ["", "paperback", "hardcover", "ebook", "other"].index(
-                        b.format
-                    ),
-                )
-
-                # Persist dimension edits
-                if st.button("Save dims", key=f"save_dims_{b.id}"):
-                    with get_session() as s:
-                        update_book_dimensions(
-                            s,
-                            b.id,
-                            height_cm=height or None,
-                            width_cm=width or None,
-                            thickness_cm=thick or None,
-                            pages=pages or None,
-                            format=fmt or None,
-                        )
-                    st.success("Saved dimensions!")
-                    st.cache_data.clear()  # invalidate cached analytics/data loaders
-                    st.rerun()
-
-                # Show computed volume (cm³) when all dims are present
-                if all([height, width, thick]):
-                    vol = (height * width * thick) / 1000.0
-                    st.write(f"**Volume:** {vol:.1f} cm³")
-
-            # ----------------------------------------------------------
-            # 🗑️ Danger zone: Hard delete book (+ dependents)
-            # - Removes Book, Reviews, and Author links (no cascade in DB)
-            # ----------------------------------------------------------
-            with st.expander("🗑️ Danger zone"):
-                st.caption(
-                    "This permanently removes the book, its reviews, and links "
-                    "to authors."
-                )
-                col_del1, col_del2 = st.columns([1, 1])
-                confirm_key = f"confirm_del_{b.id}"
-                if col_del1.checkbox(
-                    "I understand — delete this book", key=confirm_key
-                ):
-                    if col_del2.button(
-                        "Delete permanently", key=f"do_del_{b.id}"
-                    ):
-                        try:
-                            with get_session() as s:
-                                n = delete_book(s, b.id)
-                            if n:
-                                st.success(f"Deleted: {b.title}")
-                            else:
-                                st.warning(
-                                    "Nothing deleted (book may already be gone)."
-                                )
-                        except Exception as e:
-                            st.error(f"Delete failed: {e}")
-                        st.cache_data.clear()  # invalidate cached analytics/data loaders
-                        st.rerun()
-
+            existing = my_reviews.get(b.id)
+            _book_card(
+                b,
+                summaries.get(b.id, (None, 0)),
+                (existing.rating, existing.text) if existing else None,
+            )
     # ------------------------------------------------------------------
     # Pagination footer
+    # - Prev/Next carry keyset cursors; page number is display-only
     # ------------------------------------------------------------------
-    st.write(f"Page {page} / {total_pages}")
-
+    page_no = st.session_state.get("browse_page_no", 1)
+    c_prev, c_info, c_next = st.columns([1, 2, 1])
+    c_prev.button(
+        "← Prev",
+        disabled=page.prev_cursor is None,
+        on_click=_goto,
+        args=(page.prev_cursor, -1),
+        use_container_width=True,
+    )
+    c_info.write(f"Page {page_no} / {max(total_pages, page_no)}")
+    c_next.button(
+        "Next →",
+        disabled=page.next_cursor is None,
+        on_click=_goto,
+        args=(page.next_cursor, 1),
+        use_container_width=True,
+    )
@@ -2,42 +2,44 @@
 Reviews tab for the Streamlit app.
 
 Notes:
-- Behavior intentionally unchanged: same queries and UI flow.
-- Users pick a book, rate it, optionally add text, and save via DAL's upsert.
+- Users find a book by typing part of its title or author (book_index.py),
+  rate it, optionally add text, and save via DAL's upsert. The picker is a
+  fragment, so typing does not re-query the review list.
 - Recent reviews are shown below, newest first (as provided by DAL).
 """
 
 import streamlit as st
-from sqlalchemy import select
 
-from db import get_session
-from models import Book
+from book_index import TitleIndex
+from db import get_read_session, get_session
 from dal import upsert_review, list_user_reviews
+from tabs.sql_debug import trace_fragment
 
+PICKER_RESULTS = 20  # matches offered in the book picker
 
-def render_reviews_tab(current_username: str):
-    """Render the 'My Reviews' tab for the given display username."""
-    st.subheader(f"My Reviews — {current_username}")
 
-    # ------------------------------------------------------------------
-    # Quick selector for a book to review
-    # - Load all books alphabetically for the dropdown
-    # - If none exist, prompt the user to add some first
-    # ------------------------------------------------------------------
-    with get_session() as s:
-        books = (
-            s.execute(select(Book).order_by(Book.title.asc()))
-            .scalars()
-            .all()
-        )
-
-    book_map = {b.title: b.id for b in books}
-    if not book_map:
-        st.info("No books yet. Add some first in the Add tab.")
+@st.cache_resource(show_spinner=False)
+def _title_index() -> TitleIndex:
+    """One title index per process, shared by all sessions."""
+    return TitleIndex()
+
+
+@st.fragment
+@trace_fragment("review picker")
+def _review_picker(index: TitleIndex) -> None:
+    """
+    Search box, picker and review form. A fragment: typing and picking rerun
+    only this part; saving reruns the tab so the list below shows the review.
+    """
+    q = st.text_input("Find a book to review", placeholder="Start typing a title or author")
+    matches = index.search(q, k=PICKER_RESULTS)
+    if not matches:
+        st.caption("Type a few letters of a title or author." if not q.strip() else "No matching books.")
         return
+    labels = {m.book_id: f"{m.title} — {m.authors}" if m.authors else m.title for m in matches}
+    book_id = st.selectbox("Pick a book to review", list(labels), format_func=labels.get)
 
     # Inputs for creating/updating a review (one per user per book)
-    title = st.selectbox("Pick a book to review", list(book_map.keys()))
     rating = st.slider("Rating", 1, 5, 4)
     txt = st.text_area("Review (optional)")
 
@@ -47,13 +49,35 @@ def render_reviews_tab(current_username: str):
             upsert_review(
                 s,
                 st.session_state["user_id"],
-                book_map[title],
+                book_id,
                 rating,
                 txt or None,
             )
+        st.session_state["review_saved"] = True
+        st.rerun()
+
+
+def render_reviews_tab(current_username: str):
+    """Render the 'My Reviews' tab for the given display username."""
+    st.subheader(f"My Reviews — {current_username}")
+
+    # ------------------------------------------------------------------
+    # Type-ahead selector for a book to review
+    # - Matches come from the shared in-process title index, which syncs
+    #   itself from the book_changes log (one cheap query per rerun)
+    # - Options are book ids, so duplicate titles stay distinct
+    # ------------------------------------------------------------------
+    index = _title_index()
+    with get_read_session() as s:
+        index.sync(s)
+
+    if not len(index):
+        st.info("No books yet. Add some first in the Add tab.")
+        return
+
+    _review_picker(index)
+    if st.session_state.pop("review_saved", False):
         st.success("Saved review!")
-    
-    st.cache_data.clear()  # invalidate cached analytics/data loaders
 
     st.divider()
 
@@ -61,7 +85,7 @@ def render_reviews_tab(current_username: str):
     # Your recent reviews (as provided by DAL: newest first)
     # ------------------------------------------------------------------
     st.markdown("### Your recent reviews")
-    with get_session() as s:
+    with get_read_session() as s:
         rows = list_user_reviews(s, st.session_state["user_id"])
 
     if not rows:
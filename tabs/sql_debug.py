@@ -0,0 +1,102 @@
+# tabs/sql_debug.py
+from __future__ import annotations
+
+import pandas as pd
+import streamlit as st
+
+import sql_trace
+from page_cache import cache_stats
+
+HISTORY_KEY = "sql_trace_history"
+HISTORY_LIMIT = 50
+
+
+# ----------------------------
+# SQL debug sidebar (SQL_TRACE=1)
+# - Shows the trace of the rerun that just finished; the last HISTORY_LIMIT
+#   traces of this session are kept for the JSON lines download.
+# - Fragments are wrapped with trace_fragment(): within a full run they are a
+#   section of its trace; a fragment-only rerun (card, review picker) records
+#   a trace of its own into the same history. Button callbacks run before the
+#   fragment and still count as "untracked".
+# - Rows are n/a where the driver does not report SELECT row counts (SQLite).
+# - Page cache stats (hit ratio, latency, L1 bytes) sit next to it: a sizing
+#   aid for page_cache.py, not something end users need to see.
+# ----------------------------
+def _remember(trace: sql_trace.RenderTrace) -> None:
+    history = st.session_state.setdefault(HISTORY_KEY, [])
+    history.append(trace)
+    del history[:-HISTORY_LIMIT]
+
+
+def trace_fragment(name: str):
+    """Decorator for st.fragment functions (apply below @st.fragment)."""
+    return sql_trace.traced(name, on_finish=_remember)
+
+
+def render_sql_debug_sidebar(trace: sql_trace.RenderTrace | None) -> None:
+    history = st.session_state.setdefault(HISTORY_KEY, [])
+    if trace is not None:
+        _remember(trace)
+
+    with st.sidebar.expander("Page cache stats", expanded=False):
+        st.json(cache_stats())
+
+    with st.sidebar.expander("SQL trace", expanded=False):
+        if trace is None:
+            st.caption("No trace for this run.")
+            return
+
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Statements", trace.statements)
+        c2.metric("SQL ms", f"{trace.ms:.1f}")
+        c3.metric("Rows", "n/a" if trace.rows is None else trace.rows)
+        st.caption(f"{trace.label or 'render'} · {trace.wall_ms:.0f} ms wall")
+
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {"section": s.name, "statements": s.statements, "ms": round(s.ms, 1), "rows": s.rows}
+                    for s in trace.sections.values()
+                ]
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+        repeated = trace.repeated()
+        if repeated:
+            st.warning(f"{len(repeated)} statement shape(s) repeated ≥ {sql_trace.REPEAT_THRESHOLD}× (possible N+1)")
+            for r in repeated:
+                st.code(f"-- {r['count']}x in {r['section']}, {r['ms']:.1f} ms\n{r['shape']}", language="sql")
+
+        if trace.slow:
+            st.error(f"{len(trace.slow)} statement(s) over {sql_trace.SLOW_MS:.0f} ms")
+            for s in trace.slow:
+                st.code(f"-- {s['ms']:.1f} ms in {s['section']}\n{s['shape']}", language="sql")
+
+        shapes = [
+            {"section": sec.name, "count": st_.count, "ms": round(st_.ms, 2),
+             "max_ms": round(st_.max_ms, 2), "rows": st_.rows, "shape": st_.shape}
+            for sec in trace.sections.values()
+            for st_ in sec.shapes.values()
+        ]
+        if shapes:
+            st.dataframe(
+                pd.DataFrame(shapes).sort_values("ms", ascending=False),
+                hide_index=True,
+                use_container_width=True,
+            )
+
+        untracked = sql_trace.untracked()
+        st.caption(
+            f"Untracked (callbacks, background): {untracked['statements']} statements, "
+            f"{untracked['ms']:.0f} ms since process start"
+        )
+        st.download_button(
+            f"Export {len(history)} render(s) as JSON lines",
+            data=sql_trace.to_jsonl(history),
+            file_name="sql_trace.jsonl",
+            mime="application/x-ndjson",
+            use_container_width=True,
+        )
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schema import ensure_schema  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """A fresh SQLite file database with the app schema."""
+    eng = create_engine(f"sqlite:///{tmp_path / 'books.db'}")
+    ensure_schema(eng)
+    yield eng
+    eng.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as s:
+        yield s
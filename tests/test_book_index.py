@@ -0,0 +1,56 @@
+from sqlalchemy import event
+
+from book_index import TitleIndex
+from dal import create_book, delete_book, update_book_dimensions
+
+
+def _add(session, *titles):
+    ids = [create_book(session, title=t, authors=["Ada Lovelace"]).id for t in titles]
+    session.commit()
+    return ids
+
+
+def test_sync_picks_up_inserts_and_deletes(session):
+    ids = _add(session, "Shadow River", "Glass City", "Iron North")
+    index = TitleIndex()
+    index.sync(session)
+    assert [m.book_id for m in index.search("glass")] == [ids[1]]
+
+    delete_book(session, ids[0])
+    session.commit()
+    (new_id,) = _add(session, "Winter Garden")
+    index.sync(session)
+
+    assert index.search("shadow") == []
+    assert [m.book_id for m in index.search("winter")] == [new_id]
+    assert len(index) == 3
+
+
+def test_sync_after_newest_deleted_and_id_reused(session):
+    ids = _add(session, "Shadow River", "Glass City")
+    index = TitleIndex()
+    index.sync(session)
+
+    delete_book(session, ids[-1])
+    session.commit()
+    (new_id,) = _add(session, "Zebra Unicorn Manifesto")
+    assert new_id == ids[-1]  # SQLite reuses the highest freed rowid
+
+    index.sync(session)
+    assert [m.book_id for m in index.search("Zebra Unicorn")] == [new_id]
+    assert index.search("glass city") == []
+    assert index.get(new_id).title == "Zebra Unicorn Manifesto"
+
+
+def test_sync_ignores_writes_that_cannot_change_titles(session, engine):
+    ids = _add(session, "Shadow River", "Glass City")
+    index = TitleIndex()
+    index.sync(session)
+    update_book_dimensions(session, ids[0], height_cm=20, width_cm=13, thickness_cm=3)
+    session.commit()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    index.sync(session)
+    assert len(statements) == 1 and "book_changes" in statements[0]
+    assert not any("FROM books" in sql for sql in statements)
@@ -0,0 +1,60 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from cover_cache import CoverCache
+
+
+@pytest.fixture
+def server():
+    """/cover.jpg is an image; /away redirects to 127.0.0.1 (not allowed)."""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            requests_seen.append(self.path)
+            if self.path == "/away":
+                self.send_response(302)
+                self.send_header("Location", f"http://127.0.0.1:{self.server.server_address[1]}/cover.jpg")
+                self.end_headers()
+                return
+            body = b"\xff\xd8fake-jpeg"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://localhost:{srv.server_address[1]}", requests_seen
+    srv.shutdown()
+
+
+def test_allowed_hosts():
+    cache = CoverCache("unused", allowed_hosts=["covers.openlibrary.org", ".archive.org"])
+    assert cache.allowed("https://covers.openlibrary.org/b/id/1-L.jpg")
+    assert cache.allowed("https://ia800100.us.archive.org/x.jpg")
+    assert not cache.allowed("http://169.254.169.254/latest/meta-data/")
+    assert not cache.allowed("http://covers.openlibrary.org.evil.example/x.jpg")
+    assert not cache.allowed("file:///etc/passwd")
+
+
+def test_other_hosts_are_left_to_the_browser(tmp_path, server):
+    base, seen = server
+    cache = CoverCache(str(tmp_path), allowed_hosts=["covers.openlibrary.org"])
+    url = f"{base}/cover.jpg"
+    assert cache.src(url) == url
+    assert cache._inflight == {} and seen == []
+    assert cache.stats["passthrough"] == 1
+
+
+def test_redirect_to_a_disallowed_host_is_not_followed(tmp_path, server):
+    base, seen = server
+    cache = CoverCache(str(tmp_path), allowed_hosts=["localhost"])
+    assert cache.prefetch(f"{base}/away").result() is None
+    assert seen == ["/away"]
+    assert cache.stats["failed"] == 1
@@ -0,0 +1,66 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import harvesters.openlibrary_client as olc
+from harvesters.openlibrary_client import _HttpCache
+
+
+def test_http_cache_evicts_only_what_it_needs_and_counts_it(tmp_path):
+    cache = _HttpCache(str(tmp_path / "http.sqlite"), max_bytes=1000)
+    for i in range(10):
+        cache.put(f"k{i}", b"x" * 100, None, None)
+    cache.put("big", b"x" * 250, None, None)  # 1250 bytes: drop the 3 oldest
+
+    left = [k for (k,) in cache._db().execute("SELECT key FROM http_cache ORDER BY key")]
+    assert cache.counters["evictions"] == 3
+    assert sorted(left) == sorted(["big"] + [f"k{i}" for i in range(3, 10)])
+
+
+@pytest.fixture
+def editions_server(monkeypatch):
+    """Local editions.json: page 0 is gzip-encoded, any other offset is a 404."""
+    pages = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            offset = parse_qs(urlparse(self.path).query).get("offset", ["0"])[0]
+            body = pages.get(offset)
+            self.send_response(200 if body else 404)
+            if body:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body or b"")))
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(olc, "BASE", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(olc, "_cache", None)
+    yield pages
+    server.shutdown()
+
+
+def _page(n):
+    entries = [{"key": f"/books/OL{i}M", "title": "x" * 200} for i in range(n)]
+    return gzip.compress(json.dumps({"entries": entries}).encode())
+
+
+def test_scan_editions_failed_page_is_not_complete(editions_server):
+    editions_server["0"] = _page(2)
+    scan = olc.scan_editions("/works/OL1W", page_size=2, max_pages=3)
+    assert (scan.entries, scan.pages, scan.complete) == (2, 2, False)
+
+
+def test_scan_editions_counts_wire_bytes(editions_server):
+    editions_server["0"] = _page(3)
+    scan = olc.scan_editions("/works/OL1W", page_size=5)
+    assert (scan.entries, scan.pages, scan.complete) == (3, 1, True)
+    assert scan.bytes == len(editions_server["0"])
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from sqlalchemy import select
+
+from harvesters.openlibrary_dump import (
+    _best_per_work,
+    _parse_record,
+    import_dump,
+    load_checkpoint,
+)
+from models import Book
+
+
+def _line(type_, key, rec):
+    return f"{type_}\t{key}\t1\t2024-01-01T00:00:00\t{json.dumps(rec)}\n"
+
+
+def _edition(key, work, title, **extra):
+    return _line("/type/edition", key, dict(key=key, title=title, works=[{"key": work}], **extra))
+
+
+# Two editions of OL1W: the first has no dimensions, the second does.
+DUMP = [
+    _edition("/books/OL1M", "/works/OL1W", "River Song", publish_date="1999"),
+    _edition(
+        "/books/OL2M", "/works/OL1W", "River Song",
+        publish_date="2001", number_of_pages=320, physical_dimensions="24 x 16 x 3 centimeters",
+    ),
+    "not a dump line\n",
+    _line("/type/author", "/authors/OL1A", {"name": "Nobody"}),
+    _edition("/books/OL3M", "/works/OL2W", "Glass City", number_of_pages=200),
+    _line("/type/work", "/works/OL3W", {"key": "/works/OL3W", "title": "Iron North"}),
+    _edition("/books/OL4M", "/works/OL4W", "Winter Garden", publish_date="May 2010"),
+    _edition("/books/OL5M", "/works/OL5W", "Lost Empire"),
+]
+
+
+@pytest.fixture
+def dump(tmp_path):
+    path = tmp_path / "ol_dump_editions.txt"
+    path.write_text("".join(DUMP), encoding="utf-8")
+    return str(path)
+
+
+def test_parse_record():
+    p = _parse_record(DUMP[1].encode(), only_with_dims=False)
+    assert p["external_id"] == "/works/OL1W"
+    assert (p["year"], p["pages"]) == (2001, 320)
+    assert (p["height_cm"], p["width_cm"], p["thickness_cm"]) == (24, 16, 3)
+    assert _parse_record(DUMP[2].encode(), only_with_dims=False) is None
+    assert _parse_record(DUMP[3].encode(), only_with_dims=False) is None
+    assert _parse_record(DUMP[0].encode(), only_with_dims=True) is None
+
+
+def test_best_per_work_prefers_dimensions():
+    payloads = [_parse_record(line.encode(), False) for line in DUMP[:2] + DUMP[4:5]]
+    best = _best_per_work(payloads)
+    assert [p["external_id"] for p in best] == ["/works/OL1W", "/works/OL2W"]
+    assert best[0]["height_cm"] == 24
+
+
+def test_import_keeps_edition_with_dimensions(session, dump):
+    stats = import_dump(session, dump, workers=0, batch_size=4)
+    assert stats.lines == len(DUMP)
+    assert stats.created == 5
+    book = session.scalars(select(Book).where(Book.external_id == "/works/OL1W")).one()
+    assert (book.height_cm, book.pages, book.year) == (24, 320, 2001)
+
+
+def test_resume_from_checkpoint(session, dump, tmp_path):
+    checkpoint = str(tmp_path / "ckpt.json")
+
+    def _interrupt(stats):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        import_dump(session, dump, checkpoint_path=checkpoint, workers=0, batch_size=4, progress=_interrupt)
+    offset = load_checkpoint(checkpoint, dump)
+    assert offset == len("".join(DUMP[:4]).encode())
+    assert session.scalar(select(Book.id).where(Book.external_id == "/works/OL2W")) is None
+
+    stats = import_dump(session, dump, checkpoint_path=checkpoint, resume=True, workers=0, batch_size=4)
+    assert stats.lines == len(DUMP) - 4
+    titles = set(session.scalars(select(Book.title)))
+    assert titles == {"River Song", "Glass City", "Iron North", "Winter Garden", "Lost Empire"}
@@ -0,0 +1,32 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import page_cache
+from dal import create_book, table_versions
+from page_cache import ResultCache, _SQLiteStore, cached_list_books, database_id
+from schema import ensure_schema
+
+
+def test_database_id_ignores_credentials_and_cwd(tmp_path, monkeypatch):
+    assert database_id("postgresql://a:secret@db/books") == database_id("postgresql://b:other@db/books")
+    assert database_id("postgresql://db/books") != database_id("postgresql://db/books_test")
+    monkeypatch.chdir(tmp_path)
+    assert database_id("sqlite:///books.db") == database_id(f"sqlite:///{tmp_path / 'books.db'}")
+
+
+def test_catalogs_sharing_a_store_do_not_share_pages(tmp_path, monkeypatch):
+    store = _SQLiteStore(str(tmp_path / "pages.sqlite"), 1 << 20)
+    pages = {}
+    for name in ("dev", "test"):
+        engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+        ensure_schema(engine)
+        with Session(engine) as s:
+            create_book(s, title=f"{name} book")
+            s.commit()
+            # fresh L1 each time: only the shared L2 could leak across catalogs
+            monkeypatch.setattr(page_cache, "_cache", ResultCache(store))
+            versions = table_versions(s, "books", "reviews")
+            pages[name] = cached_list_books(s, q=None, sort="title", cursor=None, versions=versions)
+        engine.dispose()
+    assert [b.title for b in pages["dev"].items] == ["dev book"]
+    assert [b.title for b in pages["test"].items] == ["test book"]
@@ -0,0 +1,59 @@
+from sqlalchemy import text
+
+import sql_trace
+
+
+def _setup(monkeypatch, engine):
+    monkeypatch.setenv("SQL_TRACE", "1")
+    monkeypatch.setattr(sql_trace, "TRACE_FILE", "")
+    sql_trace.install(engine)
+    sql_trace.end_render()
+
+
+def test_fragment_queries_are_attributed_and_flagged(monkeypatch, engine):
+    _setup(monkeypatch, engine)
+
+    @sql_trace.traced("card")
+    def card(book_id):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT count(*) FROM reviews WHERE book_id = :id"), {"id": book_id})
+
+    sql_trace.begin_render("test")
+    for i in range(sql_trace.REPEAT_THRESHOLD):
+        card(i)
+    trace = sql_trace.end_render()
+
+    assert trace.sections["card"].statements == sql_trace.REPEAT_THRESHOLD
+    assert [r["section"] for r in trace.repeated()] == ["card"]
+
+
+def test_fragment_rerun_gets_its_own_trace(monkeypatch, engine):
+    _setup(monkeypatch, engine)
+    finished = []
+
+    @sql_trace.traced("card", on_finish=finished.append)
+    def card():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    card()
+
+    assert sql_trace.current() is None
+    assert len(finished) == 1
+    assert finished[0].label == "fragment:card"
+    assert finished[0].sections["card"].statements == 1
+
+
+def test_rows_from_rowcount(monkeypatch, engine):
+    _setup(monkeypatch, engine)
+    sql_trace.begin_render("test")
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (username, created_at) VALUES ('a', CURRENT_TIMESTAMP), ('b', CURRENT_TIMESTAMP)"))
+        conn.execute(text("SELECT * FROM users")).fetchall()
+    trace = sql_trace.end_render()
+
+    shapes = {s.shape: s for s in trace.sections["app"].shapes.values()}
+    assert shapes["INSERT INTO users (username, created_at) VALUES (?, CURRENT_TIMESTAMP), (?, CURRENT_TIMESTAMP)"].rows == 2
+    # pysqlite reports rowcount -1 for SELECT: rows stay unknown.
+    assert shapes["SELECT * FROM users"].rows is None
+    assert trace.rows == 2